@@ -5,8 +5,10 @@
 This package provides a quick way of creating custom API clients for JSON-based
 REST APIs. The majority of the work is in the creation of a
 :attr:`RestConsumer.CONFIG` dictionary for the class. This dictionary
-dynamically configures the object at instantiation time with the appropriate
-:func:`~tornado.gen.coroutine` wrapped HTTP fetch methods.
+dynamically configures the object with the appropriate native coroutine
+(`async def`) HTTP fetch methods. The methods are
+compiled once per CONFIG node (see :func:`compile_consumer`) and shared by
+every consumer built from that node.
 
 .. autoclass:: RestConsumer
    :members:
@@ -27,20 +29,205 @@ import logging
 
 log = logging.getLogger(__name__)
 
+import asyncio
+import collections.abc
+import copy
 import functools
-import json
+import inspect
+import re
+import time
 import types
+import weakref
 
 from typing import Dict, Optional
-from urllib.parse import urlencode
+from urllib.parse import urlencode, urlsplit
+
+from tornado import gen, httpclient, httputil, locks, queues
+
+from tornado_rest_client import codec as codec_module
+from tornado_rest_client import (
+    backoff,
+    batch,
+    compress,
+    diagnostics,
+    exceptions,
+    formats,
+    metrics,
+    models,
+    pagination,
+    ratelimit,
+    streaming,
+    tracing,
+    uploads,
+    utils,
+)
+
+#: Returned by :func:`ExceptionMatcher.match` when nothing in the
+#: configuration handles an exception, and it should be re-raised as-is.
+RERAISE = object()
+
+# Status code range keys, like `5xx` or `500-599`
+_CODE_RANGE_RE = re.compile(r"^(\d{3})-(\d{3})$")
+_CODE_MASK_RE = re.compile(r"^\d(?:\dx|xx)$")
+
+
+class ExceptionMatcher:
+    """Compiled form of a :attr:`RestClient.EXCEPTIONS` dictionary.
+
+    The configuration is parsed once into lookup tables, so that matching an
+    exception during an error storm is a couple of dictionary lookups:
+
+    * Exception types are resolved through the MRO, so subclasses (ie,
+      :exc:`~tornado.simple_httpclient.HTTPTimeoutError`) use the
+      configuration of their closest configured parent.
+    * For exceptions with an integer `code` attribute (HTTP errors), keys
+      that look like status codes (`'503'`, `503`), masks (`'5xx'`, `'50x'`),
+      ranges (`'500-599'`, `range(500, 600)`) match on the code itself.
+    * Any other key is matched as a substring of `str(exception)`, as are
+      all keys when the exception carries no status code.
+    * When several keys match, the first one in the dictionary wins, as it
+      always has.
+    * The empty string key is the default, used when nothing else matched.
+
+    :param dict config: The EXCEPTIONS dictionary to compile
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.catch = tuple(config)
+
+        # Per configured exception type: (codes, strings, default)
+        self._rules = {
+            exc_type: self._compile_rules(conf or {}) for exc_type, conf in config.items()
+        }
+
+        # Per raised exception type: the rules of its closest configured parent
+        self._by_type = {}
+
+    @staticmethod
+    def _compile_rules(conf):
+        # Every rule keeps the position of its key, so that the first key of
+        # the dictionary that matches wins, whatever its kind.
+        codes = {}  # code: (position, action)
+        strings = []  # (key, action) matched against code-less exceptions
+        text_strings = []  # (position, key, action), minus the status code keys
+        default = RERAISE
+
+        for position, (key, action) in enumerate(conf.items()):
+            code_range = None
+            if key == "":
+                default = action
+                continue
+            if isinstance(key, range):
+                code_range = key
+            elif isinstance(key, int):
+                code_range = (key,)
+                key = str(key)
+            elif key.isdigit() and len(key) == 3:
+                code_range = (int(key),)
+            elif _CODE_MASK_RE.match(key):
+                low, high = key.replace("x", "0"), key.replace("x", "9")
+                code_range = range(int(low), int(high) + 1)
+            elif _CODE_RANGE_RE.match(key):
+                low, high = _CODE_RANGE_RE.match(key).groups()
+                code_range = range(int(low), int(high) + 1)
+            else:
+                text_strings.append((position, key, action))
+
+            if code_range is None:
+                strings.append((key, action))
+                continue
+            if not isinstance(key, range):
+                strings.append((key, action))
+            # Expand the codes into the lookup table, earlier keys first
+            for code in code_range:
+                codes.setdefault(code, (position, action))
+
+        return codes, strings, text_strings, default
+
+    def _rules_for(self, exc_type):
+        try:
+            return self._by_type[exc_type]
+        except KeyError:
+            pass
 
-from tornado import gen, httpclient, httputil
+        rules = None
+        for klass in exc_type.__mro__:
+            if klass in self._rules:
+                rules = self._rules[klass]
+                break
 
-from tornado_rest_client import exceptions, utils
+        self._by_type[exc_type] = rules
+        return rules
+
+    def match(self, exc):
+        """Finds the configured behavior for `exc`.
+
+        :param Exception exc: The exception to look up
+
+        :return: A tuple of the action (an exception class to raise, `None` to
+            retry, or :data:`RERAISE`) and whether it came from the default.
+        """
+        rules = self._rules_for(type(exc))
+        if rules is None:
+            return RERAISE, False
+        codes, strings, text_strings, default = rules
+
+        code = getattr(exc, "code", None)
+        if isinstance(code, int) and not isinstance(code, bool):
+            # A text key listed before the code's key still wins
+            position, action = codes.get(code, (None, None))
+            if text_strings:
+                message = str(exc)
+                for text_position, key, text_action in text_strings:
+                    if position is not None and text_position > position:
+                        break
+                    if key in message:
+                        return text_action, False
+            if position is not None:
+                return action, False
+            return default, True
+
+        if strings:
+            message = str(exc)
+            for key, action in strings:
+                if key in message:
+                    return action, False
+
+        return default, True
+
+
+#: Compiled :class:`ExceptionMatcher` objects, keyed by the `id()` of their
+#: EXCEPTIONS dictionary (which they hold a reference to, so that the `id()`
+#: cannot be recycled while it is cached).
+_EXCEPTION_MATCHERS = {}
+
+#: Matchers kept, so that per-instance EXCEPTIONS dictionaries do not grow
+#: the cache forever.
+_MAX_EXCEPTION_MATCHERS = 256
+
+
+def compile_exceptions(config):
+    """Returns the (cached) :class:`ExceptionMatcher` for `config`.
+
+    EXCEPTIONS dictionaries are treated as immutable once they have been
+    compiled.
+
+    :param dict config: A :attr:`RestClient.EXCEPTIONS` dictionary
+    :return: An :class:`ExceptionMatcher`
+    """
+    matcher = _EXCEPTION_MATCHERS.get(id(config))
+    if matcher is not None and matcher.config is config:
+        return matcher
+
+    if len(_EXCEPTION_MATCHERS) >= _MAX_EXCEPTION_MATCHERS:
+        _EXCEPTION_MATCHERS.clear()
+    matcher = _EXCEPTION_MATCHERS[id(config)] = ExceptionMatcher(config)
+    return matcher
 
 
 def retry(func=None, retries=3, delay=0.25):
-    """Coroutine-compatible retry decorator.
+    """Coroutine retry decorator.
 
     This decorator provides a simple retry mechanism that compares the
     exceptions it received against a configuration list stored in the
@@ -50,53 +237,52 @@ def retry(func=None, retries=3, delay=0.25):
     `401`/`403` might want to throw an
     :exc:`~tornado_rest_client.exceptions.InvalidCredentials` exception.
 
+    The time waited between attempts is decided by the calling-object's
+    :attr:`RestClient.BACKOFF` policy. Objects without a policy wait a fixed
+    `delay` seconds.
+
+    Native coroutines (`async def`) are wrapped in a native coroutine. Any
+    other function is wrapped with :func:`~tornado.gen.coroutine` once, and a
+    thin generator shim is returned so that the decorator can still be stacked
+    under :func:`~tornado.gen.coroutine` as it always has been.
+
     Examples:
 
-    >>> @gen.coroutine
-    ... @retry
-    ... def some_func(self):
-    ...     yield ...
+    >>> @retry
+    ... async def some_func(self):
+    ...     await ...
+
+    >>> @retry(retries=5)
+    ... async def some_func(self):
+    ...     await ...
 
     >>> @gen.coroutine
-    ... @retry(retries=5):
+    ... @retry
     ... def some_func(self):
     ...     yield ...
     """
 
     def decorate(func):
+        if inspect.iscoroutinefunction(func):
+            coro_func = func
+        else:
+            coro_func = gen.coroutine(func)
+
         @functools.wraps(func)
-        def wrapper(self, *args, **kwargs):
+        async def wrapper(self, *args, **kwargs):
             # Try #1!
             i = 1
-
-            # Get a list of private kwargs to mask
-            private_kwargs = getattr(self, "_private_kwargs", [])
-
-            # For security purposes, create a patched kwargs string that
-            # removes passwords from the arguments. This is never guaranteed to
-            # work (an API could have 'foo' as their password field, and we
-            # just won't know ...), but we make a best effort here.
-            safe_kwargs = dict(kwargs)
-            remove = [k for k in safe_kwargs if k in private_kwargs]
-            for k in remove:
-                safe_kwargs[k] = "****"
+            wait = None
+            policy = getattr(self, "BACKOFF", None)
+            matcher = compile_exceptions(self.EXCEPTIONS)
 
             while True:
-                # Don't log out the first try as a 'Try' ... just do it
-                if i > 1:
-                    log.debug(
-                        "Try (%s/%s) of %s(%s, %s)", i, retries, func, args, safe_kwargs
-                    )
-
                 # Attempt the method. Catch any exception listed in
                 # self.EXCEPTIONS.
 
                 try:
-                    ret = yield gen.coroutine(func)(self, *args, **kwargs)
-                    raise gen.Return(ret)
-                except tuple(  # pylint: disable=catching-non-exception
-                    self.EXCEPTIONS.keys()
-                ) as generic_exc:
+                    return await coro_func(self, *args, **kwargs)
+                except matcher.catch as generic_exc:
                     error = str(generic_exc)
                     if hasattr(generic_exc, "message"):
                         error = generic_exc.message
@@ -107,50 +293,76 @@ def retry(func=None, retries=3, delay=0.25):
                         log.debug("Raising exception: %s", generic_exc)
                         raise generic_exc  # pylint: disable=raising-non-exception
 
-                    # Gather the config for this exception-type from
-                    # self.EXCEPTIONS. Iterate through the data and see if we
-                    # have a matching exception string.
-                    exc_conf = self.EXCEPTIONS[type(generic_exc)].copy()
-
-                    # An empty string for the key is the default exception
-                    # It's optional, but can match before others match, so we
-                    # pop it before searching.
-                    default_exc = exc_conf.pop("", False)
-                    log.debug("Searching through %s", exc_conf)
-                    matched_excs = [
-                        exc
-                        for key, exc in list(exc_conf.items())
-                        if key in str(generic_exc)
-                    ]
-
-                    log.debug("Matched exceptions: %s", matched_excs)
-                    if matched_excs:
-                        if matched_excs[0] is not None:
-                            specific_exc = matched_excs[0]
-                            log.debug("Matched exception: %s", specific_exc)
-                            raise specific_exc(
-                                generic_exc
-                            )  # pylint: disable=raise-missing-from
-                    elif default_exc is not False:
-                        raise default_exc(
-                            str(generic_exc)
-                        )  # pylint: disable=raise-missing-from
-                    elif default_exc is False:
+                    # Look up the behavior configured in self.EXCEPTIONS for
+                    # this exception.
+                    action, is_default = matcher.match(generic_exc)
+                    log.debug("Matched exception: %s", action)
+                    if action is RERAISE:
                         # Reaching this part means no exception was matched
                         # and no default was specified.
-                        log.debug(
-                            "No explicit behavior for this exception found. Raising."
-                        )
+                        log.debug("No explicit behavior for this exception found. Raising.")
                         raise generic_exc  # pylint: disable=raising-non-exception
+                    if action is not None and is_default:
+                        raise action(str(generic_exc)) from generic_exc
+                    if action is not None:
+                        raise action(generic_exc) from generic_exc
 
                     log.debug("Exception is retryable!")
+                    upload = _find_upload(args, kwargs)
+                    if upload is not None and not upload.replayable():
+                        raise exceptions.UploadNotReplayable(
+                            f"Not retrying, {upload!r} cannot be sent again: {error}"
+                        ) from generic_exc
+                    if policy is None:
+                        wait = delay
+                    else:
+                        wait = policy.delay(i, wait, generic_exc)
+
+                    # Describing the retry is only worth it once we know
+                    # there is one, and someone is listening.
+                    trace = getattr(self, "trace", None)
+                    if trace is not None or log.isEnabledFor(logging.DEBUG):
+                        safe_kwargs = _safe_kwargs(self, kwargs)
+                        log.debug(
+                            "Try (%s/%s) of %s(%s, %s) in %s...",
+                            i + 1,
+                            retries,
+                            func,
+                            _safe_args(self, args),
+                            safe_kwargs,
+                            wait,
+                        )
+                        if trace is not None:
+                            trace.emit(
+                                diagnostics.RETRY,
+                                call=func.__qualname__,
+                                attempt=i,
+                                error=generic_exc,
+                                wait=wait,
+                                kwargs=safe_kwargs,
+                            )
+                    sink = getattr(self, "metrics", None)
+                    if sink is not None:
+                        sink.observe("retry_sleep_seconds", wait, metrics.tags())
+                    tracer = getattr(self, "tracer", None)
+                    span = tracer.current_span() if tracer is not None else None
+                    if span is not None:
+                        span.add_event(
+                            "retry",
+                            {"attempt": i, "reason": str(generic_exc), "wait": wait},
+                        )
                     i = i + 1
-                    log.debug("Retrying in %s...", delay)
-                    yield gen.sleep(delay)
+                    await gen.sleep(wait)
 
-                log.debug("Retrying..")
+        if coro_func is func:
+            return wrapper
+
+        @functools.wraps(func)
+        def shim(self, *args, **kwargs):
+            ret = yield wrapper(self, *args, **kwargs)
+            raise gen.Return(ret)
 
-        return wrapper
+        return shim
 
     # http://stackoverflow.com/questions/3888158/
     # python-making-decorators-with-optional-arguments
@@ -160,40 +372,328 @@ def retry(func=None, retries=3, delay=0.25):
     return decorate
 
 
-def create_http_method(name, http_method):  # pylint: disable=unused-argument
+def _find_upload(args, kwargs):
+    """Returns the :class:`~tornado_rest_client.uploads.Upload` among the
+    arguments of a call, if any."""
+    for value in (*args, *kwargs.values()):
+        if isinstance(value, uploads.Upload):
+            return value
+    return None
+
+
+def _safe_kwargs(obj, kwargs):
+    """Returns a copy of `kwargs` with the private values of `obj` masked.
+
+    For security purposes, the arguments listed in `obj._private_kwargs` (ie,
+    passwords) are replaced. This is never guaranteed to work (an API could
+    have 'foo' as their password field, and we just won't know ...), but we
+    make a best effort here.
+    """
+    private_kwargs = getattr(obj, "_private_kwargs", ())
+    return _safe_value(private_kwargs, kwargs)
+
+
+def _safe_args(obj, args):
+    """Returns a copy of `args` with the private values of `obj` masked."""
+    private_kwargs = getattr(obj, "_private_kwargs", ())
+    return tuple(_safe_value(private_kwargs, arg) for arg in args)
+
+
+def _safe_value(private_kwargs, value):
+    """Masks the private entries of mappings (ie, the `params` or `headers`
+    of a call) and the query string of URLs found in `value`."""
+    if isinstance(value, collections.abc.Mapping):
+        return {
+            k: "****" if k in private_kwargs else _safe_value(private_kwargs, v)
+            for k, v in value.items()
+        }
+    if isinstance(value, (list, tuple)):
+        return value.__class__(_safe_value(private_kwargs, v) for v in value)
+    if isinstance(value, str) and "://" in value:
+        # Query strings may hold credentials, ie the tokens of a
+        # SimpleTokenRestClient.
+        return value.split("?", 1)[0]
+    return value
+
+
+class PreparedEndpoint:
+    """The parts of the requests of a consumer method that never change.
+
+    Built once per CONFIG node and HTTP method by :func:`compile_consumer`,
+    so that a call only adds its own url and arguments.
+
+    :param str http_method: Name of the method (ie, `get`)
+    :param dict auth: The `auth` of the CONFIG, with its `user` and `pass`
+    :param dict headers: Headers sent with every request of the method
+    :param float timeout: Timeout of every request of the method
+    :param str response_format: What :func:`RestClient.fetch` makes of the
+        response bodies (see :mod:`~tornado_rest_client.formats`)
+    """
+
+    __slots__ = (
+        "method",
+        "auth_username",
+        "auth_password",
+        "response_format",
+        "options",
+        "fetch_options",
+    )
+
+    def __init__(self, http_method, auth=None, headers=None, timeout=None, response_format=None):
+        formats.check(response_format)
+        auth = auth or {}
+        self.method = http_method.upper()
+        self.auth_username = auth.get("user")
+        self.auth_password = auth.get("pass")
+        self.response_format = response_format
+        # Only handed to the client when set, as custom clients may not take
+        # them.
+        self.options = {}
+        if headers:
+            self.options["headers"] = dict(headers)
+        if timeout is not None:
+            self.options["timeout"] = timeout
+        # Streams decode their records themselves
+        self.fetch_options = self.options
+        if response_format is not None:
+            self.fetch_options = {**self.options, "response_format": response_format}
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.method})"
+
+
+def create_http_method(  # pylint: disable=unused-argument
+    name, http_method, rate_limiter=None, model=None, endpoint=None
+):
     """Creates the *GET*/*PUT*/*DELETE*/*POST* function for a RestConsumer.
 
-    This method is called by :func:`RestConsumer._create_http_methods` to
-    create a method for the :class:`RestConsumer` object with the appropriate
+    This method is called by :func:`compile_consumer` to create a native
+    coroutine method for the :class:`RestConsumer` object with the appropriate
     name and HTTP method (:func:`http_get`, :func:`http_put`,
     :func:`http_delete`, :func:`http_post`)
 
     :param str name: Full name of the function to create (ie, `http_get`)
     :param str http_method: Name of the method (ie, `get`)
+    :param RateLimit rate_limiter: Optional
+        :class:`~tornado_rest_client.ratelimit.RateLimit`. Every attempt of a
+        call must get a token from the client's bucket for it.
+    :param model: Optional :func:`~tornado_rest_client.models.decoder` the
+        response body is decoded with.
+    :param PreparedEndpoint endpoint: The method, auth and options of every
+        request.
+
+    The *POST*/*PUT*/*PATCH* methods also take a single positional upload
+    (see :mod:`~tornado_rest_client.uploads`), sent as the body of the
+    request. Their kwargs then go in its query string.
 
     :return: A method appropriately configured and named.
     """
+    if endpoint is None:
+        endpoint = PreparedEndpoint(http_method)
 
-    @gen.coroutine
-    def method(self, *args, **kwargs):
+    async def method(self, *args, **kwargs):
+        url = self._url  # pylint: disable=protected-access
+        params = kwargs
+        if args:
+            # We don't support un-named args, but for a single upload (the
+            # body of the request). Throw an exception.
+            if len(args) > 1 or endpoint.method not in uploads.METHODS:
+                raise exceptions.InvalidOptions("Must pass named-args (kwargs)")
+            params = uploads.wrap(args[0])
+            if kwargs:
+                url = utils.url_with_query(url, kwargs)
+
+        body = await _call(self, endpoint, url, params, rate_limiter)
+        if model is not None:
+            return model.body(body)
+        return body
+
+    method.__name__ = http_method
+    method.rate_limiter = rate_limiter
+    method.model = model
+    method.endpoint = endpoint
+    return method
+
+
+async def _call(consumer, endpoint, url, params, rate_limiter=None, **kwargs):
+    """Makes a single request on behalf of a RestConsumer.
+
+    :param RestConsumer consumer: The consumer making the call
+    :param PreparedEndpoint endpoint: The endpoint being called
+    :param str url: The full url of the call
+    :param dict params: The arguments of the call
+    :param RateLimit rate_limiter: Optional rate limit of the call
+    :param dict kwargs: Passed on to :func:`RestClient.fetch`
+    """
+    client = consumer._client  # pylint: disable=protected-access
+    tracer = getattr(client, "tracer", None)
+    if tracer is None:
+        return await _make_call(consumer, endpoint, url, params, rate_limiter, **kwargs)
+
+    tags = consumer._tags  # pylint: disable=protected-access
+    path = tags["path"] or ""
+    with tracer.span(
+        f"{endpoint.method} {path}",
+        tracing.INTERNAL,
+        {"rest_client.consumer": tags["consumer"], "url.template": path},
+    ):
+        return await _make_call(consumer, endpoint, url, params, rate_limiter, **kwargs)
+
+
+async def _make_call(consumer, endpoint, url, params, rate_limiter, **kwargs):
+    """Makes the request of :func:`_call`."""
+    client = consumer._client  # pylint: disable=protected-access
+    sink = getattr(client, "metrics", None)
+    token = None
+    if sink is not None:
+        # Lets the client tag what it measures with the consumer's details
+        token = metrics.TAGS.set(consumer._tags)  # pylint: disable=protected-access
+
+    if rate_limiter is not None:
+        # The client takes a token for every attempt of the call
+        kwargs["rate_limit"] = rate_limiter
+
+    try:
+        return await client.fetch(
+            url=url,
+            method=endpoint.method,
+            params=params,
+            auth_username=endpoint.auth_username,
+            auth_password=endpoint.auth_password,
+            **endpoint.fetch_options,
+            **kwargs,
+        )
+    finally:
+        if token is not None:
+            metrics.TAGS.reset(token)
+
+
+#: Queued once every page of a paginated call has been fetched.
+_PAGES_DONE = object()
+
+
+def create_iter_method(name, http_method, paginator, rate_limiter=None, model=None, endpoint=None):
+    """Creates the paginated iterator function for a RestConsumer.
+
+    This method is called by :func:`compile_consumer` to create
+    :func:`iter_get` (or :func:`iter_post`, ...) for `http_methods` entries
+    that declare a `pagination` (see :mod:`~tornado_rest_client.pagination`).
+    The method is an async iterator over the items of every page. Up to
+    `prefetch` pages are fetched ahead of the one whose items are being
+    handed out.
+
+    :param str name: Full name of the function to create (ie, `iter_get`)
+    :param str http_method: Name of the method (ie, `get`)
+    :param Paginator paginator: The
+        :class:`~tornado_rest_client.pagination.Paginator` for the endpoint
+    :param RateLimit rate_limiter: Optional
+        :class:`~tornado_rest_client.ratelimit.RateLimit`. Every attempt to
+        fetch a page must get a token from the client's bucket for it.
+    :param model: Optional :func:`~tornado_rest_client.models.decoder` every
+        item is decoded with.
+    :param PreparedEndpoint endpoint: The method, auth and options of every
+        request.
+
+    :return: A method appropriately configured and named.
+    """
+    if endpoint is None:
+        endpoint = PreparedEndpoint(http_method)
+
+    async def method(self, *args, prefetch=None, **kwargs):
         # We don't support un-named args. Throw an exception.
         if args:
             raise exceptions.InvalidOptions("Must pass named-args (kwargs)")
 
-        ret = yield self._client.fetch(  # pylint: disable=protected-access
-            url=f"{self.ENDPOINT}{self._path}",  # pylint: disable=protected-access
-            method=http_method.upper(),
+        depth = paginator.prefetch if prefetch is None else prefetch
+        pages = queues.Queue()
+        # One slot for the page being consumed, and one per page ahead of it
+        slots = locks.Semaphore(depth + 1)
+
+        url = self._url  # pylint: disable=protected-access
+
+        async def fetch_pages():
+            page = paginator.first(url, kwargs)
+            while page is not None:
+                await slots.acquire()
+                responses = []
+                extra = {}
+                if paginator.needs_response:
+                    extra["response_callback"] = responses.append
+                page_url, params = page
+                body = await _call(self, endpoint, page_url, dict(params), rate_limiter, **extra)
+                pages.put_nowait(body)
+                page = paginator.next(page, body, *responses[-1:])
+
+        producer = asyncio.ensure_future(fetch_pages())
+        producer.add_done_callback(lambda _: pages.put_nowait(_PAGES_DONE))
+        try:
+            while True:
+                body = await pages.get()
+                if body is _PAGES_DONE:
+                    break
+                for item in paginator.items(body):
+                    yield item if model is None else model.record(item)
+                slots.release()
+            producer.result()
+        finally:
+            if not producer.done():
+                producer.cancel()
+
+    method.__name__ = name
+    method.paginator = paginator
+    method.model = model
+    method.endpoint = endpoint
+    return method
+
+
+def create_stream_method(name, rate_limiter=None, model=None, endpoint=None):
+    """Creates the streaming *GET* function for a RestConsumer.
+
+    This method is called by :func:`compile_consumer` to create
+    :func:`stream_get` next to :func:`http_get`. It returns an async iterator
+    over the records of the response (see :func:`RestClient.stream`).
+
+    :param str name: Full name of the function to create (ie, `stream_get`)
+    :param RateLimit rate_limiter: Optional
+        :class:`~tornado_rest_client.ratelimit.RateLimit`. Every attempt to
+        start the stream must get a token from the client's bucket for it.
+    :param model: Optional :func:`~tornado_rest_client.models.decoder` every
+        record is decoded with.
+    :param PreparedEndpoint endpoint: The auth and options of every request.
+
+    :return: A method appropriately configured and named.
+    """
+    if endpoint is None:
+        endpoint = PreparedEndpoint("get")
+
+    async def method(self, *args, **kwargs):
+        # We don't support un-named args. Throw an exception.
+        if args:
+            raise exceptions.InvalidOptions("Must pass named-args (kwargs)")
+
+        options = endpoint.options
+        if rate_limiter is not None:
+            options = {**options, "rate_limit": rate_limiter}
+
+        records = self._client.stream(  # pylint: disable=protected-access
+            url=self._url,  # pylint: disable=protected-access
+            method="GET",
             params=kwargs,
-            auth_username=self.CONFIG.get("auth", {}).get("user"),
-            auth_password=self.CONFIG.get("auth", {}).get("pass"),
+            auth_username=endpoint.auth_username,
+            auth_password=endpoint.auth_password,
+            **options,
         )
-        raise gen.Return(ret)
+        async for record in records:
+            yield record if model is None else model.record(record)
 
-    method.__name__ = http_method
+    method.__name__ = name
+    method.rate_limiter = rate_limiter
+    method.model = model
+    method.endpoint = endpoint
     return method
 
 
-def create_consumer_method(name, config):  # pylint: disable=unused-argument
+def create_consumer_method(name, config):
     """Creates a method that returns a configured RestConsumer object.
 
     RestConsumer objects themselves can have references to other RestConsumer
@@ -222,14 +722,11 @@ def create_consumer_method(name, config):  # pylint: disable=unused-argument
         # the RestConsumer parent object. This ensures that tokens replaced in
         # the 'path' variables are passed all the way down the instantiation
         # chain.
-        merged_kwargs = dict(
-            list(self._kwargs.items())
-            + list(kwargs.items())  # pylint: disable=protected-access
-        )
+        merged_kwargs = {**self._kwargs, **kwargs}  # pylint: disable=protected-access
 
-        return self.__class__(
+        return self._compiled_base(  # pylint: disable=protected-access
             name=name,
-            config=self._attrs[name],  # pylint: disable=protected-access
+            config=config,
             client=self._client,  # pylint: disable=protected-access
             *args,
             **merged_kwargs,
@@ -239,6 +736,137 @@ def create_consumer_method(name, config):  # pylint: disable=unused-argument
     return method
 
 
+class _ConsumerProperty:
+    """Lazy access property for `attrs` that are configured with `new`.
+
+    On first access the child :class:`RestConsumer` is created and stored on
+    the instance, so later lookups never reach this descriptor again. If the
+    child cannot be created without more arguments (ie, its `path` still has
+    tokens that need filling in), a bound access method is stored instead.
+    """
+
+    def __init__(self, method):
+        self._method = method
+        self._name = method.__name__
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+
+        try:
+            value = self._method(instance)
+        except TypeError:
+            value = types.MethodType(self._method, instance)
+
+        instance.__dict__[self._name] = value
+        return value
+
+
+#: Compiled :class:`RestConsumer` subclasses, keyed by the consumer class and
+#: the `id()` of the CONFIG node they were built from. Each compiled class
+#: holds a reference to its CONFIG node, so the `id()` cannot be recycled
+#: while it is cached.
+_COMPILED_CONSUMERS = {}
+
+#: Compiled classes kept, so that consumers built from a fresh `config` dict
+#: every time do not grow the cache forever.
+_MAX_COMPILED_CONSUMERS = 1024
+
+
+def compile_consumer(cls, config):
+    """Returns the (cached) subclass of `cls` that implements `config`.
+
+    The `http_methods` and `attrs` in a CONFIG node never change between
+    instances, so rather than building and binding a fresh set of methods for
+    every :class:`RestConsumer` we build them once into a subclass of `cls`,
+    and re-use that subclass for every consumer of the same CONFIG node.
+
+    CONFIG dictionaries are treated as immutable once they have been compiled.
+
+    :param type cls: The :class:`RestConsumer` class to extend
+    :param dict config: A :attr:`~RestConsumer.CONFIG` node
+
+    :return: A subclass of `cls` with the access methods defined
+    """
+    key = (cls, id(config))
+    compiled = _COMPILED_CONSUMERS.get(key)
+    if compiled is not None and compiled._compiled_config is config:
+        return compiled
+
+    namespace = {
+        "__module__": cls.__module__,
+        "__qualname__": cls.__qualname__,
+        "__doc__": cls.__doc__,
+        "_compiled_base": cls,
+        "_compiled_config": config,
+    }
+
+    # A `rate_limit`, `headers` or `timeout` on the node is shared by all of
+    # its methods, unless the method declares its own.
+    node_limiter = ratelimit.from_config(config.get("rate_limit"))
+    auth = cls.CONFIG.get("auth")
+
+    for http_method, method_config in (config.get("http_methods") or {}).items():
+        full_method_name = f"http_{http_method}"
+        rate_limiter = node_limiter
+        if method_config and method_config.get("rate_limit"):
+            rate_limiter = ratelimit.from_config(method_config["rate_limit"])
+        method_config = method_config or {}
+        endpoint = PreparedEndpoint(
+            http_method,
+            auth=auth,
+            headers={**config.get("headers", {}), **method_config.get("headers", {})},
+            timeout=method_config.get("timeout", config.get("timeout")),
+            response_format=method_config.get("response_format", config.get("response_format")),
+        )
+        model = models.decoder(method_config.get("response_model"))
+        decoded = endpoint.response_format in (None, *formats.DECODED)
+        if model is not None and not decoded:
+            raise exceptions.InvalidOptions(
+                f"{full_method_name}: a response_model needs JSON responses, "
+                f"not {endpoint.response_format!r}"
+            )
+        namespace[full_method_name] = create_http_method(
+            full_method_name,
+            http_method,
+            rate_limiter=rate_limiter,
+            model=model,
+            endpoint=endpoint,
+        )
+        if http_method == "get":
+            namespace["stream_get"] = create_stream_method(
+                "stream_get", rate_limiter=rate_limiter, model=model, endpoint=endpoint
+            )
+        paginator = pagination.from_config(method_config.get("pagination"))
+        if paginator is not None and not decoded:
+            raise exceptions.InvalidOptions(
+                f"{full_method_name}: pagination needs JSON responses, "
+                f"not {endpoint.response_format!r}"
+            )
+        if paginator is not None:
+            namespace[f"iter_{http_method}"] = create_iter_method(
+                f"iter_{http_method}",
+                http_method,
+                paginator,
+                rate_limiter=rate_limiter,
+                model=model,
+                endpoint=endpoint,
+            )
+
+    for name, attr_config in (config.get("attrs") or {}).items():
+        method = create_consumer_method(name, attr_config)
+        if "new" in attr_config:
+            namespace[name] = _ConsumerProperty(method)
+        else:
+            namespace[name] = method
+
+    compiled = type(cls.__name__, (cls,), namespace)
+    if len(_COMPILED_CONSUMERS) >= _MAX_COMPILED_CONSUMERS:
+        _COMPILED_CONSUMERS.clear()
+    _COMPILED_CONSUMERS[key] = compiled
+    return compiled
+
+
 class RestConsumer:
     """Async REST API Consumer object.
 
@@ -249,14 +877,22 @@ class RestConsumer:
     The *GET*, *PUT*, *POST* and *DELETE* methods optionally listed in
     `CONFIG['http_methods']` represent the possible types of HTTP methods
     that the `CONFIG['path']` supports. For each one of these listed, a
-    :func:`~tornado.gen.coroutine` wrapped :func:`http_get`,
-    :func:`http_put`, :func:`http_post`, or :func:`http_delete` method will
-    be created.
+    native coroutine :func:`http_get`, :func:`http_put`, :func:`http_post`,
+    or :func:`http_delete` method will be created. These can be awaited, or
+    yielded from a :func:`~tornado.gen.coroutine`.
+    Paths that support *GET* also get :func:`stream_get`, which returns an
+    async iterator over the records of a (large) response as they arrive.
+    Methods that declare a `pagination` also get an :func:`iter_get` (or
+    :func:`iter_post`, ...) async iterator over the items of every page.
 
     For each item listed in `CONFIG['attrs']`, an access method is created
     that creates and returns a new RestConsumer object that's configured for
     this endpoint. These methods are not asynchronous, but are non-blocking.
 
+    The access methods are generated only once per CONFIG node (see
+    :func:`compile_consumer`), so the object returned when instantiating a
+    RestConsumer is an instance of a cached subclass of the class itself.
+
     :param str name: Name of the resource method (default: None)
     :param dict config: The dictionary object with the configuration for this
       API endpoint call.
@@ -284,6 +920,29 @@ class RestConsumer:
     #: * *new*: Set to True if you want to create an access property rather
     #:   an access method. Only works if your path has no token replacement in
     #:   it.
+    #: * *rate_limit*: A client-side rate limit for the HTTP methods of this
+    #:   path, ie `{'rate': 1, 'burst': 5}` (see
+    #:   :mod:`~tornado_rest_client.ratelimit`). May also be set on a single
+    #:   `http_methods` entry.
+    #: * *pagination*: Set on an `http_methods` entry to generate an
+    #:   `iter_<method>` async iterator over every page, ie
+    #:   `{'type': 'cursor', 'next': 'next_cursor', 'items': 'results'}` (see
+    #:   :mod:`~tornado_rest_client.pagination`).
+    #: * *response_model*: Set on an `http_methods` entry to decode its
+    #:   responses into a dataclass or `msgspec.Struct` rather than dicts (see
+    #:   :mod:`~tornado_rest_client.models`).
+    #: * *headers*: Headers to send (on top of the client's) with the requests
+    #:   of this path. May also be set on a single `http_methods` entry.
+    #: * *timeout*: Timeout of the requests of this path, in seconds. May also
+    #:   be set on a single `http_methods` entry.
+    #: * *response_format*: `json`, `text`, `bytes`, `memoryview` or `auto`,
+    #:   to skip (or pick by `Content-Type`) the decoding of the response
+    #:   bodies of this path (see :mod:`~tornado_rest_client.formats`). May
+    #:   also be set on a single `http_methods` entry.
+    #:
+    #: The method, auth, headers and timeout of every `http_methods` entry are
+    #: worked out once, when the node is compiled (see
+    #: :class:`PreparedEndpoint`).
     #:
     #: This data can be nested as much as you'd like
     #:
@@ -297,6 +956,11 @@ class RestConsumer:
     #: ... }:
     CONFIG = {}
 
+    def __new__(cls, name=None, config=None, client=None, **kwargs):
+        # pylint: disable=unused-argument
+        base = cls.__dict__.get("_compiled_base", cls)
+        return super().__new__(compile_consumer(base, config or base.CONFIG))
+
     def __init__(self, name=None, config=None, client=None, **kwargs):
         """Initializes the RestConsumer."""
         # If these aren't passed in, then get them from the class definition
@@ -305,6 +969,9 @@ class RestConsumer:
 
         # Get the basic options for this particular REST endpoint access object
         self._path = config.get("path", None)
+        # Metrics and traces are tagged with the path before its tokens are
+        # replaced, to keep the number of distinct tags bounded.
+        self._tags = {"consumer": name, "path": self._path}
         self._http_methods = config.get("http_methods", None)
         self._attrs = config.get("attrs", None)
         self._kwargs = kwargs
@@ -316,11 +983,7 @@ class RestConsumer:
         # are pulled from the **kwargs passed into this init. This is used on
         # API paths like Hipchats '/v2/room/%(res)/...' URLs.
         self._path = self.replace_path_tokens(self._path, kwargs)
-
-        # Create all of the methods based on the self._http_methods and
-        # self._attrs dict.
-        self._create_http_methods()
-        self._create_consumer_methods()
+        self._url = f"{self.ENDPOINT}{self._path}"
 
         # Log some things
         log.debug("%s/%s initialized", self.__class__.__name__, self._client)
@@ -335,7 +998,10 @@ class RestConsumer:
         """Search and replace `%xxx%` with values from tokens.
 
         Used to replace any values of `%xxx%` with `'xxx`' from tokens. Can
-        replace one, or many fields at aonce.
+        replace one, or many fields at aonce. Values are URL-escaped, so a
+        token always fills in a single path segment.
+
+        The path is parsed only once (see :func:`~utils.path_template`).
 
         :param str path: String of the path
         :param dict tokens: A dictionary of tokens to search through.
@@ -345,7 +1011,7 @@ class RestConsumer:
             return path
 
         try:
-            path = utils.populate_with_tokens(path, tokens)
+            path = utils.path_template(path).render(tokens)
         except LookupError as exc:
             raise TypeError(  # pylint: disable=raise-missing-from
                 f"Path ({path}), tokens: ({tokens}) error: {exc}"
@@ -353,41 +1019,134 @@ class RestConsumer:
 
         return path
 
-    def _create_http_methods(self):
-        """Create :func:`~tornado.gen.coroutine` wrapped HTTP methods.
+    def batch(self, func, kwargs_iter, concurrency=10, ordered=True, window=None):
+        """Makes one call per item of `kwargs_iter`, a bounded few at a time.
+
+        `func` is either the name of a method of this consumer (ie,
+        `http_get`), or a callable that returns an awaitable, and is called
+        with each `kwargs` in turn:
+
+        >>> async for result in slack.batch(
+        ...     lambda **kwargs: slack.conversations_info().http_get(**kwargs),
+        ...     ({'channel': channel} for channel in channels),
+        ... ):
+        ...     print(result.index, result.result, result.exception)
+
+        See :func:`tornado_rest_client.batch.run` for the options.
 
-        Iterates through the methods described in `self._http_methods` and
-        creates :func:`~tornado.gen.coroutine` wrapped access methods that
-        perform these actions.
+        :return: An async iterator of
+            :class:`~tornado_rest_client.batch.BatchResult`
         """
-        if not self._http_methods:
-            return
+        if isinstance(func, str):
+            func = getattr(self, func)
+        return batch.run(func, kwargs_iter, concurrency=concurrency, ordered=ordered, window=window)
+
+
+class _HTTPRequest(httpclient.HTTPRequest):
+    """An HTTPRequest that keeps its body from before compression, and the
+    rate limiter it must get a token from before every attempt."""
 
-        for http_method in list(self._http_methods.keys()):
-            full_method_name = f"http_{http_method}"
-            method = create_http_method(full_method_name, http_method)
-            setattr(self, full_method_name, types.MethodType(method, self))
+    uncompressed_body = None
+    rate_limiter = None
 
-    def _create_consumer_methods(self):
-        """Creates access methods to the attributes in `self._attrs`.
+    def fill(self, url, method, body, headers):
+        """Returns a new request, with the options of this (template) one.
 
-        Iterates through the attributes described in `self._attrs` and creates
-        access methods that return :class:`RestConsumer` objects for those
-        attributes.
+        Copying the attributes of a template is much cheaper than going
+        through :class:`~tornado.httpclient.HTTPRequest` and its dozens of
+        arguments again.
         """
-        if not self._attrs:
+        request = self.__class__.__new__(self.__class__)
+        request.__dict__.update(self.__dict__)
+        request.url = url
+        request.method = method
+        request.body = body
+        # AsyncHTTPClient.fetch turns them into (a copy as) HTTPHeaders
+        request.headers = {} if headers is None else headers
+        request.start_time = time.time()
+        return request
+
+    def duplicate(self):
+        """Returns a copy of the request that can be sent on its own."""
+        request = copy.copy(self)
+        request.headers = httputil.HTTPHeaders(self.headers)
+        return request
+
+    def uncompressed(self):
+        """Returns a copy of the request, with its uncompressed body."""
+        request = self.duplicate()
+        del request.headers["Content-Encoding"]
+        request.body = self.uncompressed_body
+        request.uncompressed_body = None
+        return request
+
+
+#: Request templates kept by a :class:`RestClient`
+_MAX_TEMPLATES = 64
+
+#: Queued by :class:`_StreamingResponse` once its request is complete.
+_STREAM_DONE = object()
+
+
+class _StreamClosed(Exception):
+    """Raised from the streaming callback to abort a download."""
+
+
+class _StreamingResponse:
+    """The state of a streaming request made by :func:`RestClient.stream`.
+
+    Tornado hands the body over chunk by chunk to :func:`on_chunk`, which
+    queues the records the `decoder` completes. It cannot be told to wait,
+    so when more than `max_pending` records are still queued as the next
+    chunk comes in, the download is aborted and :attr:`error` set.
+    """
+
+    def __init__(self, decoder, max_pending=None):
+        self.decoder = decoder
+        self.max_pending = max_pending
+        self.error = None
+        self.records = queues.Queue()
+        self.started = asyncio.Future()
+        self.task = None
+        self.code = None
+        self.closed = False
+
+    def on_header(self, line):
+        # Every response (including redirects) starts with its status line,
+        # and ends its headers with a blank line.
+        if line.startswith("HTTP/"):
+            self.code = httputil.parse_response_start_line(line).code
+        elif line == "\r\n" and 200 <= self.code < 300:
+            if not self.started.done():
+                self.started.set_result(self.code)
+
+    def on_chunk(self, chunk):
+        if self.closed:
+            raise _StreamClosed()
+        if not 200 <= self.code < 300:
             return
+        if self.max_pending is not None and self.records.qsize() > self.max_pending:
+            self.closed = True
+            self.error = exceptions.StreamOverflow(
+                f"More than {self.max_pending} records are waiting to be "
+                "consumed, the download was aborted"
+            )
+            raise _StreamClosed()
+        for record in self.decoder.feed(chunk):
+            self.records.put_nowait(record)
 
-        for name in list(self._attrs.keys()):
-            method = create_consumer_method(name, self._attrs[name])
+    def on_done(self, task):
+        self.records.put_nowait(_STREAM_DONE)
 
-            if "new" in self._attrs[name]:
-                try:
-                    setattr(self, name, method(self))
-                except TypeError:
-                    setattr(self, name, types.MethodType(method, self))
-            else:
-                setattr(self, name, types.MethodType(method, self))
+    def close(self):
+        """Stops the download, if it is still going."""
+        self.closed = True
+        if not self.task.done():
+            self.task.cancel()
+        elif not self.task.cancelled():
+            # Mark the exception as retrieved, the caller has already seen
+            # everything it needs (or given up).
+            self.task.exception()
 
 
 class RestClient:
@@ -397,7 +1156,44 @@ class RestClient:
     methods for URL escaping, and a single :func:`~RestClient.fetch` method
     that can handle GET/POST/PUT/DELETEs.
 
+    :param AsyncHTTPClient client: The HTTP client to use. When `None`, one
+        is built by `transport`, or the process-wide
+        :class:`~tornado.httpclient.AsyncHTTPClient` is used.
     :param dict headers: Headers to pass in on every HTTP request
+    :param CircuitBreakers circuit_breakers: A
+        :class:`~tornado_rest_client.circuit.CircuitBreakers` registry to check
+        before (and update after) every HTTP attempt.
+    :param ResponseCache cache: A
+        :class:`~tornado_rest_client.cache.ResponseCache` to serve (and
+        revalidate) *GET* requests from.
+    :param bool coalesce: Share a single in-flight request between concurrent
+        identical *GET* calls (same URL, arguments, headers and auth user). Every
+        caller gets the same decoded body, which must then be treated as
+        read-only.
+    :param Bulkheads bulkheads: A
+        :class:`~tornado_rest_client.bulkhead.Bulkheads` limiting the number of
+        HTTP attempts in flight, for the whole client and per endpoint.
+    :param Compression compression: A
+        :class:`~tornado_rest_client.compress.Compression` for request bodies.
+    :param bool decompress_response: Ask for (and decompress) gzip encoded
+        responses.
+    :param codec: The :class:`~tornado_rest_client.codec.Codec` (or name of
+        the codec) used to encode and decode JSON bodies. By default, the
+        fastest one installed.
+    :param Transport transport: A
+        :class:`~tornado_rest_client.transport.Transport` describing the HTTP
+        client to build for this RestClient. An isolated client built this way
+        is released by :func:`close`.
+    :param TraceHook trace: A
+        :class:`~tornado_rest_client.diagnostics.TraceHook` to hand structured
+        events about (a sample of) the requests and retries to.
+    :param MetricsSink metrics: A
+        :class:`~tornado_rest_client.metrics.MetricsSink` to report the
+        timing of every phase of the requests to.
+    :param Tracer tracer: A :class:`~tornado_rest_client.tracing.Tracer` to
+        wrap consumer calls, and each of their HTTP attempts, in spans.
+    :param Hedging hedging: A :class:`~tornado_rest_client.hedge.Hedging`
+        policy to send a duplicate of slow *GET* requests.
     """
 
     #: Dictionary describing the exception handling behavior for HTTP calls.
@@ -410,6 +1206,10 @@ class RestClient:
     #: ...         '': <all other strings trigger this exception>
     #: ...     }
     #:
+    #: Subclasses of a listed exception type share its configuration. For
+    #: exceptions with a status `code`, keys like `'503'`, `'5xx'` or
+    #: `'500-599'` match on the code rather than the message (see
+    #: :class:`ExceptionMatcher`).
     EXCEPTIONS: Dict[Exception, Optional[Dict]] = {
         httpclient.HTTPError: {
             "401": exceptions.InvalidCredentials,
@@ -424,6 +1224,14 @@ class RestClient:
         }
     }
 
+    #: Backoff policy used between retries (see
+    #: :mod:`~tornado_rest_client.backoff`). For example:
+    #:
+    #: >>> BACKOFF = backoff.ExponentialBackoff(base=0.25, cap=10)
+    #:
+    #: When `None`, the fixed `delay` of the :func:`retry` decorator is used.
+    BACKOFF: Optional[backoff.Backoff] = None
+
     # Combined Connect and Request Timeout settings. Note, None
     # is the default -- but actually times out after 20s (due to
     # a bug in Tornado). Use a very high number or 0 to indicate no
@@ -441,50 +1249,211 @@ class RestClient:
         timeout=TIMEOUT,
         json=None,  # pylint: disable=redefined-outer-name
         allow_nonstandard_methods=False,
+        circuit_breakers=None,
+        cache=None,
+        coalesce=False,
+        bulkheads=None,
+        transport=None,
+        compression=None,
+        decompress_response=True,
+        codec=None,
+        trace=None,
+        metrics=None,  # pylint: disable=redefined-outer-name
+        tracer=None,
+        hedging=None,
     ):
-        self._client = client or httpclient.AsyncHTTPClient()
-        self._private_kwargs = ["auth_password"]
+        self.transport = transport
+        # Only a client built for us (not a supplied or shared one) is ours
+        # to close.
+        self._owns_client = False
+        if client is None:
+            if transport is not None:
+                client = transport.create()
+                self._owns_client = transport.isolated
+            else:
+                client = httpclient.AsyncHTTPClient()
+        self._client = client
+        self._private_kwargs = ["auth_password", "Authorization"]
         self.headers = headers
         self.timeout = timeout
         self.allow_nonstandard_methods = allow_nonstandard_methods
         self.json = json
-
-        if (
-            (self.json is True or self.JSON_BODY) and self.json is not False
-        ) and not self.headers:
+        self.circuit_breakers = circuit_breakers
+        self.cache = cache
+        self.coalesce = coalesce
+        self.bulkheads = bulkheads
+        self.compression = compression
+        self.decompress_response = decompress_response
+        self.transfer_stats = compress.TransferStats()
+        self.codec = codec_module.get(codec)
+        self.trace = trace
+        self.metrics = metrics
+        self.tracer = tracer
+        self.hedging = hedging
+        self._in_flight = {}
+        # A bucket per rate limit, that callers with other clients (ie, other
+        # credentials) do not take tokens from.
+        self._rate_limiters = weakref.WeakKeyDictionary()
+        self._templates = {}
+
+        if ((self.json is True or self.JSON_BODY) and self.json is not False) and not self.headers:
             self.headers = {"Content-Type": "application/json"}
 
+    def close(self):
+        """Closes the HTTP client this RestClient built from its `transport`.
+
+        Releases its connections (and, for `curl`, its multi handle). Clients
+        that were supplied, or that are shared (the process-wide one, or a
+        non-isolated transport's), are left open for their other users.
+        """
+        if self._owns_client:
+            self._owns_client = False
+            self._client.close()
+
     def _generate_escaped_url(self, url, args):
         """Generates a fully escaped URL string.
 
         Sorts the arguments so that the returned string is predictable and in
-        alphabetical order. Effectively wraps the
-        :func:`tornado.httputil.url_concat` method and properly strips out
-        `None` values, as well as lowercases `Bool` values.
+        alphabetical order. Strips out `None` values, lowercases `Bool`
+        values and repeats the key of list values (see
+        :func:`~tornado_rest_client.utils.url_with_query`).
 
         :param str url: The URL to append the arguments to
-        :param dict args: Key/Value arguments. Values should be primitives.
+        :param dict args: Key/Value arguments. Values should be primitives,
+            or lists of primitives.
 
         :return: URL encoded string like this: `<url>?foo=bar&abc=xyz`
         """
+        return utils.url_with_query(url, args)
 
-        # Remove keys from the arguments where the value is None
-        args = dict((k, v) for k, v in list(args.items()) if v)
+    def _prepare(self, url, method, params):
+        """Returns the full URL and body of a request with `params`.
 
-        # Convert all Bool values to lowercase strings
-        for key, value in list(args.items()):
-            if isinstance(value, bool):
-                args[key] = str(value).lower()
+        :param str url: The full url path of the API call
+        :param str method: GET/PUT/POST/DELETE
+        :param dict params: Arguments (k/v pairs) to submit either as POST data
+            or URL argument options.
+        :return: A `(url, body)` tuple
+        """
+        if isinstance(params, uploads.Upload):
+            if method not in uploads.METHODS:
+                raise exceptions.InvalidOptions(f"Cannot upload a body with {method}")
+            return url, params
 
-        # Now generate the URL
-        full_url = httputil.url_concat(url, sorted(args.items()))
-        log.debug("Generated URL: %s", full_url)
+        if params is None:
+            params = {}
+        # Start with empty post data. If we're doing a PUT/POST, then just pass
+        # args directly into the ch() method and let it take care of
+        # things. If we're doing a GET/DELETE though, convert kwargs into a
+        # modified URL string and pass that into the fetch() method.
+        body = None
+        if method in ("PUT", "POST"):
+            if not ((self.json is True or self.JSON_BODY) and self.json is not False):
+                body = urlencode(params)
+            else:
+                body = self.codec.dumps(params)
+        elif method in ("GET", "DELETE") and params:
+            url = self._generate_escaped_url(url, params)
 
-        return full_url
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("Making %s request to %s. Data: %s", method, url, body)
+        return url, body
+
+    def _build_request(
+        self,
+        url,
+        method,
+        body,
+        headers,
+        auth_username,
+        auth_password,
+        timeout,
+        **kwargs,
+    ):
+        """Creates the :class:`~tornado.httpclient.HTTPRequest` to send.
+
+        The body is compressed here, if it is worth it. An
+        :class:`~tornado_rest_client.uploads.Upload` body is streamed through
+        a `body_producer` instead, and never compressed.
+
+        Requests are filled in from a template holding every option that is
+        the same from one request to the next (see :func:`_template`).
+        """
+        if timeout is None:
+            timeout = self.timeout
+
+        if isinstance(body, uploads.Upload):
+            kwargs["body_producer"] = body.producer(self.codec)
+            headers = {**(headers or {}), **body.headers()}
+            body = None
+
+        uncompressed_body = None
+        if self.compression is not None and body:
+            raw = body.encode("utf-8") if isinstance(body, str) else body
+            compressed = self.compression.compress(raw, urlsplit(url).netloc)
+            if compressed is not None:
+                uncompressed_body, body = raw, compressed
+                headers = {
+                    **(headers or {}),
+                    "Content-Encoding": self.compression.encoding,
+                }
+
+        if kwargs:
+            # Streaming callbacks are unique to their request
+            http_request = _HTTPRequest(
+                url=url,
+                method=method,
+                body=body,
+                headers=headers,
+                **self._request_options(auth_username, auth_password, timeout),
+                **kwargs,
+            )
+        else:
+            template = self._template(auth_username, auth_password, timeout)
+            http_request = template.fill(url, method, body, headers)
+        http_request.uncompressed_body = uncompressed_body
+        return http_request
+
+    def _request_options(self, auth_username, auth_password, timeout):
+        """Returns the :class:`~tornado.httpclient.HTTPRequest` options of
+        this client's requests."""
+        return {
+            "auth_username": auth_username,
+            "auth_password": auth_password,
+            "follow_redirects": True,
+            "request_timeout": timeout,
+            "connect_timeout": timeout,
+            "allow_nonstandard_methods": self.allow_nonstandard_methods,
+            "max_redirects": 10,
+            "decompress_response": self.decompress_response,
+        }
+
+    def _template(self, auth_username, auth_password, timeout):
+        """Returns the (cached) request template for these options.
+
+        The options of the client are part of the key, so changing them
+        takes effect on the next request.
+        """
+        key = (
+            auth_username,
+            auth_password,
+            timeout,
+            self.allow_nonstandard_methods,
+            self.decompress_response,
+        )
+        template = self._templates.get(key)
+        if template is None:
+            # Callers passing a new auth or timeout on every call would
+            # otherwise grow this forever.
+            if len(self._templates) >= _MAX_TEMPLATES:
+                self._templates.clear()
+            template = self._templates[key] = _HTTPRequest(
+                url="", **self._request_options(auth_username, auth_password, timeout)
+            )
+        return template
 
-    @gen.coroutine
     @retry
-    def fetch(
+    async def fetch(
         self,
         url,
         method,
@@ -492,71 +1461,555 @@ class RestClient:
         auth_username=None,
         auth_password=None,
         timeout=None,
+        response_callback=None,
+        headers=None,
+        response_format=None,
+        rate_limit=None,
     ):
-        """Executes a web request asynchronously and yields the body.
+        """Executes a web request asynchronously and returns the body.
 
         :param str url: The full url path of the API call
         :param dict params: Arguments (k/v pairs) to submit either as POST data
-            or URL argument options.
+            or URL argument options. *POST*/*PUT*/*PATCH* requests may pass an
+            :class:`~tornado_rest_client.uploads.Upload` instead, to stream
+            their body.
         :param str method: GET/PUT/POST/DELETE
         :param str auth_username: HTTP auth username
         :param str auth_password: HTTP auth password
-        :yields: String of the returned text from the web service.
+        :param dict headers: Headers of this request, on top of (and taking
+            precedence over) the :attr:`headers` of the client
+        :param callable response_callback: Called with the
+            :class:`~tornado.httpclient.HTTPResponse` (ie, to look at its
+            headers) before the body is decoded. Such requests are never
+            served from the cache, or shared with other callers.
+        :param str response_format: What to make of the response body, one of
+            :data:`~tornado_rest_client.formats.FORMATS`. By default, it is
+            decoded as JSON if it can be.
+        :param RateLimit rate_limit: Optional
+            :class:`~tornado_rest_client.ratelimit.RateLimit` that every
+            attempt must get a token of (see :func:`rate_limiter`) for.
+        :return: The decoded JSON, or the raw body if it was not JSON.
         """
+        formats.check(response_format)
+
+        url, body = self._prepare(url, method, params)
+        shareable = method == "GET" and response_callback is None
+
+        headers = self._headers(headers)
+        # Requests asking for something else (ie, with another `Accept` or
+        # `Authorization` header) never share a response.
+        header_key = None
+        if shareable and (self.cache is not None or self.coalesce):
+            header_key = _header_key(headers)
+
+        # Serve GET requests from the cache when we can, or turn them into
+        # conditional requests if we have a stale copy of the response.
+        cache_key = entry = None
+        if self.cache is not None and shareable:
+            cache_key = (url, auth_username, header_key)
+            entry, fresh = self.cache.lookup(cache_key)
+            if fresh:
+                log.debug("Serving %s from the cache", url)
+                return self._decode_body(entry.body, response_format, entry.content_type)
+            if entry is not None and entry.revalidatable:
+                headers = {**(headers or {}), **entry.conditional_headers()}
+
+        http_request = self._build_request(
+            url, method, body, headers, auth_username, auth_password, timeout
+        )
+        if rate_limit is not None:
+            http_request.rate_limiter = self.rate_limiter(rate_limit)
 
-        if params is None:
-            params = {}
-        # Start with empty post data. If we're doing a PUT/POST, then just pass
-        # args directly into the ch() method and let it take care of
-        # things. If we're doing a GET/DELETE though, convert kwargs into a
-        # modified URL string and pass that into the fetch() method.
-        if timeout is None:
-            timeout = self.timeout
-        body = None
-        if method in ("PUT", "POST"):
-            if not ((self.json is True or self.JSON_BODY) and self.json is not False):
-                body = urlencode(params)
+        if not (self.coalesce and shareable):
+            return await self._request(
+                http_request, cache_key, entry, response_callback, response_format
+            )
+
+        # Identical GETs that are already in flight share its result. The
+        # shared future is shielded so that a cancelled caller does not
+        # cancel the request under everyone else.
+        key = (method, url, auth_username, header_key, response_format)
+        future = self._in_flight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(
+                self._request(http_request, cache_key, entry, response_format=response_format)
+            )
+            self._in_flight[key] = future
+            future.add_done_callback(functools.partial(self._landed, key))
+        else:
+            log.debug("Joining in-flight request for %s", url)
+        return await asyncio.shield(future)
+
+    def rate_limiter(self, rate_limit):
+        """Returns the bucket of this client for `rate_limit`.
+
+        :param RateLimit rate_limit: A
+            :class:`~tornado_rest_client.ratelimit.RateLimit`
+        :return: A :class:`~tornado_rest_client.ratelimit.TokenBucket`
+        """
+        bucket = self._rate_limiters.get(rate_limit)
+        if bucket is None:
+            bucket = self._rate_limiters[rate_limit] = rate_limit.bucket()
+        return bucket
+
+    def _headers(self, headers):
+        """Returns the client's headers, updated with `headers`."""
+        if not headers:
+            return self.headers
+        return {**(self.headers or {}), **headers}
+
+    def _landed(self, key, future):
+        """Forgets an in-flight request once it is done."""
+        if self._in_flight.get(key) is future:
+            del self._in_flight[key]
+        # Every caller may have given up (been cancelled) by now, so mark the
+        # exception as retrieved rather than have asyncio log it.
+        if not future.cancelled():
+            future.exception()
+
+    async def _request(
+        self,
+        http_request,
+        cache_key=None,
+        entry=None,
+        response_callback=None,
+        response_format=None,
+    ):
+        """Sends `http_request`, going through the cache if `cache_key` is set.
+
+        :param HTTPRequest http_request: The request to send
+        :param tuple cache_key: The cache key for *GET* requests
+        :param CacheEntry entry: The stale cache entry being revalidated
+        :param callable response_callback: Called with the response
+        :param str response_format: What to make of the response body
+        :return: The decoded JSON, or the raw body if it was not JSON.
+        """
+        url = http_request.url
+
+        # Execute the request and raise any exception. Exceptions are not
+        # caught here because they are unique to the API endpoints, and thus
+        # should be handled by the individual callers of this method.
+        try:
+            if self.hedging is not None and http_request.method in self.hedging.methods:
+                http_response = await self._send_hedged(http_request)
             else:
-                body = json.dumps(params)
-        elif method in ("GET", "DELETE") and params:
-            url = self._generate_escaped_url(url, params)
+                http_response = await self._send(http_request)
+        except httpclient.HTTPError as exc:
+            if exc.code == 304 and entry is not None:
+                log.debug("%s was not modified", url)
+                entry = self.cache.revalidated(cache_key, entry, exc.response)
+                return self._decode_body(entry.body, response_format, entry.content_type)
+            log.critical("Request for %s failed: %s", url, exc)
+            raise
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("HTTP Response: %s", http_response.body)
+
+        if cache_key is not None and http_response.code == 200:
+            self.cache.store(cache_key, http_response)
+        if response_callback is not None:
+            response_callback(http_response)
+
+        if response_format is None:
+            return self._decode_body(http_response.body)
+        if response_format == formats.MEMORYVIEW:
+            # Straight from the response buffer, without copying it out
+            return formats.decode(response_format, None, self.codec, buffer=http_response.buffer)
+        return self._decode_body(
+            http_response.body,
+            response_format,
+            http_response.headers.get("Content-Type"),
+        )
+
+    async def stream(
+        self,
+        url,
+        method="GET",
+        params=None,
+        auth_username=None,
+        auth_password=None,
+        timeout=None,
+        fmt=streaming.AUTO,
+        headers=None,
+        rate_limit=None,
+        max_pending=None,
+    ):
+        """Executes a web request, and yields the records of its body.
+
+        The body is decoded incrementally as it arrives (see
+        :mod:`~tornado_rest_client.streaming`), so the first records are
+        available before the response is complete.
+
+        Memory is only bounded while the caller keeps up. Tornado cannot pause
+        a download, so the records the caller has not taken yet are queued,
+        and a slow caller can end up holding the whole response (as decoded
+        records, which take more memory than the raw body). Set `max_pending`
+        to abort the download with
+        :exc:`~tornado_rest_client.exceptions.StreamOverflow` instead, when
+        more than that many records are still waiting as the next chunk of
+        the body comes in (so at most `max_pending`, plus the records of one
+        chunk, are held).
 
-        # Generate the full request URL and log out what we're doing...
-        log.debug("Making %s request to %s. Data: %s", method, url, body)
+        Failures to start the response are handled (and retried) like the
+        ones of :func:`fetch`. Once records have been yielded the request is
+        never retried: a failure midway raises as-is.
 
-        # Create the http_request object
-        http_request = httpclient.HTTPRequest(
+        Breaking out of the loop stops the download.
+
+        >>> async for record in client.stream(url, params={"limit": 1000}):
+        ...     handle(record)
+
+        :param str url: The full url path of the API call
+        :param str method: GET/PUT/POST/DELETE
+        :param dict params: Arguments (k/v pairs) to submit either as POST data
+            or URL argument options.
+        :param str auth_username: HTTP auth username
+        :param str auth_password: HTTP auth password
+        :param str fmt: `auto`, `array` or `ndjson`
+        :param dict headers: Headers of this request, on top of the
+            :attr:`headers` of the client
+        :param RateLimit rate_limit: Optional rate limit that every attempt to
+            start the response must get a token of
+        :param int max_pending: Records that may wait for the caller when
+            the next chunk arrives, or `None` for no limit
+        :raises StreamOverflow: if more than `max_pending` records were waiting
+        :return: An async iterator of decoded records
+        """
+        decoder = streaming.decoder(fmt, loads=self.codec.loads)
+        response = await self._open_stream(
             url=url,
             method=method,
-            body=body,
-            headers=self.headers,
+            params=params,
             auth_username=auth_username,
             auth_password=auth_password,
-            follow_redirects=True,
-            request_timeout=timeout,
-            connect_timeout=timeout,
-            allow_nonstandard_methods=self.allow_nonstandard_methods,
-            max_redirects=10,
+            timeout=timeout,
+            decoder=decoder,
+            headers=headers,
+            rate_limit=rate_limit,
+            max_pending=max_pending,
         )
+        try:
+            while True:
+                if response.error is not None:
+                    raise response.error
+                record = await response.records.get()
+                if record is _STREAM_DONE:
+                    break
+                yield record
+            response.task.result()
+            for record in decoder.close():
+                yield record
+        finally:
+            response.close()
 
-        # Execute the request and raise any exception. Exceptions are not
-        # caught here because they are unique to the API endpoints, and thus
-        # should be handled by the individual callers of this method.
-        log.debug("HTTP Request: %s", http_request)
+    @retry
+    async def _open_stream(
+        self,
+        url,
+        method,
+        params=None,
+        auth_username=None,
+        auth_password=None,
+        timeout=None,
+        decoder=None,
+        headers=None,
+        rate_limit=None,
+        max_pending=None,
+    ):
+        """Starts a streaming request, and waits for a successful status.
+
+        :return: A :class:`_StreamingResponse`
+        """
+        url, body = self._prepare(url, method, params)
+        response = _StreamingResponse(decoder, max_pending)
+        http_request = self._build_request(
+            url,
+            method,
+            body,
+            self._headers(headers),
+            auth_username,
+            auth_password,
+            timeout,
+            header_callback=response.on_header,
+            streaming_callback=response.on_chunk,
+        )
+        if rate_limit is not None:
+            http_request.rate_limiter = self.rate_limiter(rate_limit)
+        response.task = asyncio.ensure_future(self._send(http_request))
+        response.task.add_done_callback(response.on_done)
+
+        # Either the status line of a successful response comes in, or the
+        # request fails (and is retried by @retry) before it does.
+        await asyncio.wait((response.started, response.task), return_when=asyncio.FIRST_COMPLETED)
+        if not response.started.done():
+            response.close()
+            response.task.result()
+        return response
+
+    async def _send_hedged(self, http_request):
+        """Sends `http_request`, and a duplicate of it if it is slow.
+
+        The first successful response wins, and the other request is
+        cancelled. If both fail, the first failure is raised.
+
+        :param HTTPRequest http_request: The request to send
+        :return: The :class:`~tornado.httpclient.HTTPResponse`
+        """
+        hedging = self.hedging
+        host = urlsplit(http_request.url).netloc
+        hedging.started()
+        started = time.monotonic()
+
+        primary = asyncio.ensure_future(self._send(http_request))
+        tasks = [primary]
         try:
-            http_response = yield self._client.fetch(http_request)
+            done, _ = await asyncio.wait(tasks, timeout=hedging.delay(host))
+            if not done and hedging.spend():
+                log.debug("Hedging the request for %s", http_request.url)
+                tasks.append(asyncio.ensure_future(self._send(http_request.duplicate())))
+
+            error = None
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        hedging.observe(host, time.monotonic() - started, task is not primary)
+                        return task.result()
+                    if error is None:
+                        error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled():
+                    # The loser's failure (if any) is of no interest anymore
+                    task.exception()
+
+    async def _send(self, http_request):
+        """Sends a single HTTP request, through the bulkheads if any.
+
+        Waits for a token of its rate limiter first, if it has one. Counts its
+        bytes in :attr:`transfer_stats`, and sends it again
+        uncompressed if the server does not accept its compressed body.
+
+        :param HTTPRequest http_request: The request to send
+        :return: The :class:`~tornado.httpclient.HTTPResponse`
+        """
+        uncompressed_body = getattr(http_request, "uncompressed_body", None)
+        uncompressed_size = None
+        if uncompressed_body is not None:
+            uncompressed_size = len(uncompressed_body)
+
+        limiter = getattr(http_request, "rate_limiter", None)
+        if limiter is not None:
+            await self._wait_for_token(limiter, http_request)
+
+        started = None
+        if self.trace is not None and self.trace.sampled():
+            started = time.monotonic()
+
+        # Measured from here, and from the moment a bulkhead slot was taken
+        queued = sent = metrics.clock() if self.metrics is not None else None
+
+        try:
+            if self.bulkheads is None:
+                http_response = await self._attempt(http_request)
+            else:
+                async with self.bulkheads.slot(http_request.url):
+                    if queued is not None:
+                        sent = metrics.clock()
+                    http_response = await self._attempt(http_request)
         except httpclient.HTTPError as exc:
-            log.critical("Request for %s failed: %s", url, exc)
+            transfer = self.transfer_stats.record(http_request, exc.response, uncompressed_size)
+            if started is not None:
+                self._trace_request(http_request, started, exc.code, transfer, exc)
+            if queued is not None:
+                self._measure(http_request, exc.response, exc.code, queued, sent)
+            if limiter is not None:
+                # If the server told us to slow down, stop handing out tokens
+                # for as long as it asked.
+                hint = backoff.retry_after(exc)
+                if hint:
+                    limiter.pause(hint)
+            if exc.code == 415 and uncompressed_body is not None:
+                self.compression.unsupported(urlsplit(http_request.url).netloc)
+                return await self._send(http_request.uncompressed())
             raise
-        log.debug("HTTP Response: %s", http_response.body)
+        except Exception as exc:
+            # The request never got a response (ie, the circuit is open)
+            if started is not None:
+                self._trace_request(http_request, started, None, error=exc)
+            if queued is not None:
+                self._measure(http_request, None, None, queued, sent)
+            raise
+
+        transfer = self.transfer_stats.record(http_request, http_response, uncompressed_size)
+        if started is not None:
+            self._trace_request(http_request, started, http_response.code, transfer)
+        if queued is not None:
+            self._measure(http_request, http_response, http_response.code, queued, sent)
+        return http_response
+
+    async def _wait_for_token(self, limiter, http_request):
+        """Waits for a token of `limiter`, measuring how long that took.
+
+        :param TokenBucket limiter: The rate limiter of the request
+        :param HTTPRequest http_request: The request
+        """
+        if self.metrics is None:
+            await limiter.acquire()
+            return
+        started = metrics.clock()
+        await limiter.acquire()
+        self.metrics.observe(
+            "rate_limit_seconds",
+            metrics.clock() - started,
+            metrics.tags(method=http_request.method),
+        )
+
+    def _measure(self, http_request, http_response, status, queued, sent):
+        """Reports the phases of an HTTP attempt to the metrics sink.
+
+        :param HTTPRequest http_request: The request
+        :param HTTPResponse http_response: Its response, `None` if there was
+            none
+        :param int status: The status code, `None` without a response
+        :param float queued: When the attempt started, on the metrics clock
+        :param float sent: When it got a bulkhead slot (or `queued`)
+        """
+        elapsed = metrics.clock() - queued
+        observe = self.metrics.observe
+        tags = metrics.tags(method=http_request.method)
+
+        # Time spent waiting on the HTTP client's own queue
+        client_queue = 0.0
+        if http_response is not None:
+            if http_response.time_info:
+                client_queue = http_response.time_info.get("queue", 0.0)
+                for name, seconds in metrics.time_info_phases(http_response.time_info):
+                    observe(name, seconds, tags)
+            elif http_response.request_time is not None:
+                # The simple client only starts its clock once the request
+                # leaves its queue.
+                client_queue = max(elapsed - (sent - queued) - http_response.request_time, 0.0)
+
+        observe("queue_seconds", sent - queued + client_queue, tags)
+        observe(
+            "request_seconds",
+            elapsed,
+            {**tags, "status": "error" if status is None else status},
+        )
+
+    def _trace_request(self, http_request, started, status, transfer=None, error=None):
+        """Emits the `request` event of a sampled HTTP attempt.
+
+        :param HTTPRequest http_request: The request
+        :param float started: When it was sent, on the monotonic clock
+        :param int status: The status code, `None` without a response
+        :param Transfer transfer: Its bytes, `None` if it was never sent
+        :param Exception error: What it raised, if anything
+        """
+        self.trace.emit(
+            diagnostics.REQUEST,
+            method=http_request.method,
+            url=http_request.url.split("?", 1)[0],
+            status=status,
+            duration=time.monotonic() - started,
+            request_bytes=0 if transfer is None else transfer.request_wire_bytes,
+            response_bytes=0 if transfer is None else transfer.response_wire_bytes,
+            error=error,
+        )
+
+    async def _attempt(self, http_request):
+        """Makes one HTTP attempt, in a span of its own when tracing.
+
+        The context of the span is sent along in the request headers.
+        """
+        if self.tracer is None:
+            return await self._send_through_breaker(http_request)
+
+        with self.tracer.span(
+            http_request.method,
+            tracing.CLIENT,
+            {
+                "http.request.method": http_request.method,
+                "url.full": http_request.url.split("?", 1)[0],
+                "http.request.body.size": len(http_request.body or b""),
+            },
+        ) as span:
+            # Never add to the headers dict shared by every request
+            http_request.headers = httputil.HTTPHeaders(http_request.headers)
+            self.tracer.inject(http_request.headers)
+            try:
+                http_response = await self._send_through_breaker(http_request)
+            except httpclient.HTTPError as exc:
+                _set_response_attributes(span, exc.response)
+                raise
+            _set_response_attributes(span, http_response)
+            return http_response
+
+    async def _send_through_breaker(self, http_request):
+        """Sends a single HTTP request, through the circuit breaker if any."""
+        breaker = None
+        if self.circuit_breakers is not None:
+            breaker = self.circuit_breakers.get(http_request.url)
+            breaker.before_call()
 
         try:
-            body = json.loads(http_response.body)
-        except ValueError:
-            raise gen.Return(http_response.body)  # pylint: disable=raise-missing-from
+            http_response = await self._client.fetch(http_request)
+        except BaseException as exc:
+            if breaker is not None:
+                self.circuit_breakers.record(breaker, exc)
+            raise
 
-        # Receive a successful return
-        raise gen.Return(body)
+        if breaker is not None:
+            self.circuit_breakers.record(breaker)
+        return http_response
+
+    def _decode_body(self, body, response_format=None, content_type=None):
+        """Returns the decoded JSON `body`, or `body` itself if it is not JSON.
+
+        With a `response_format`, returns `body` in that format instead (see
+        :func:`~tornado_rest_client.formats.decode`).
+        """
+        if self.metrics is not None:
+            started = metrics.clock()
+            try:
+                return self._decode(body, response_format, content_type)
+            finally:
+                self.metrics.observe("decode_seconds", metrics.clock() - started, metrics.tags())
+        return self._decode(body, response_format, content_type)
+
+    def _decode(self, body, response_format, content_type):
+        if response_format is not None:
+            return formats.decode(response_format, body, self.codec, content_type)
+        try:
+            return self.codec.loads(body)
+        except self.codec.decode_errors:
+            return body
+
+
+def _header_key(headers):
+    """Returns the hashable form of the headers of a request, so that requests
+    asking for different things (ie, another `Accept` or `Authorization`) do
+    not share a response."""
+    if not headers:
+        return ()
+    return tuple(sorted((str(k).lower(), v) for k, v in headers.items()))
+
+
+def _set_response_attributes(span, http_response):
+    """Sets the status and size of `http_response` on an attempt's span."""
+    if http_response is None:
+        return
+    span.set_attribute("http.response.status_code", http_response.code)
+    if http_response.buffer is not None:
+        size = http_response.headers.get("Content-Length")
+        span.set_attribute(
+            "http.response.body.size",
+            int(size) if size else len(http_response.body),
+        )
 
 
 class SimpleTokenRestClient(RestClient):
@@ -574,11 +2027,20 @@ class SimpleTokenRestClient(RestClient):
         for key in list(tokens.keys()):
             self._private_kwargs.append(key)
 
-    @gen.coroutine
-    def fetch(self, *args, **kwargs):
+    async def fetch(self, *args, **kwargs):
         if "params" not in kwargs:
             kwargs["params"] = {}
 
-        kwargs["params"].update(self._tokens)
-        ret = yield super().fetch(*args, **kwargs)
-        raise gen.Return(ret)
+        if isinstance(kwargs["params"], uploads.Upload):
+            # The body is taken, the tokens go in the query string
+            if args:
+                args = (utils.url_with_query(args[0], self._tokens), *args[1:])
+            else:
+                kwargs["url"] = utils.url_with_query(kwargs["url"], self._tokens)
+        else:
+            kwargs["params"].update(self._tokens)
+        return await super().fetch(*args, **kwargs)
+
+    def stream(self, *args, **kwargs):
+        kwargs["params"] = {**(kwargs.get("params") or {}), **self._tokens}
+        return super().stream(*args, **kwargs)
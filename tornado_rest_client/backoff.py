@@ -0,0 +1,226 @@
+"""
+:mod:`tornado_rest_client.backoff`
+^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^
+
+Backoff policies used by the :func:`~tornado_rest_client.api.retry` decorator
+to decide how long to wait between attempts.
+
+A policy is configured per :class:`~tornado_rest_client.api.RestClient`
+subclass through the :attr:`~tornado_rest_client.api.RestClient.BACKOFF`
+attribute:
+
+    >>> class MyRestClient(api.RestClient):
+    ...     BACKOFF = backoff.DecorrelatedJitterBackoff(base=0.25, cap=30)
+
+All policies honor the `Retry-After` header (and the common
+`RateLimit-Reset`/`X-RateLimit-Reset` headers) found on the
+:attr:`~tornado.httpclient.HTTPError.response` of the failure being retried,
+never waiting less than the server asked for -- up to the `cap`.
+"""
+
+import logging
+
+log = logging.getLogger(__name__)
+
+import email.utils
+import random
+import time
+
+#: Rate-limit reset headers, and the "remaining" header that goes with them.
+RATE_LIMIT_HEADERS = (
+    ("RateLimit-Reset", "RateLimit-Remaining"),
+    ("X-RateLimit-Reset", "X-RateLimit-Remaining"),
+)
+
+# Reset values larger than this are epoch timestamps rather than a number of
+# seconds (a delta this large would be ~30 years).
+_EPOCH_THRESHOLD = 10**9
+
+
+def _find_response(exc):
+    """Returns the first HTTP response attached to `exc` or its causes."""
+    seen = set()
+    while exc is not None and id(exc) not in seen:
+        seen.add(id(exc))
+        response = getattr(exc, "response", None)
+        if response is not None and getattr(response, "headers", None) is not None:
+            return response
+        exc = exc.__cause__ or exc.__context__
+    return None
+
+
+def _parse_seconds(value, now):
+    """Parses a delta-seconds, epoch or HTTP-date header value."""
+    value = value.strip()
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            date = email.utils.parsedate_to_datetime(value)
+        except (TypeError, ValueError, IndexError):
+            return None
+        if date is None:
+            return None
+        return max(date.timestamp() - now, 0.0)
+
+    if seconds > _EPOCH_THRESHOLD:
+        seconds = seconds - now
+    return max(seconds, 0.0)
+
+
+def retry_after(exc, now=None):
+    """Returns the number of seconds the server asked us to wait, if any.
+
+    Looks at the `Retry-After` header first, then at the `RateLimit-Reset`
+    and `X-RateLimit-Reset` headers (only when the matching "remaining"
+    header is missing or zero).
+
+    :param Exception exc: The failure, usually an
+        :exc:`~tornado.httpclient.HTTPError`. Chained causes are searched too.
+    :param float now: The current epoch time (default: :func:`time.time`)
+
+    :return: Seconds to wait, or `None` if there was no usable hint.
+    """
+    response = _find_response(exc)
+    if response is None:
+        return None
+
+    now = time.time() if now is None else now
+    headers = response.headers
+
+    value = headers.get("Retry-After")
+    if value:
+        return _parse_seconds(value, now)
+
+    for reset_header, remaining_header in RATE_LIMIT_HEADERS:
+        value = headers.get(reset_header)
+        if not value:
+            continue
+        remaining = headers.get(remaining_header)
+        if remaining is not None and remaining.strip() not in ("0", ""):
+            continue
+        return _parse_seconds(value, now)
+
+    return None
+
+
+class Backoff:
+    """Base backoff policy.
+
+    Subclasses implement :func:`compute`, this class takes care of applying
+    server supplied hints and the `cap`.
+
+    :param float cap: Maximum number of seconds to wait between attempts
+    :param bool honor_retry_after: Whether to honor `Retry-After` and
+        rate-limit headers on the failed response.
+    :param random.Random rng: Source of randomness used for jitter.
+    :param callable clock: Returns the current epoch time, used to resolve
+        HTTP-date and epoch header values.
+    """
+
+    def __init__(self, cap=None, honor_retry_after=True, rng=None, clock=time.time):
+        self.cap = cap
+        self.honor_retry_after = honor_retry_after
+        self.rng = rng or random.Random()
+        self.clock = clock
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(cap={self.cap})"
+
+    def compute(self, attempt, previous):
+        """Returns the policy's own delay before `attempt`.
+
+        :param int attempt: The attempt that just failed (starting at 1)
+        :param float previous: The previous delay, or `None` on the first retry
+        """
+        raise NotImplementedError()
+
+    def delay(self, attempt, previous=None, exc=None):
+        """Returns the number of seconds to wait before the next attempt.
+
+        :param int attempt: The attempt that just failed (starting at 1)
+        :param float previous: The previous delay, or `None` on the first retry
+        :param Exception exc: The exception that caused the retry
+
+        :return: Seconds to sleep
+        """
+        wait = self.compute(attempt, previous)
+
+        if self.honor_retry_after and exc is not None:
+            hint = retry_after(exc, now=self.clock())
+            if hint is not None and hint > wait:
+                log.debug("Server asked us to wait %s seconds", hint)
+                wait = hint
+
+        if self.cap is not None and wait > self.cap:
+            wait = self.cap
+
+        return max(wait, 0.0)
+
+
+class ConstantBackoff(Backoff):
+    """Waits the same amount of time between every attempt.
+
+    :param float delay: Seconds to wait between attempts
+    """
+
+    def __init__(self, delay=0.25, **kwargs):
+        super().__init__(**kwargs)
+        self.base = delay
+
+    def compute(self, attempt, previous):
+        return self.base
+
+
+class ExponentialBackoff(Backoff):
+    """Exponentially growing delay, with optional jitter.
+
+    The un-jittered delay before retry `n` is `base * factor ** (n - 1)`.
+
+    :param float base: Delay before the first retry
+    :param float factor: Multiplier applied on every attempt
+    :param str jitter: `full` picks a random delay between 0 and the computed
+        delay, `equal` picks one between half of it and all of it. `None`
+        disables jitter.
+    """
+
+    def __init__(self, base=0.25, factor=2.0, jitter="full", **kwargs):
+        super().__init__(**kwargs)
+        if jitter not in (None, "full", "equal"):
+            raise ValueError(f"Unknown jitter type: {jitter}")
+        self.base = base
+        self.factor = factor
+        self.jitter = jitter
+
+    def compute(self, attempt, previous):
+        wait = self.base * self.factor ** (attempt - 1)
+        if self.cap is not None and wait > self.cap:
+            wait = self.cap
+
+        if self.jitter == "full":
+            return self.rng.uniform(0, wait)
+        if self.jitter == "equal":
+            return wait / 2 + self.rng.uniform(0, wait / 2)
+        return wait
+
+
+class DecorrelatedJitterBackoff(Backoff):
+    """Decorrelated jitter backoff.
+
+    Every delay is picked at random between `base` and three times the
+    previous delay, so clients that failed together drift apart quickly.
+    Should be used with a `cap`.
+
+    :param float base: Minimum delay, and the seed for the first retry
+    """
+
+    def __init__(self, base=0.25, **kwargs):
+        super().__init__(**kwargs)
+        self.base = base
+
+    def compute(self, attempt, previous):
+        previous = self.base if previous is None else max(previous, self.base)
+        wait = self.rng.uniform(self.base, previous * 3)
+        if self.cap is not None and wait > self.cap:
+            wait = self.cap
+        return wait
@@ -0,0 +1,127 @@
+"""
+:mod:`tornado_rest_client.batch`
+^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^
+
+Bounded fan-out of many calls to an API, used by
+:func:`~tornado_rest_client.api.RestConsumer.batch`.
+
+Firing thousands of calls at once with :func:`~tornado.gen.multi` floods the
+API (and our own IOLoop). :func:`run` instead keeps at most `concurrency`
+calls in flight, and only pulls the arguments of the next call from its input
+when there is room for it, so the input may be a (sync or async) generator
+of any length:
+
+    >>> ids = (line.strip() for line in open('ids.txt'))
+    >>> async for result in slack.batch(
+    ...     lambda **kwargs: slack.users_info().http_get(**kwargs),
+    ...     ({'user': user_id} for user_id in ids),
+    ...     concurrency=20,
+    ... ):
+    ...     if result.exception is not None:
+    ...         log.error('%s failed: %s', result.kwargs, result.exception)
+
+Failures of single calls do not stop the batch; each
+:class:`BatchResult` carries either the `result` or the `exception` of its
+call.
+"""
+
+import logging
+
+log = logging.getLogger(__name__)
+
+import asyncio
+import collections
+
+from tornado_rest_client import exceptions
+
+#: The outcome of one call of a batch.
+#:
+#: * *index*: Position of the call's arguments in the input
+#: * *kwargs*: The arguments the call was made with
+#: * *result*: What the call returned, `None` if it failed
+#: * *exception*: What the call raised, `None` if it succeeded
+BatchResult = collections.namedtuple("BatchResult", ("index", "kwargs", "result", "exception"))
+
+
+async def _iterate(iterable):
+    """Iterates over a sync or async iterable, asynchronously."""
+    if hasattr(iterable, "__aiter__"):
+        async for item in iterable:
+            yield item
+    else:
+        for item in iterable:
+            yield item
+
+
+async def _call(func, index, kwargs):
+    try:
+        return BatchResult(index, kwargs, await func(**kwargs), None)
+    except Exception as exc:  # pylint: disable=broad-except
+        log.debug("Call %s of batch failed: %s", index, exc)
+        return BatchResult(index, kwargs, None, exc)
+
+
+async def run(func, kwargs_iter, concurrency=10, ordered=True, window=None):
+    """Calls `func(**kwargs)` for every `kwargs` of `kwargs_iter`.
+
+    :param callable func: Returns an awaitable for one call
+    :param kwargs_iter: Sync or async iterable of the `kwargs` dicts to call
+        `func` with. It is consumed lazily.
+    :param int concurrency: Calls allowed in flight at once
+    :param bool ordered: Yield results in the order of the input, rather
+        than as they complete
+    :param int window: With `ordered`, the number of calls that may be in
+        flight or done but waiting on an earlier one (default: twice the
+        `concurrency`). A slow call holds back at most this many others.
+
+    :return: An async iterator of :class:`BatchResult`
+    """
+    if concurrency < 1:
+        raise exceptions.InvalidOptions(f"Invalid batch concurrency: {concurrency}")
+    if window is None:
+        window = concurrency * 2 if ordered else concurrency
+    window = max(window, concurrency)
+
+    inputs = _iterate(kwargs_iter)
+    exhausted = False
+    in_flight = set()
+    done = {}
+    issued = 0
+    next_index = 0
+
+    try:
+        while True:
+            while (
+                not exhausted
+                and len(in_flight) < concurrency
+                and len(in_flight) + len(done) < window
+            ):
+                try:
+                    kwargs = await inputs.__anext__()
+                except StopAsyncIteration:
+                    exhausted = True
+                    break
+                in_flight.add(asyncio.ensure_future(_call(func, issued, kwargs)))
+                issued += 1
+
+            if ordered:
+                while next_index in done:
+                    yield done.pop(next_index)
+                    next_index += 1
+
+            if not in_flight:
+                if exhausted:
+                    break
+                continue
+
+            finished, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            for task in finished:
+                result = task.result()
+                if ordered:
+                    done[result.index] = result
+                else:
+                    yield result
+    finally:
+        for task in in_flight:
+            task.cancel()
+        await inputs.aclose()
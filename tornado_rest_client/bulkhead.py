@@ -0,0 +1,218 @@
+"""
+:mod:`tornado_rest_client.bulkhead`
+^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^
+
+Bulkheads that cap the number of requests a
+:class:`~tornado_rest_client.api.RestClient` has in flight, so that one slow
+API cannot take every connection slot of the shared
+:class:`~tornado.httpclient.AsyncHTTPClient` and starve the other clients in
+the process.
+
+A :class:`Bulkheads` registry holds an optional client-wide limit, and one
+:class:`Bulkhead` per endpoint (host, or host and path). Every HTTP attempt
+made by :func:`~tornado_rest_client.api.RestClient.fetch` takes a slot of its
+endpoint, then a client-wide one, before it is sent: attempts queued behind a
+slow endpoint do not hold client-wide slots that other endpoints need.
+Attempts over the limit queue up (in order) without
+blocking the IOLoop, and give up with
+:exc:`~tornado_rest_client.exceptions.BulkheadFull` after `queue_timeout`
+seconds, or right away when `max_queue` attempts are already waiting.
+
+Usage:
+
+    >>> bulkheads = bulkhead.Bulkheads(
+    ...     max_concurrent=20, per_endpoint=5, queue_timeout=2)
+    >>> client = api.RestClient(bulkheads=bulkheads)
+    >>> bulkheads.stats()
+    {'*': {'active': 3, 'waiting': 0, ...}, 'api.slack.com': {...}}
+"""
+
+import logging
+
+log = logging.getLogger(__name__)
+
+import contextlib
+import datetime
+import time
+
+from tornado import locks, util
+
+from tornado_rest_client import exceptions, utils
+
+#: Key of the client-wide bulkhead in :func:`Bulkheads.stats`
+ALL = "*"
+
+
+class Bulkhead:
+    """Limits the number of concurrent attempts to a single endpoint.
+
+    :param str key: The endpoint this bulkhead is for
+    :param int max_concurrent: Attempts allowed in flight at once
+    :param float queue_timeout: Seconds an attempt may wait for a slot, or
+        `None` to wait as long as it takes
+    :param int max_queue: Attempts allowed to wait for a slot, or `None` for
+        no limit
+    :param callable clock: Returns the current (monotonic) time in seconds
+    """
+
+    def __init__(
+        self,
+        key,
+        max_concurrent,
+        queue_timeout=None,
+        max_queue=None,
+        clock=time.monotonic,
+    ):
+        if max_concurrent < 1:
+            raise exceptions.InvalidOptions(f"Bulkheads need a positive limit: {max_concurrent}")
+
+        self.key = key
+        self.max_concurrent = max_concurrent
+        self.queue_timeout = queue_timeout
+        self.max_queue = max_queue
+        self.clock = clock
+
+        self.active = 0
+        self.waiting = 0
+        self.max_waiting = 0
+        self.acquired = 0
+        self.rejected = 0
+        self.wait_time = 0.0
+
+        self._semaphore = locks.Semaphore(max_concurrent)
+
+    def __repr__(self):
+        return (
+            f"{self.__class__.__name__}({self.key}, "
+            f"{self.active}/{self.max_concurrent}, waiting={self.waiting})"
+        )
+
+    def _reject(self, reason):
+        self.rejected += 1
+        log.warning("Bulkhead for %s is full: %s", self.key, reason)
+        raise exceptions.BulkheadFull(f"Bulkhead for {self.key} is full: {reason}")
+
+    async def acquire(self):
+        """Waits for a slot.
+
+        :raises BulkheadFull: if the queue is full, or no slot was freed
+            within `queue_timeout` seconds
+        """
+        if self.active < self.max_concurrent and not self.waiting:
+            # Fast path, the slot is free and nobody is ahead of us
+            await self._semaphore.acquire()
+        else:
+            if self.max_queue is not None and self.waiting >= self.max_queue:
+                self._reject(f"{self.waiting} attempts already queued")
+
+            timeout = None
+            if self.queue_timeout is not None:
+                timeout = datetime.timedelta(seconds=self.queue_timeout)
+
+            started = self.clock()
+            self.waiting += 1
+            self.max_waiting = max(self.max_waiting, self.waiting)
+            try:
+                await self._semaphore.acquire(timeout)
+            except util.TimeoutError:
+                # asyncio's TimeoutError, which only became the builtin one
+                # in Python 3.11
+                self._reject(f"no slot within {self.queue_timeout}s")
+            finally:
+                self.waiting -= 1
+                self.wait_time += self.clock() - started
+
+        self.active += 1
+        self.acquired += 1
+
+    def release(self):
+        """Frees the slot taken by :func:`acquire`."""
+        self.active -= 1
+        self._semaphore.release()
+
+    def stats(self):
+        """Returns a snapshot of the bulkhead's counters."""
+        return {
+            "active": self.active,
+            "waiting": self.waiting,
+            "max_waiting": self.max_waiting,
+            "acquired": self.acquired,
+            "rejected": self.rejected,
+            "wait_time": self.wait_time,
+        }
+
+
+class Bulkheads:
+    """A client-wide :class:`Bulkhead`, and a registry of per-endpoint ones.
+
+    :param int max_concurrent: Attempts the client may have in flight in
+        total, or `None` for no client-wide limit
+    :param int per_endpoint: Attempts allowed in flight to each endpoint, or
+        `None` for no per-endpoint limit
+    :param str key: `host` to share a bulkhead across a host, or `path` to
+        have one per host and path. May also be a callable that takes the
+        request URL and returns the key.
+    :param dict kwargs: Passed on to every :class:`Bulkhead` (ie,
+        `queue_timeout` and `max_queue`)
+    """
+
+    def __init__(self, max_concurrent=None, per_endpoint=None, key="host", **kwargs):
+        self._key_for = utils.endpoint_key(key, "bulkhead")
+        self.per_endpoint = per_endpoint
+        self._kwargs = kwargs
+        self._bulkheads = {}
+
+        self.client = None
+        if max_concurrent is not None:
+            self.client = Bulkhead(ALL, max_concurrent, **kwargs)
+
+    def get(self, url):
+        """Returns the bulkhead for the endpoint of `url`, creating it if needed.
+
+        :return: A :class:`Bulkhead`, or `None` without a per-endpoint limit
+        """
+        if self.per_endpoint is None:
+            return None
+
+        key = self._key_for(url)
+        try:
+            return self._bulkheads[key]
+        except KeyError:
+            bulkhead = Bulkhead(key, self.per_endpoint, **self._kwargs)
+            self._bulkheads[key] = bulkhead
+            return bulkhead
+
+    @contextlib.asynccontextmanager
+    async def slot(self, url):
+        """Holds an endpoint and a client-wide slot for `url` while in use.
+
+        The endpoint slot is taken first, so that waiting on a saturated
+        endpoint never ties up a client-wide slot.
+
+        :raises BulkheadFull: if either slot could not be taken
+        """
+        taken = []
+        try:
+            for bulkhead in (self.get(url), self.client):
+                if bulkhead is not None:
+                    await bulkhead.acquire()
+                    taken.append(bulkhead)
+            yield
+        finally:
+            for bulkhead in reversed(taken):
+                bulkhead.release()
+
+    def stats(self):
+        """Returns a `{key: stats}` snapshot of every known bulkhead."""
+        stats = {}
+        if self.client is not None:
+            stats[ALL] = self.client.stats()
+        for key, bulkhead in self._bulkheads.items():
+            stats[key] = bulkhead.stats()
+        return stats
+
+    def __iter__(self):
+        bulkheads = list(self._bulkheads.values())
+        if self.client is not None:
+            bulkheads.insert(0, self.client)
+        return iter(bulkheads)
@@ -0,0 +1,277 @@
+"""
+:mod:`tornado_rest_client.cache`
+^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^
+
+An opt-in HTTP response cache for the *GET* requests made by
+:func:`~tornado_rest_client.api.RestClient.fetch`.
+
+Entries are keyed by the (sorted, escaped) request URL, the auth user and the
+request headers (so that an `Accept` or `Authorization` header never gets the
+response of another), and follow the `Cache-Control` (`no-store`, `no-cache`, `max-age`), `Age` and
+`Expires` headers of the response. Stale entries that carry an `ETag` or
+`Last-Modified` header are revalidated with a conditional request
+(`If-None-Match`/`If-Modified-Since`), and a `304 Not Modified` answer
+refreshes them without transferring the body again.
+
+:class:`ResponseCache` implements that policy on top of a small storage
+interface, and :class:`LRUCache` is an in-memory implementation bounded by
+the number of bytes it holds:
+
+    >>> client = api.RestClient(cache=cache.LRUCache(max_bytes=16 * 1024**2))
+    >>> client.cache.stats
+    CacheStats(hits=0, misses=0, revalidations=0, stores=0, evictions=0)
+"""
+
+import logging
+
+log = logging.getLogger(__name__)
+
+import collections
+import email.utils
+import re
+import time
+
+_MAX_AGE_RE = re.compile(r"(?:^|,)\s*max-age\s*=\s*\"?(\d+)", re.IGNORECASE)
+_DIRECTIVE_RE = re.compile(r"(?:^|,)\s*(no-store|no-cache)\s*(?:,|=|$)", re.IGNORECASE)
+
+
+class CacheStats:
+    """Counters describing how well a :class:`ResponseCache` is doing."""
+
+    __slots__ = ("hits", "misses", "revalidations", "stores", "evictions")
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.stores = 0
+        self.evictions = 0
+
+    def __repr__(self):
+        counters = ", ".join(f"{name}={getattr(self, name)}" for name in self.__slots__)
+        return f"{self.__class__.__name__}({counters})"
+
+    @property
+    def hit_ratio(self):
+        """Share of lookups answered without a full response from the server."""
+        lookups = self.hits + self.misses
+        if not lookups:
+            return 0.0
+        return (self.hits + self.revalidations) / lookups
+
+
+class CacheEntry:
+    """A cached response body, along with what is needed to revalidate it.
+
+    :param bytes body: The response body
+    :param str etag: The `ETag` header of the response, if any
+    :param str last_modified: The `Last-Modified` header, if any
+    :param float expires: Time (on the cache's clock) the entry goes stale
+    :param str content_type: The `Content-Type` header, if any
+    """
+
+    __slots__ = ("body", "etag", "last_modified", "expires", "content_type", "size")
+
+    def __init__(self, body, etag=None, last_modified=None, expires=0.0, content_type=None):
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.expires = expires
+        self.content_type = content_type
+        self.size = len(body) + len(etag or "") + len(last_modified or "")
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(size={self.size}, etag={self.etag})"
+
+    @property
+    def revalidatable(self):
+        """Whether the entry can be revalidated with a conditional request."""
+        return bool(self.etag or self.last_modified)
+
+    def conditional_headers(self):
+        """Returns the headers for a conditional request for this entry."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+def freshness_lifetime(headers, default_ttl=0.0):
+    """Returns how many seconds a response may be served from the cache.
+
+    :param HTTPHeaders headers: The response headers
+    :param float default_ttl: Used when the headers say nothing
+    :return: Seconds, or `None` if the response must not be stored
+    """
+    cache_control = headers.get("Cache-Control", "")
+    directives = {d.lower() for d in _DIRECTIVE_RE.findall(cache_control)}
+    if "no-store" in directives:
+        return None
+    if "no-cache" in directives:
+        return 0.0
+
+    age = 0.0
+    try:
+        age = float(headers.get("Age", 0))
+    except ValueError:
+        pass
+
+    max_age = _MAX_AGE_RE.search(cache_control)
+    if max_age:
+        return max(float(max_age.group(1)) - age, 0.0)
+
+    expires = headers.get("Expires")
+    if expires:
+        try:
+            expires = email.utils.parsedate_to_datetime(expires).timestamp()
+            date = headers.get("Date")
+            now = email.utils.parsedate_to_datetime(date).timestamp() if date else time.time()
+        except (TypeError, ValueError, IndexError):
+            # Invalid Expires values mean "already expired"
+            return 0.0
+        return max(expires - now - age, 0.0)
+
+    return default_ttl
+
+
+class ResponseCache:
+    """Base response cache, implementing the HTTP caching policy.
+
+    Subclasses provide the storage by implementing :func:`_load`,
+    :func:`_save` and :func:`_delete`.
+
+    :param float default_ttl: Seconds to keep responses that carry no
+        caching headers at all. With the default of `0`, such responses are
+        only kept if they can be revalidated.
+    :param callable clock: Returns the current (monotonic) time in seconds
+    """
+
+    def __init__(self, default_ttl=0.0, clock=time.monotonic):
+        self.default_ttl = default_ttl
+        self.clock = clock
+        self.stats = CacheStats()
+
+    def _load(self, key):
+        raise NotImplementedError()
+
+    def _save(self, key, entry):
+        raise NotImplementedError()
+
+    def _delete(self, key):
+        raise NotImplementedError()
+
+    def lookup(self, key):
+        """Looks up the entry for `key`, counting a hit or a miss.
+
+        :return: A tuple of the :class:`CacheEntry` (or `None`) and whether it
+            is fresh enough to be used without asking the server.
+        """
+        entry = self._load(key)
+        if entry is not None and entry.expires > self.clock():
+            self.stats.hits += 1
+            return entry, True
+
+        self.stats.misses += 1
+        return entry, False
+
+    def store(self, key, response):
+        """Stores a successful response, if its headers allow it.
+
+        :param tuple key: The cache key
+        :param HTTPResponse response: The response to store
+        :return: The new :class:`CacheEntry`, or `None` if it was not stored
+        """
+        ttl = freshness_lifetime(response.headers, self.default_ttl)
+        entry = None
+        if ttl is not None:
+            entry = CacheEntry(
+                response.body,
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified"),
+                expires=self.clock() + ttl,
+                content_type=response.headers.get("Content-Type"),
+            )
+
+        if entry is None or not (ttl or entry.revalidatable):
+            self._delete(key)
+            return None
+
+        self._save(key, entry)
+        self.stats.stores += 1
+        return entry
+
+    def revalidated(self, key, entry, response):
+        """Refreshes `entry` after the server answered `304 Not Modified`.
+
+        :param tuple key: The cache key
+        :param CacheEntry entry: The entry that was revalidated
+        :param HTTPResponse response: The `304` response
+        :return: The refreshed entry
+        """
+        self.stats.revalidations += 1
+
+        ttl = None
+        if response is not None:
+            ttl = freshness_lifetime(response.headers, self.default_ttl)
+            entry.etag = response.headers.get("ETag", entry.etag)
+        if ttl is None:
+            ttl = self.default_ttl
+
+        entry.expires = self.clock() + ttl
+        self._save(key, entry)
+        return entry
+
+    def clear(self):
+        """Drops every entry."""
+        raise NotImplementedError()
+
+
+class LRUCache(ResponseCache):
+    """In-memory :class:`ResponseCache` bounded by the bytes it holds.
+
+    When a new entry would take the cache over `max_bytes`, the least
+    recently used entries are evicted. Entries larger than `max_bytes` are
+    never stored.
+
+    :param int max_bytes: Maximum total size of the cached bodies
+    """
+
+    def __init__(self, max_bytes=16 * 1024 * 1024, **kwargs):
+        super().__init__(**kwargs)
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = collections.OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _load(self, key):
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def _save(self, key, entry):
+        self._delete(key)
+        if entry.size > self.max_bytes:
+            log.debug("Not caching %s, %s bytes is too large", key, entry.size)
+            return
+
+        while self._entries and self.size + entry.size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.size -= evicted.size
+            self.stats.evictions += 1
+
+        self._entries[key] = entry
+        self.size += entry.size
+
+    def _delete(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry.size
+
+    def clear(self):
+        self._entries.clear()
+        self.size = 0
@@ -0,0 +1,227 @@
+"""
+:mod:`tornado_rest_client.circuit`
+^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^
+
+Circuit breakers that let a :class:`~tornado_rest_client.api.RestClient` fail
+fast when an API is degraded, instead of spending `retries x timeout` on
+every call.
+
+A :class:`CircuitBreakers` registry keeps one :class:`CircuitBreaker` per
+endpoint (host, or host and path). Every HTTP attempt made by
+:func:`~tornado_rest_client.api.RestClient.fetch` asks the breaker for its
+endpoint first:
+
+* *closed*: requests flow normally, failures are counted over a sliding
+  `window`. Once `failure_threshold` failures are seen the breaker opens.
+* *open*: requests immediately raise
+  :exc:`~tornado_rest_client.exceptions.CircuitOpen` -- including any
+  remaining retries of a call in progress. After `recovery_timeout` seconds
+  the breaker goes half-open.
+* *half_open*: up to `half_open_max_calls` probe requests are let through.
+  A successful probe closes the breaker, a failed one opens it again.
+
+Usage:
+
+    >>> breakers = circuit.CircuitBreakers(failure_threshold=5, window=30)
+    >>> client = api.RestClient(circuit_breakers=breakers)
+    >>> breakers.states()
+    {'api.slack.com': 'closed'}
+"""
+
+import logging
+
+log = logging.getLogger(__name__)
+
+import collections
+import time
+
+from tornado import httpclient, util
+
+from tornado_rest_client import exceptions, utils
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+def is_failure(exc):
+    """Default classification of an exception raised by an HTTP attempt.
+
+    :param BaseException exc: The exception raised by the attempt
+    :return: `True` if the endpoint looks unhealthy (5xx responses, timeouts,
+        connection errors), `False` if it answered (ie, a 4xx), or `None` if
+        the exception says nothing about the endpoint (ie, a cancellation).
+    """
+    if isinstance(exc, httpclient.HTTPError):
+        return exc.code >= 500
+    # Before Python 3.11, asyncio's (and tornado's) TimeoutError is not the
+    # builtin one.
+    if isinstance(exc, (OSError, TimeoutError, util.TimeoutError)):
+        return True
+    return None
+
+
+class CircuitBreaker:
+    """A circuit breaker for a single endpoint.
+
+    :param str key: The endpoint this breaker is for
+    :param int failure_threshold: Failures within `window` that open it
+    :param float window: Seconds over which failures are counted
+    :param float recovery_timeout: Seconds to stay open before probing
+    :param int half_open_max_calls: Concurrent probes allowed while half-open
+    :param callable clock: Returns the current (monotonic) time in seconds
+    :param list listeners: Callables invoked as
+        `listener(breaker, old_state, new_state)` on every state change
+    """
+
+    def __init__(
+        self,
+        key,
+        failure_threshold=5,
+        window=60.0,
+        recovery_timeout=30.0,
+        half_open_max_calls=1,
+        clock=time.monotonic,
+        listeners=None,
+    ):
+        self.key = key
+        self.failure_threshold = failure_threshold
+        self.window = window
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.clock = clock
+        self.listeners = listeners if listeners is not None else []
+
+        self.opened_at = None
+        self._state = CLOSED
+        self._failures = collections.deque()
+        self._probes = 0
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.key}, {self.state})"
+
+    @property
+    def state(self):
+        """The current state, moving from *open* to *half_open* if due."""
+        if self._state == OPEN and self.clock() - self.opened_at >= self.recovery_timeout:
+            self._transition(HALF_OPEN)
+        return self._state
+
+    @property
+    def failure_count(self):
+        """The number of failures in the current window."""
+        self._expire(self.clock())
+        return len(self._failures)
+
+    def _expire(self, now):
+        while self._failures and now - self._failures[0] > self.window:
+            self._failures.popleft()
+
+    def _transition(self, new_state):
+        old_state = self._state
+        self._state = new_state
+        self._probes = 0
+
+        if new_state == OPEN:
+            self.opened_at = self.clock()
+        elif new_state == CLOSED:
+            self.opened_at = None
+            self._failures.clear()
+
+        log.warning("Circuit for %s: %s -> %s", self.key, old_state, new_state)
+        for listener in self.listeners:
+            listener(self, old_state, new_state)
+
+    def before_call(self):
+        """Must be called before every attempt.
+
+        :raises CircuitOpen: if the attempt should not be made
+        """
+        state = self.state
+        if state == CLOSED:
+            return
+
+        if state == HALF_OPEN and self._probes < self.half_open_max_calls:
+            self._probes += 1
+            return
+
+        raise exceptions.CircuitOpen(f"Circuit for {self.key} is {state}")
+
+    def record_success(self):
+        """Records an attempt that reached a healthy endpoint."""
+        if self._state == HALF_OPEN:
+            self._transition(CLOSED)
+
+    def record_failure(self):
+        """Records an attempt that failed because of the endpoint."""
+        now = self.clock()
+        if self._state == HALF_OPEN:
+            self._transition(OPEN)
+            return
+
+        if self._state == OPEN:
+            return
+
+        self._failures.append(now)
+        self._expire(now)
+        if len(self._failures) >= self.failure_threshold:
+            self._transition(OPEN)
+
+    def release(self):
+        """Records an attempt that ended without saying anything."""
+        if self._state == HALF_OPEN and self._probes:
+            self._probes -= 1
+
+
+class CircuitBreakers:
+    """A registry of :class:`CircuitBreaker` objects, keyed by endpoint.
+
+    A single registry may be shared by several clients that talk to the same
+    API.
+
+    :param str key: `host` to share a breaker across a host, or `path` to have
+        one per host and path. May also be a callable that takes the request
+        URL and returns the key.
+    :param callable classify: Decides whether an exception is a failure (see
+        :func:`is_failure`)
+    :param list listeners: State change listeners given to every breaker
+    :param dict kwargs: Passed on to every :class:`CircuitBreaker`
+    """
+
+    def __init__(self, key="host", classify=is_failure, listeners=None, **kwargs):
+        self._key_for = utils.endpoint_key(key, "circuit breaker")
+        self.classify = classify
+        self.listeners = listeners if listeners is not None else []
+        self._kwargs = kwargs
+        self._breakers = {}
+
+    def get(self, url):
+        """Returns the breaker for the endpoint of `url`, creating it if needed."""
+        key = self._key_for(url)
+        try:
+            return self._breakers[key]
+        except KeyError:
+            breaker = CircuitBreaker(key, listeners=self.listeners, **self._kwargs)
+            self._breakers[key] = breaker
+            return breaker
+
+    def record(self, breaker, exc=None):
+        """Records the outcome of an attempt on `breaker`.
+
+        :param CircuitBreaker breaker: The breaker returned by :func:`get`
+        :param BaseException exc: The exception raised, `None` on success
+        """
+        failed = False if exc is None else self.classify(exc)
+        if failed is None:
+            breaker.release()
+        elif failed:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+
+    def states(self):
+        """Returns a `{key: state}` snapshot of every known breaker."""
+        return {key: breaker.state for key, breaker in self._breakers.items()}
+
+    def __iter__(self):
+        return iter(list(self._breakers.values()))
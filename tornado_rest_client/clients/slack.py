@@ -81,7 +81,15 @@ class Slack(api.RestConsumer):
         if "token" not in kwargs:
             raise exceptions.InvalidCredentials('Missing "token" keyword argument.')
 
-        kwargs["client"] = api.SimpleTokenRestClient(tokens={"token": kwargs["token"]})
+        # Child consumers (ie, `auth_test()`) are handed the client of their
+        # parent, which already sends this token. Any other client is
+        # replaced, as it would not send the token.
+        client = kwargs.get("client")
+        tokens = getattr(client, "_tokens", None)
+        if not (
+            isinstance(client, api.SimpleTokenRestClient) and tokens == {"token": kwargs["token"]}
+        ):
+            kwargs["client"] = api.SimpleTokenRestClient(tokens={"token": kwargs["token"]})
 
         super().__init__(*args, **kwargs)
 
@@ -106,9 +114,7 @@ class Slack(api.RestConsumer):
 
             error = result["error"]
         except (AttributeError, KeyError) as e:
-            raise RequestFailure(
-                f"An unexpected Slack API failure occured: {result}"
-            ) from e
+            raise RequestFailure(f"An unexpected Slack API failure occured: {result}") from e
 
         if error == "invalid_auth":
             raise exceptions.InvalidCredentials(f'Slack API Error: "invalid_auth".')
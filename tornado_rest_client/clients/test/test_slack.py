@@ -2,6 +2,7 @@
 
 from tornado import testing
 
+from tornado_rest_client import api as rest_api
 from tornado_rest_client import exceptions
 from tornado_rest_client.clients import slack
 
@@ -13,6 +14,20 @@ class TestSlack(testing.AsyncTestCase):
         with self.assertRaises(exceptions.InvalidCredentials):
             slack.Slack()
 
+    def test_child_consumers_share_client(self):
+        api = slack.Slack(token="unittest")
+        self.assertIs(api._client, api.chat_postMessage()._client)
+
+    def test_supplied_client_gets_the_token(self):
+        for client in (
+            rest_api.RestClient(),
+            rest_api.SimpleTokenRestClient(tokens={"token": "other"}),
+        ):
+            api = slack.Slack(token="unittest", client=client)
+            self.assertIsInstance(api._client, rest_api.SimpleTokenRestClient)
+            self.assertEqual(api._client._tokens, {"token": "unittest"})
+            self.assertEqual(api.auth_test()._client._tokens, {"token": "unittest"})
+
     def test_check_results_with_ok_results(self):
         api = slack.Slack(token="unittest")
         results = {
@@ -0,0 +1,168 @@
+"""
+:mod:`tornado_rest_client.codec`
+^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^
+
+JSON codecs used by :class:`~tornado_rest_client.api.RestClient` to encode
+request bodies and decode responses.
+
+JSON handling is often where a busy client spends most of its CPU, so when
+`orjson`, `msgspec` or `ujson` is installed it is used (in that order of
+preference) instead of the stdlib :mod:`json`. Every codec decodes straight
+from the `bytes` of the response body, and encodes to `bytes`.
+
+The codec may also be picked per client, by name or instance:
+
+    >>> client = api.RestClient(codec='stdlib')
+    >>> client.codec
+    StdlibCodec()
+"""
+
+import logging
+
+log = logging.getLogger(__name__)
+
+import json
+
+from tornado_rest_client import exceptions
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+
+class Codec:
+    """Base JSON codec.
+
+    :attr:`decode_errors` lists the exceptions :func:`loads` raises on a body
+    that is not JSON.
+    """
+
+    #: Name of the codec, as given to :func:`get`
+    name = None
+
+    #: Exceptions raised by :func:`loads` for bodies that are not JSON
+    decode_errors = (ValueError,)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}()"
+
+    def dumps(self, obj):
+        """Returns `obj` encoded as JSON `bytes`."""
+        raise NotImplementedError()
+
+    def loads(self, data):
+        """Returns the object decoded from the JSON `bytes` (or `str`)."""
+        raise NotImplementedError()
+
+
+class StdlibCodec(Codec):
+    """The :mod:`json` module of the standard library."""
+
+    name = "stdlib"
+
+    def dumps(self, obj):
+        return json.dumps(obj).encode("utf-8")
+
+    def loads(self, data):
+        return json.loads(data)
+
+
+class OrjsonCodec(Codec):
+    """`orjson <https://github.com/ijl/orjson>`_, the fastest available."""
+
+    name = "orjson"
+
+    def dumps(self, obj):
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+
+    def loads(self, data):
+        return orjson.loads(data)
+
+
+class MsgspecCodec(Codec):
+    """`msgspec <https://jcristharif.com/msgspec/>`_ JSON."""
+
+    name = "msgspec"
+
+    def __init__(self):
+        self.decode_errors = (ValueError, msgspec.DecodeError)
+        self._encoder = msgspec.json.Encoder()
+        self._decoder = msgspec.json.Decoder()
+
+    def dumps(self, obj):
+        return self._encoder.encode(obj)
+
+    def loads(self, data):
+        return self._decoder.decode(data)
+
+
+class UjsonCodec(Codec):
+    """`ujson <https://github.com/ultrajson/ultrajson>`_."""
+
+    name = "ujson"
+
+    def dumps(self, obj):
+        return ujson.dumps(obj).encode("utf-8")
+
+    def loads(self, data):
+        return ujson.loads(data)
+
+
+#: Codecs by name, and whether their library is installed
+CODECS = {
+    StdlibCodec.name: (StdlibCodec, True),
+    OrjsonCodec.name: (OrjsonCodec, orjson is not None),
+    MsgspecCodec.name: (MsgspecCodec, msgspec is not None),
+    UjsonCodec.name: (UjsonCodec, ujson is not None),
+}
+
+# Order in which codecs are picked by default
+_PREFERENCE = (OrjsonCodec.name, MsgspecCodec.name, UjsonCodec.name)
+
+_INSTANCES = {}
+
+
+def available():
+    """Returns the names of the codecs that can be used."""
+    return [name for name, (_, installed) in CODECS.items() if installed]
+
+
+def get(codec=None):
+    """Returns a :class:`Codec`.
+
+    :param codec: A :class:`Codec`, the name of one (see :data:`CODECS`), or
+        `None` for the fastest one installed.
+    :raises InvalidOptions: for unknown (or not installed) codecs
+    """
+    if isinstance(codec, Codec):
+        return codec
+
+    if codec is None:
+        codec = next((name for name in _PREFERENCE if CODECS[name][1]), StdlibCodec.name)
+
+    try:
+        return _INSTANCES[codec]
+    except KeyError:
+        pass
+
+    try:
+        codec_class, installed = CODECS[codec]
+    except KeyError:
+        raise exceptions.InvalidOptions(f"Unknown JSON codec: {codec}") from None
+    if not installed:
+        raise exceptions.InvalidOptions(f"JSON codec {codec} is not installed")
+
+    instance = _INSTANCES[codec] = codec_class()
+    log.debug("Using the %s JSON codec", codec)
+    return instance
@@ -0,0 +1,206 @@
+"""
+:mod:`tornado_rest_client.compress`
+^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^
+
+Request body compression, and byte counters for the traffic of a
+:class:`~tornado_rest_client.api.RestClient`.
+
+Compression is opt-in, since a server has to support the `Content-Encoding`
+of a request body. Bodies smaller than the `threshold` are sent as-is:
+
+    >>> client = api.RestClient(
+    ...     compression=compress.Compression('gzip', threshold=4096))
+
+If a server answers a compressed request with `415 Unsupported Media Type`,
+the request is sent again uncompressed, and its host is not sent compressed
+bodies anymore.
+
+`zstd` needs the `zstandard` package. Responses are decompressed (and
+`Accept-Encoding: gzip` advertised) by tornado itself, see the
+`decompress_response` option of
+:class:`~tornado_rest_client.api.RestClient`.
+
+Every client counts the bytes it sends and receives in its
+:attr:`~tornado_rest_client.api.RestClient.transfer_stats`:
+
+    >>> client.transfer_stats
+    TransferStats(requests=12, request_bytes=48213, request_wire_bytes=9120,
+                  response_bytes=3012, response_wire_bytes=1210)
+"""
+
+import logging
+
+log = logging.getLogger(__name__)
+
+import collections
+import gzip
+import zlib
+
+from tornado_rest_client import exceptions
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+GZIP = "gzip"
+DEFLATE = "deflate"
+ZSTD = "zstd"
+
+
+def zstd_available():
+    """Whether the `zstandard` package is installed."""
+    return zstandard is not None
+
+
+class Compression:
+    """Compresses request bodies over a size threshold.
+
+    :param str encoding: `gzip`, `deflate` or `zstd`
+    :param int threshold: Smallest body (in bytes) worth compressing
+    :param int level: Compression level, the codec's default if `None`
+    """
+
+    def __init__(self, encoding=GZIP, threshold=1024, level=None):
+        if encoding == GZIP:
+            level = 6 if level is None else level
+            self._compress = lambda body: gzip.compress(body, compresslevel=level)
+        elif encoding == DEFLATE:
+            level = -1 if level is None else level
+            self._compress = lambda body: zlib.compress(body, level)
+        elif encoding == ZSTD:
+            if not zstd_available():
+                raise exceptions.InvalidOptions("zstd compression requires zstandard")
+            compressor = zstandard.ZstdCompressor(level=3 if level is None else level)
+            self._compress = compressor.compress
+        else:
+            raise exceptions.InvalidOptions(f"Unknown compression: {encoding}")
+
+        self.encoding = encoding
+        self.threshold = threshold
+        self.level = level
+        self._unsupported = set()
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.encoding}, " f"threshold={self.threshold})"
+
+    def compress(self, body, host=None):
+        """Returns `body` compressed, or `None` if it should be sent as-is.
+
+        :param bytes body: The request body
+        :param str host: The host the body is sent to
+        """
+        if len(body) < self.threshold or host in self._unsupported:
+            return None
+
+        compressed = self._compress(body)
+        if len(compressed) >= len(body):
+            return None
+        return compressed
+
+    def unsupported(self, host):
+        """Stops compressing bodies sent to `host`."""
+        log.warning("%s does not accept %s request bodies", host, self.encoding)
+        self._unsupported.add(host)
+
+
+#: The bytes of a single request, and of its response.
+#:
+#: * *url*, *method*: The request
+#: * *request_bytes*: Size of the request body before compression
+#: * *request_wire_bytes*: Size of the request body as sent
+#: * *response_bytes*: Size of the (decompressed) response body
+#: * *response_wire_bytes*: Size of the response body as received, from its
+#:   `Content-Length` when it was decompressed by tornado
+Transfer = collections.namedtuple(
+    "Transfer",
+    (
+        "url",
+        "method",
+        "request_bytes",
+        "request_wire_bytes",
+        "response_bytes",
+        "response_wire_bytes",
+    ),
+)
+
+
+class TransferStats:
+    """Byte counters for every request made by a client.
+
+    :param list listeners: Callables invoked with a :data:`Transfer` for each
+        request, ie to feed a metrics system
+    """
+
+    __slots__ = (
+        "requests",
+        "request_bytes",
+        "request_wire_bytes",
+        "response_bytes",
+        "response_wire_bytes",
+        "listeners",
+    )
+
+    def __init__(self, listeners=None):
+        self.requests = 0
+        self.request_bytes = 0
+        self.request_wire_bytes = 0
+        self.response_bytes = 0
+        self.response_wire_bytes = 0
+        self.listeners = listeners if listeners is not None else []
+
+    def __repr__(self):
+        counters = ", ".join(f"{name}={getattr(self, name)}" for name in self.__slots__[:-1])
+        return f"{self.__class__.__name__}({counters})"
+
+    @property
+    def saved_bytes(self):
+        """Bytes that compression kept off the wire, both ways."""
+        return (
+            self.request_bytes
+            - self.request_wire_bytes
+            + self.response_bytes
+            - self.response_wire_bytes
+        )
+
+    def record(self, http_request, http_response, request_bytes=None):
+        """Counts the bytes of one request and its response.
+
+        :param HTTPRequest http_request: The request as sent
+        :param HTTPResponse http_response: Its response, `None` if there was
+            none
+        :param int request_bytes: Size of the body before compression, if it
+            was compressed
+        :return: The :data:`Transfer`
+        """
+        wire = len(http_request.body or b"")
+        producer = getattr(http_request, "body_producer", None)
+        if producer is not None:
+            # Streamed bodies count what they wrote
+            wire = getattr(producer, "sent", 0)
+        raw = wire if request_bytes is None else request_bytes
+
+        received = received_wire = 0
+        if http_response is not None and http_response.buffer is not None:
+            received = received_wire = len(http_response.body)
+            headers = http_response.headers
+            # The simple client renames the header it decompressed, curl
+            # leaves it alone.
+            if "X-Consumed-Content-Encoding" in headers or "Content-Encoding" in headers:
+                try:
+                    received_wire = int(headers["Content-Length"])
+                except (KeyError, ValueError):
+                    pass
+
+        self.requests += 1
+        self.request_bytes += raw
+        self.request_wire_bytes += wire
+        self.response_bytes += received
+        self.response_wire_bytes += received_wire
+
+        transfer = Transfer(
+            http_request.url, http_request.method, raw, wire, received, received_wire
+        )
+        for listener in self.listeners:
+            listener(transfer)
+        return transfer
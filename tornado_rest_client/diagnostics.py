@@ -0,0 +1,82 @@
+"""
+:mod:`tornado_rest_client.diagnostics`
+^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^
+
+Structured, sampled tracing of the requests made by a
+:class:`~tornado_rest_client.api.RestClient`.
+
+Logging every request at `DEBUG` level is costly, and says too much (whole
+bodies) about too many requests. A :class:`TraceHook` instead hands a small
+set of fields about a sample of the requests to a callback, ie to feed a
+structured logger:
+
+    >>> def trace(event, **fields):
+    ...     structlog.get_logger().info(event, **fields)
+    >>> client = api.RestClient(
+    ...     trace=diagnostics.TraceHook(trace, sample_rate=0.01))
+
+Two events are emitted:
+
+* `request`, for a sample of the HTTP attempts, with the `method`, the `url`
+  (without its query string, which may hold credentials), the response
+  `status` (`None` if there was no response), the `duration` in seconds, the
+  `request_bytes` and `response_bytes` as sent and received, and the `error`
+  raised, if any.
+* `retry`, for every retried call (retries are rare, and always worth a
+  look), with the `call` being retried, the number of the failed `attempt`,
+  the `error`, the `wait` in seconds before the next attempt, and the
+  `kwargs` of the call. The private values of the client (its
+  `_private_kwargs`, ie the tokens of a
+  :class:`~tornado_rest_client.api.SimpleTokenRestClient`) are masked there,
+  and in the `params` and `headers` it holds, and URLs lose their query
+  string.
+
+Nothing is measured for requests that are not sampled.
+"""
+
+import logging
+
+log = logging.getLogger(__name__)
+
+import random
+
+from tornado_rest_client import exceptions
+
+#: An HTTP attempt, see :class:`TraceHook`
+REQUEST = "request"
+
+#: A retried call, see :class:`TraceHook`
+RETRY = "retry"
+
+
+def log_event(event, **fields):
+    """A callback for :class:`TraceHook` that logs events at `INFO` level."""
+    log.info("%s %s", event, " ".join(f"{k}={v!r}" for k, v in fields.items()))
+
+
+class TraceHook:
+    """Hands structured events about a client's requests to a callback.
+
+    :param callable callback: Called as `callback(event, **fields)`
+    :param float sample_rate: Fraction of the `request` events emitted,
+        between `0` and `1`
+    :param callable rand: Returns a float in `[0, 1)`, for tests
+    """
+
+    def __init__(self, callback=log_event, sample_rate=1.0, rand=random.random):
+        if not 0 <= sample_rate <= 1:
+            raise exceptions.InvalidOptions(f"Invalid sample rate: {sample_rate}")
+        self.callback = callback
+        self.sample_rate = sample_rate
+        self._rand = rand
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(sample_rate={self.sample_rate})"
+
+    def sampled(self):
+        """Whether the next request should be traced."""
+        return self.sample_rate >= 1 or self._rand() < self.sample_rate
+
+    def emit(self, event, **fields):
+        """Hands an event to the callback."""
+        self.callback(event, **fields)
@@ -24,3 +24,23 @@ class InvalidOptions(UnrecoverableFailure):
 
 class InvalidCredentials(UnrecoverableFailure):
     """Invalid or missing credentials"""
+
+
+class InvalidResponse(UnrecoverableFailure):
+    """The response body does not fit the `response_model` of the endpoint"""
+
+
+class CircuitOpen(RecoverableFailure):
+    """The circuit breaker for an endpoint is open, the call was not made"""
+
+
+class BulkheadFull(RecoverableFailure):
+    """No slot was freed in the bulkhead for an endpoint, the call was not made"""
+
+
+class UploadNotReplayable(UnrecoverableFailure):
+    """A streamed request body was (partly) sent, and cannot be sent again"""
+
+
+class StreamOverflow(UnrecoverableFailure):
+    """The caller of a streaming request fell too far behind the download"""
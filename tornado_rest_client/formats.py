@@ -0,0 +1,151 @@
+"""
+:mod:`tornado_rest_client.formats`
+^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^
+
+Response formats of :func:`~tornado_rest_client.api.RestClient.fetch`.
+
+By default, :func:`~tornado_rest_client.api.RestClient.fetch` tries to decode
+every body as JSON, and hands out the raw `bytes` of bodies that are not.
+Consumers that only forward responses (to another service, or to disk) pay
+for a full parse they do not need, and non-JSON payloads pay for a failed
+one. A `response_format` says what to do with the body instead:
+
+* :data:`JSON`: decode it as JSON. A body that is not JSON raises
+  :class:`~tornado_rest_client.exceptions.InvalidResponse`.
+* :data:`TEXT`: decode it to a `str`, with the charset of its
+  `Content-Type` (UTF-8 by default).
+* :data:`BYTES`: hand out the raw `bytes`.
+* :data:`MEMORYVIEW`: hand out a :class:`memoryview` over the response
+  buffer, without copying it.
+* :data:`AUTO`: pick one of the above by `Content-Type`: `JSON` for
+  `application/json` (and `+json`) types, `TEXT` for `text/*` types, and
+  `BYTES` for anything else.
+
+The format is given per call to
+:func:`~tornado_rest_client.api.RestClient.fetch`, or per endpoint with a
+`response_format` in the :attr:`~tornado_rest_client.api.RestConsumer.CONFIG`:
+
+    >>> CONFIG = {
+    ...     'attrs': {
+    ...         'export': {
+    ...             'path': '/api/export',
+    ...             'http_methods': {'get': {'response_format': 'bytes'}},
+    ...         },
+    ...     }
+    ... }
+
+Empty bodies are decoded as `None` by the `JSON` and `AUTO` formats.
+"""
+
+import logging
+
+log = logging.getLogger(__name__)
+
+import re
+
+from tornado_rest_client import exceptions
+
+#: Decode the body as JSON
+JSON = "json"
+
+#: Decode the body to a `str`
+TEXT = "text"
+
+#: The raw `bytes` of the body
+BYTES = "bytes"
+
+#: A :class:`memoryview` over the body
+MEMORYVIEW = "memoryview"
+
+#: Pick the format by `Content-Type`
+AUTO = "auto"
+
+#: Every known format
+FORMATS = frozenset((JSON, TEXT, BYTES, MEMORYVIEW, AUTO))
+
+#: Formats that hand out decoded JSON
+DECODED = frozenset((JSON, AUTO))
+
+_CHARSET_RE = re.compile(r";\s*charset\s*=\s*\"?([\w.:-]+)", re.IGNORECASE)
+
+# Parsed Content-Type headers, by header. Servers only ever send a handful.
+_MEDIA_TYPES = {}
+_MAX_MEDIA_TYPES = 256
+
+
+def check(fmt):
+    """Raises :class:`~tornado_rest_client.exceptions.InvalidOptions` if
+    `fmt` is not `None` or one of :data:`FORMATS`."""
+    if fmt is not None and fmt not in FORMATS:
+        raise exceptions.InvalidOptions(
+            f"Unknown response_format {fmt!r}, pick one of {sorted(FORMATS)}"
+        )
+
+
+def media_type(content_type):
+    """Returns the `(format, charset)` of a `Content-Type` header.
+
+    The format is the one :data:`AUTO` picks for it, and the charset is
+    `None` when the header does not name one.
+    """
+    try:
+        return _MEDIA_TYPES[content_type]
+    except KeyError:
+        pass
+
+    mime = (content_type or "").split(";", 1)[0].strip().lower()
+    if mime == "application/json" or mime.endswith("+json"):
+        fmt = JSON
+    elif mime.startswith("text/"):
+        fmt = TEXT
+    else:
+        fmt = BYTES
+    match = _CHARSET_RE.search(content_type or "")
+    parsed = (fmt, match.group(1) if match else None)
+
+    if len(_MEDIA_TYPES) >= _MAX_MEDIA_TYPES:
+        _MEDIA_TYPES.clear()
+    _MEDIA_TYPES[content_type] = parsed
+    return parsed
+
+
+def decode(fmt, body, codec, content_type=None, buffer=None):
+    """Returns `body` in the format `fmt`.
+
+    :param str fmt: One of :data:`FORMATS`
+    :param bytes body: The body of the response
+    :param Codec codec: The :class:`~tornado_rest_client.codec.Codec` JSON
+        bodies are decoded with
+    :param str content_type: The `Content-Type` header of the response
+    :param io.BytesIO buffer: The buffer `body` was read from, for
+        :data:`MEMORYVIEW`. Responses without one (ie, streamed or empty
+        ones) get a view of `body`, or an empty view.
+    :raises InvalidResponse: if the body cannot be decoded
+    """
+    if fmt == BYTES:
+        return body
+    if fmt == MEMORYVIEW:
+        if buffer is not None:
+            return buffer.getbuffer()
+        return memoryview(b"" if body is None else body)
+
+    charset = None
+    if fmt == AUTO or fmt == TEXT:
+        detected, charset = media_type(content_type)
+        if fmt == AUTO:
+            fmt = detected
+            if fmt == BYTES:
+                return body
+
+    if fmt == TEXT:
+        try:
+            return body.decode(charset or "utf-8")
+        except (LookupError, UnicodeDecodeError) as exc:
+            raise exceptions.InvalidResponse(f"Invalid text body: {exc}") from exc
+
+    if not body:
+        return None
+    try:
+        return codec.loads(body)
+    except codec.decode_errors as exc:
+        raise exceptions.InvalidResponse(f"Invalid JSON body: {exc}") from exc
@@ -0,0 +1,157 @@
+"""
+:mod:`tornado_rest_client.hedge`
+^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^
+
+Hedged requests, to cut the tail latency of idempotent calls.
+
+When a request to a host is slower than usual (ie, it landed on an unhealthy
+replica), a :class:`~tornado_rest_client.api.RestClient` with :class:`Hedging`
+sends a duplicate of it, uses whichever response comes back first, and
+cancels the other:
+
+    >>> client = api.RestClient(hedging=hedge.Hedging(budget=0.05))
+
+The duplicate is sent after a fixed `delay`, or (by default) once the request
+has taken longer than the `quantile` of the recent latencies to its host.
+Until `min_samples` latencies have been seen, the `initial_delay` is used.
+
+Every hedge doubles the load of a request, so hedges are paid for from a
+budget: each request adds `budget` to it (up to `burst`), and each hedge
+spends `1`. At most a `budget` fraction of the requests are hedged, however
+slow the upstream gets.
+
+Only *GET* and *HEAD* requests are hedged, since the duplicate may reach the
+server too. A cancelled duplicate is dropped on our side, but may still be
+processed by the server.
+"""
+
+import logging
+
+log = logging.getLogger(__name__)
+
+import collections
+
+from tornado_rest_client import exceptions
+
+#: Methods safe to send twice
+IDEMPOTENT = frozenset(("GET", "HEAD"))
+
+
+class _Latencies:
+    """A sliding window of latencies, with a cached quantile."""
+
+    __slots__ = ("samples", "quantile", "_stale", "_cached")
+
+    def __init__(self, window, quantile):
+        self.samples = collections.deque(maxlen=window)
+        self.quantile = quantile
+        # The quantile is only recomputed every tenth of the window
+        self._stale = 0
+        self._cached = None
+
+    def add(self, latency):
+        self.samples.append(latency)
+        self._stale += 1
+
+    def value(self):
+        if self._cached is None or self._stale > self.samples.maxlen // 10:
+            ordered = sorted(self.samples)
+            index = min(int(self.quantile * len(ordered)), len(ordered) - 1)
+            self._cached = ordered[index]
+            self._stale = 0
+        return self._cached
+
+
+class Hedging:
+    """Decides when (and whether) to hedge a request.
+
+    :param float delay: Seconds after which a duplicate is sent. When `None`,
+        the `quantile` of the recent latencies to the host is used.
+    :param float quantile: Latency quantile after which a duplicate is sent
+    :param float initial_delay: Delay used until `min_samples` latencies of a
+        host have been seen
+    :param int min_samples: Latencies needed before trusting the quantile
+    :param int window: Number of recent latencies kept per host
+    :param float budget: Fraction of the requests that may be hedged
+    :param float burst: Hedges that may be sent back-to-back after a quiet
+        period
+    :param methods: HTTP methods that may be hedged
+    """
+
+    def __init__(
+        self,
+        delay=None,
+        quantile=0.95,
+        initial_delay=0.5,
+        min_samples=20,
+        window=1000,
+        budget=0.1,
+        burst=10,
+        methods=IDEMPOTENT,
+    ):
+        if delay is not None and delay < 0:
+            raise exceptions.InvalidOptions(f"Invalid hedging delay: {delay}")
+        if not 0 < quantile < 1:
+            raise exceptions.InvalidOptions(f"Invalid hedging quantile: {quantile}")
+        if not 0 <= budget <= 1 or burst < 1:
+            raise exceptions.InvalidOptions(f"Invalid hedging budget: {budget} (burst {burst})")
+        unsafe = set(method.upper() for method in methods) - IDEMPOTENT
+        if unsafe:
+            raise exceptions.InvalidOptions(
+                f"Methods that are not idempotent cannot be hedged: {unsafe}"
+            )
+
+        self.fixed_delay = delay
+        self.quantile = quantile
+        self.initial_delay = initial_delay
+        self.min_samples = min_samples
+        self.window = window
+        self.budget = budget
+        self.burst = burst
+        self.methods = frozenset(method.upper() for method in methods)
+        self.hedged = 0
+        self.won = 0
+        self._tokens = burst
+        self._latencies = {}
+
+    def __repr__(self):
+        return (
+            f"{self.__class__.__name__}(budget={self.budget}, "
+            f"hedged={self.hedged}, won={self.won})"
+        )
+
+    def delay(self, host):
+        """Returns how long to wait for a response from `host` before
+        hedging the request."""
+        if self.fixed_delay is not None:
+            return self.fixed_delay
+        latencies = self._latencies.get(host)
+        if latencies is None or len(latencies.samples) < self.min_samples:
+            return self.initial_delay
+        return latencies.value()
+
+    def started(self):
+        """Adds a request's share to the budget."""
+        self._tokens = min(self._tokens + self.budget, self.burst)
+
+    def spend(self):
+        """Takes a hedge from the budget, returns `False` if it is spent."""
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        self.hedged += 1
+        return True
+
+    def observe(self, host, latency, hedge_won=False):
+        """Records the latency of a request to `host`, as seen by the caller.
+
+        :param str host: The host of the request
+        :param float latency: Seconds until the first response
+        :param bool hedge_won: Whether the response came from the duplicate
+        """
+        latencies = self._latencies.get(host)
+        if latencies is None:
+            latencies = self._latencies[host] = _Latencies(self.window, self.quantile)
+        latencies.add(latency)
+        if hedge_won:
+            self.won += 1
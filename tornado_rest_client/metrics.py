@@ -0,0 +1,274 @@
+"""
+:mod:`tornado_rest_client.metrics`
+^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^
+
+Timing breakdown of the requests made by a
+:class:`~tornado_rest_client.api.RestClient`.
+
+A client given a :class:`MetricsSink` reports how long each phase of every
+request took, in seconds:
+
+* `rate_limit_seconds`: waiting for a token of the client's rate limiter, before
+  every attempt
+* `queue_seconds`: waiting for a bulkhead slot, and for a free connection of
+  the HTTP client (taken from curl's `time_info`, and estimated from the
+  `request_time` of the simple client)
+* `dns_seconds`, `connect_seconds`, `tls_seconds`: resolving the host,
+  connecting to it, and the TLS handshake
+* `ttfb_seconds`: from the request being sent to the first byte of the
+  response
+* `transfer_seconds`: receiving the response
+* `request_seconds`: the whole HTTP attempt, also tagged with its `status`
+* `decode_seconds`: decoding the response body
+* `retry_sleep_seconds`: waiting between two attempts of a call
+
+The DNS, connection, TLS, first byte and transfer phases come from the
+:attr:`~tornado.httpclient.HTTPResponse.time_info` of the response, which
+only the curl client fills in (see :mod:`~tornado_rest_client.transport`).
+
+Every observation is tagged with the HTTP `method` and, for calls made
+through a :class:`~tornado_rest_client.api.RestConsumer`, the `consumer`
+name and the `path` of its CONFIG (before token replacement, to keep the
+number of distinct tags bounded).
+
+:class:`InMemorySink` keeps a :class:`Histogram` per metric and tags, and
+:class:`PrometheusExporter` renders them in the Prometheus text format:
+
+    >>> sink = metrics.InMemorySink()
+    >>> slack = Slack(client=api.RestClient(metrics=sink))
+    >>> ...
+    >>> sink.get('request_seconds', consumer='users_list').quantile(0.95)
+    0.184
+    >>> print(metrics.PrometheusExporter(sink).render())
+"""
+
+import logging
+
+log = logging.getLogger(__name__)
+
+import bisect
+import contextvars
+import time
+
+#: Tags of the :class:`~tornado_rest_client.api.RestConsumer` call being
+#: made, set around each call so that the client can tag what it measures.
+TAGS = contextvars.ContextVar("tornado_rest_client_metric_tags", default=None)
+
+#: Upper bounds (in seconds) of the buckets of a :class:`Histogram`
+DEFAULT_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+#: The clock phases are measured with
+clock = time.perf_counter
+
+
+def tags(**extra):
+    """Returns the tags of the current call, with `extra` ones."""
+    current = TAGS.get()
+    if current is None:
+        return extra
+    return {**current, **extra}
+
+
+def time_info_phases(time_info):
+    """Yields the `(metric, seconds)` phases found in a curl `time_info`.
+
+    Every value of `time_info` is the time elapsed since the request started,
+    so each phase is the difference between two of them. The `queue` time is
+    left to the caller, which adds its own waits to it.
+    """
+    if not time_info:
+        return
+    namelookup = time_info.get("namelookup", 0)
+    connect = time_info.get("connect", 0)
+    appconnect = time_info.get("appconnect", 0)
+    pretransfer = time_info.get("pretransfer", 0)
+    starttransfer = time_info.get("starttransfer", 0)
+    yield "dns_seconds", namelookup
+    yield "connect_seconds", max(connect - namelookup, 0)
+    # Reused connections, and plain HTTP, have no handshake
+    if appconnect:
+        yield "tls_seconds", max(appconnect - connect, 0)
+    if starttransfer:
+        yield "ttfb_seconds", max(starttransfer - pretransfer, 0)
+        yield "transfer_seconds", max(time_info.get("total", 0) - starttransfer, 0)
+
+
+class MetricsSink:
+    """Receives the observations of a client.
+
+    Implement :func:`observe` to forward them to a metrics system (statsd,
+    prometheus_client, ...).
+    """
+
+    def observe(self, name, value, tags):
+        """Records one observation.
+
+        :param str name: The metric (ie, `request_seconds`)
+        :param float value: The observed value
+        :param dict tags: Its tags
+        """
+        raise NotImplementedError()
+
+
+class Histogram:
+    """Counts observations in buckets, Prometheus style.
+
+    :param tuple buckets: Sorted upper bounds of the buckets. Values over the
+        last bound fall in a final `+Inf` bucket.
+    """
+
+    __slots__ = ("buckets", "counts", "count", "sum")
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(count={self.count}, sum={self.sum:.6f})"
+
+    def observe(self, value):
+        """Counts one value."""
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self):
+        """Yields `(upper bound, observations <= bound)`, ending with `+Inf`."""
+        total = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            yield bound, total
+
+    def quantile(self, q):
+        """Estimates the `q` quantile (ie, `0.95`), or `None` if empty.
+
+        Values are assumed to be spread evenly within their bucket. Quantiles
+        that fall over the last bucket are reported as its bound.
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        lower = previous = 0
+        for bound, total in self.cumulative():
+            if total >= rank:
+                if bound == float("inf"):
+                    return lower
+                in_bucket = total - previous
+                return lower + (bound - lower) * (rank - previous) / in_bucket
+            lower, previous = bound, total
+        return lower
+
+
+def _series(tags):
+    """Returns the hashable (and sortable) key of a set of tags."""
+    return tuple(sorted((key, str(value)) for key, value in tags.items()))
+
+
+class InMemorySink(MetricsSink):
+    """Keeps a :class:`Histogram` for each metric and set of tags.
+
+    Tag values are kept as strings, as in Prometheus labels.
+
+    :param tuple buckets: Bucket bounds of the histograms
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.histograms = {}
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({len(self.histograms)} series)"
+
+    def observe(self, name, value, tags):
+        key = (name, _series(tags))
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram(self.buckets)
+        histogram.observe(value)
+
+    def get(self, name, **tags):
+        """Returns a :class:`Histogram` of every observation of `name` whose
+        tags include `tags`, or `None` if there is none."""
+        wanted = set(_series(tags))
+        merged = None
+        for (metric, series), histogram in self.histograms.items():
+            if metric != name or not wanted.issubset(series):
+                continue
+            if merged is None:
+                merged = Histogram(self.buckets)
+            merged.counts = [a + b for a, b in zip(merged.counts, histogram.counts)]
+            merged.count += histogram.count
+            merged.sum += histogram.sum
+        return merged
+
+    def clear(self):
+        """Forgets every observation."""
+        self.histograms.clear()
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(tags):
+    return ",".join(f'{key}="{_escape(value)}"' for key, value in tags)
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+class PrometheusExporter:
+    """Renders the histograms of an :class:`InMemorySink` as Prometheus text.
+
+    Serve the output of :func:`render` from any HTTP handler, ie a
+    :class:`tornado.web.RequestHandler` mounted on `/metrics`.
+
+    :param InMemorySink sink: The sink to export
+    :param str prefix: Prepended to every metric name
+    """
+
+    content_type = "text/plain; version=0.0.4; charset=utf-8"
+
+    def __init__(self, sink, prefix="tornado_rest_client"):
+        self.sink = sink
+        self.prefix = prefix
+
+    def render(self):
+        """Returns the text exposition of every histogram of the sink."""
+        by_name = {}
+        for (name, tags), histogram in sorted(
+            self.sink.histograms.items(), key=lambda item: item[0]
+        ):
+            by_name.setdefault(name, []).append((tags, histogram))
+
+        lines = []
+        for name, series in by_name.items():
+            metric = f"{self.prefix}_{name}" if self.prefix else name
+            lines.append(f"# TYPE {metric} histogram")
+            for tags, histogram in series:
+                for bound, total in histogram.cumulative():
+                    labels = _labels(tags + (("le", _number(bound)),))
+                    lines.append(f"{metric}_bucket{{{labels}}} {total}")
+                labels = f"{{{_labels(tags)}}}" if tags else ""
+                lines.append(f"{metric}_sum{labels} {_number(histogram.sum)}")
+                lines.append(f"{metric}_count{labels} {histogram.count}")
+        return "\n".join(lines) + "\n" if lines else ""
@@ -0,0 +1,248 @@
+"""
+:mod:`tornado_rest_client.pagination`
+^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^
+
+Pagination strategies for :class:`~tornado_rest_client.api.RestConsumer`
+endpoints that return a collection one page at a time.
+
+Pagination is declared in the
+:attr:`~tornado_rest_client.api.RestConsumer.CONFIG` with a `pagination` key
+on an `http_methods` entry. An `iter_<method>` async iterator (ie,
+`iter_get`) is then generated next to the `http_<method>` coroutine, which
+yields every item of every page:
+
+    >>> CONFIG = {
+    ...     'attrs': {
+    ...         'users_list': {
+    ...             'path': '/api/users.list',
+    ...             'http_methods': {'get': {'pagination': {
+    ...                 'type': 'cursor',
+    ...                 'next': 'response_metadata.next_cursor',
+    ...                 'items': 'members',
+    ...                 'prefetch': 2,
+    ...             }}},
+    ...         },
+    ...     }
+    ... }
+    >>> async for user in slack.users_list().iter_get(limit=200):
+    ...     print(user['name'])
+
+Supported `type` values, and their options:
+
+* `cursor`: the cursor for the next page is found at `next` (a dotted path
+  into the body) and sent as the `param` argument (default: `cursor`).
+  Iteration stops when there is no next cursor.
+* `page`: the `param` argument (default: `page`) counts up from `start`
+  (default: `1`).
+* `offset`: the `param` argument (default: `offset`) moves forward by the
+  number of items on each page.
+* `link`: the next page is the `rel="next"` URL of the `Link` header.
+
+`page` and `offset` stop on an empty page, or on a page shorter than the
+`limit_param` argument (default: `limit`) when one was passed.
+
+Every type takes `items`, the dotted path of the list of items in the body
+(by default, a body that is a list is the list of items, and any other body
+is a single item), and `prefetch`, the number of pages fetched ahead of the
+one being consumed (default: `1`). While the items of one page are handed
+out the next pages are already being fetched, so a full scan takes about as
+long as the slower of the fetching and the processing, rather than both.
+"""
+
+import logging
+
+log = logging.getLogger(__name__)
+
+import re
+
+from tornado_rest_client import exceptions
+
+_LINK_NEXT_RE = re.compile(r'<([^>]*)>[^,]*;\s*rel="?next"?', re.IGNORECASE)
+
+
+def lookup(body, path):
+    """Returns the value at the dotted `path` in `body`, or `None`.
+
+    :param dict body: A decoded response body
+    :param str path: A path like `response_metadata.next_cursor`
+    """
+    for key in path.split("."):
+        if not isinstance(body, dict):
+            return None
+        body = body.get(key)
+    return body
+
+
+class Paginator:
+    """Base pagination strategy.
+
+    Pages are described by `(url, params)` tuples. :func:`first` builds the
+    first one from the caller's arguments, and :func:`next` the following one
+    from the previous page.
+
+    :param str items: Dotted path of the list of items in a page
+    :param int prefetch: Pages to fetch ahead of the one being consumed
+    """
+
+    #: Whether :func:`next` needs the :class:`~tornado.httpclient.HTTPResponse`
+    #: (ie, for its headers) rather than only the decoded body.
+    needs_response = False
+
+    def __init__(self, items=None, prefetch=1):
+        if prefetch < 0:
+            raise exceptions.InvalidOptions(f"Invalid prefetch depth: {prefetch}")
+        self.items_path = items
+        self.prefetch = prefetch
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(items={self.items_path})"
+
+    def items(self, body):
+        """Returns the list of items in a page."""
+        if self.items_path is not None:
+            return lookup(body, self.items_path) or []
+        if isinstance(body, list):
+            return body
+        return [body]
+
+    def first(self, url, params):
+        """Returns the `(url, params)` of the first page."""
+        return url, params
+
+    def next(self, page, body, response=None):
+        """Returns the `(url, params)` of the page after `page`, or `None`.
+
+        :param tuple page: The `(url, params)` of the previous page
+        :param body: The decoded body of the previous page
+        :param HTTPResponse response: The previous response, if
+            :attr:`needs_response` is set
+        """
+        raise NotImplementedError()
+
+
+class CursorPaginator(Paginator):
+    """Follows a cursor returned in each page.
+
+    :param str next: Dotted path of the next cursor in the body
+    :param str param: Argument the cursor is sent as
+    """
+
+    def __init__(self, next="next_cursor", param="cursor", **kwargs):
+        # pylint: disable=redefined-builtin
+        super().__init__(**kwargs)
+        self.next_path = next
+        self.param = param
+
+    def next(self, page, body, response=None):
+        cursor = lookup(body, self.next_path)
+        if not cursor:
+            return None
+        url, params = page
+        return url, {**params, self.param: cursor}
+
+
+class _CountingPaginator(Paginator):
+    """Base for paginators that stop on a short (or empty) page."""
+
+    def __init__(self, limit_param="limit", **kwargs):
+        super().__init__(**kwargs)
+        self.limit_param = limit_param
+
+    def _last(self, params, items):
+        if not items:
+            return True
+        limit = params.get(self.limit_param)
+        try:
+            return limit is not None and len(items) < int(limit)
+        except (TypeError, ValueError):
+            return False
+
+
+class PagePaginator(_CountingPaginator):
+    """Counts pages up from `start`.
+
+    :param str param: Argument the page number is sent as
+    :param int start: Number of the first page
+    """
+
+    def __init__(self, param="page", start=1, **kwargs):
+        super().__init__(**kwargs)
+        self.param = param
+        self.start = start
+
+    def first(self, url, params):
+        return url, {self.param: self.start, **params}
+
+    def next(self, page, body, response=None):
+        url, params = page
+        if self._last(params, self.items(body)):
+            return None
+        return url, {**params, self.param: int(params[self.param]) + 1}
+
+
+class OffsetPaginator(_CountingPaginator):
+    """Moves an offset forward by the number of items on each page.
+
+    :param str param: Argument the offset is sent as
+    """
+
+    def __init__(self, param="offset", **kwargs):
+        super().__init__(**kwargs)
+        self.param = param
+
+    def first(self, url, params):
+        return url, {self.param: 0, **params}
+
+    def next(self, page, body, response=None):
+        url, params = page
+        items = self.items(body)
+        if self._last(params, items):
+            return None
+        return url, {**params, self.param: int(params[self.param]) + len(items)}
+
+
+class LinkPaginator(Paginator):
+    """Follows the `rel="next"` URL of the `Link` response header (RFC 8288).
+
+    The next URL carries all of its arguments, so the original arguments are
+    only sent with the first page.
+    """
+
+    needs_response = True
+
+    def next(self, page, body, response=None):
+        match = _LINK_NEXT_RE.search(response.headers.get("Link", ""))
+        if match is None:
+            return None
+        return match.group(1), {}
+
+
+PAGINATORS = {
+    "cursor": CursorPaginator,
+    "page": PagePaginator,
+    "offset": OffsetPaginator,
+    "link": LinkPaginator,
+}
+
+
+def from_config(config):
+    """Builds a :class:`Paginator` from a CONFIG `pagination` entry.
+
+    :param dict config: A dict with a `type` key (see :data:`PAGINATORS`) and
+        the options of that type, or `None`.
+    :return: A :class:`Paginator`, or `None` if `config` is empty.
+    """
+    if not config:
+        return None
+
+    options = dict(config)
+    kind = options.pop("type", None)
+    try:
+        paginator_class = PAGINATORS[kind]
+    except KeyError:
+        raise exceptions.InvalidOptions(f"Unknown pagination type in config: {config}") from None
+
+    try:
+        return paginator_class(**options)
+    except TypeError as exc:
+        raise exceptions.InvalidOptions(f"Invalid pagination config {config}: {exc}") from exc
@@ -0,0 +1,161 @@
+"""
+:mod:`tornado_rest_client.ratelimit`
+^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^
+
+Client-side rate limiting for :class:`~tornado_rest_client.api.RestConsumer`
+endpoints, so that we pace ourselves rather than finding out about an APIs
+limits from its `429` responses.
+
+Limits are declared in the :attr:`~tornado_rest_client.api.RestConsumer.CONFIG`
+with a `rate_limit` key, either on an `attrs` node (shared by all of its HTTP
+methods) or on a single `http_methods` entry (which takes precedence):
+
+    >>> CONFIG = {
+    ...     'attrs': {
+    ...         'chat_postMessage': {
+    ...             'path': '/api/chat.postMessage',
+    ...             'rate_limit': {'rate': 1, 'burst': 5},
+    ...             'http_methods': {'post': {}},
+    ...         },
+    ...         'users_list': {
+    ...             'path': '/api/users.list',
+    ...             'http_methods': {'get': {'rate_limit': {'rate': 20 / 60.0}}},
+    ...         },
+    ...     }
+    ... }
+
+`rate` is the sustained number of requests per second, and `burst` the
+number of requests that may be made back-to-back after a quiet period.
+
+Each :class:`~tornado_rest_client.api.RestClient` keeps a :class:`TokenBucket`
+of its own per limit, so that clients with other credentials (ie, another
+Slack token) do not throttle each other. Every HTTP attempt takes a token,
+retries included, and attempts over the limit wait their turn (in order)
+without blocking the IOLoop. When an attempt fails with a `Retry-After` (or
+rate-limit reset) header, the client's bucket is paused for that long.
+"""
+
+import logging
+
+log = logging.getLogger(__name__)
+
+import time
+
+from tornado import gen
+
+from tornado_rest_client import exceptions
+
+
+class TokenBucket:
+    """An asynchronous token bucket.
+
+    Callers reserve a token up front, and sleep until their token would have
+    been available. Reservations may take the bucket below zero, which is
+    what queues callers fairly without keeping an explicit queue.
+
+    :param float rate: Tokens added per second
+    :param int burst: Maximum number of tokens held by the bucket
+    :param callable clock: Returns the current (monotonic) time in seconds
+    :param callable sleep: Returns an awaitable that sleeps for `n` seconds
+    """
+
+    def __init__(self, rate, burst=1, clock=time.monotonic, sleep=gen.sleep):
+        if rate <= 0 or burst < 1:
+            raise exceptions.InvalidOptions(
+                f"Rate limits need a positive rate and burst: {rate}/{burst}"
+            )
+
+        self.rate = float(rate)
+        self.burst = burst
+        self.clock = clock
+        self.sleep = sleep
+
+        self._tokens = float(burst)
+        self._updated = clock()
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(rate={self.rate}, burst={self.burst})"
+
+    def _refill(self, now):
+        if now > self._updated:
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+    @property
+    def tokens(self):
+        """Tokens currently available (negative when callers are queued)."""
+        self._refill(self.clock())
+        return self._tokens
+
+    def reserve(self):
+        """Takes a token, and returns how many seconds to wait before using it."""
+        now = self.clock()
+        self._refill(now)
+        self._tokens -= 1
+
+        # `_updated` may be in the future while paused
+        wait = max(self._updated - now, 0.0)
+        if self._tokens < 0:
+            wait += -self._tokens / self.rate
+        return wait
+
+    async def acquire(self):
+        """Waits for a token."""
+        wait = self.reserve()
+        if wait > 0:
+            log.debug("Rate limited, waiting %.3f seconds", wait)
+            await self.sleep(wait)
+
+    def pause(self, seconds):
+        """Hands out no tokens for the next `seconds`.
+
+        Used when the server tells us (ie, with `Retry-After`) that we went
+        too fast. Tokens start to refill again once the pause is over.
+        """
+        now = self.clock()
+        self._refill(now)
+        self._tokens = min(self._tokens, 0.0)
+        self._updated = max(self._updated, now + seconds)
+        log.warning("Rate limit paused for %s seconds", seconds)
+
+
+class RateLimit:
+    """The `rate_limit` of a CONFIG node, that every client builds its own
+    :class:`TokenBucket` from.
+
+    :param float rate: Tokens added per second
+    :param int burst: Maximum number of tokens held by a bucket
+    """
+
+    __slots__ = ("rate", "burst", "__weakref__")
+
+    def __init__(self, rate, burst=1):
+        if rate <= 0 or burst < 1:
+            raise exceptions.InvalidOptions(
+                f"Rate limits need a positive rate and burst: {rate}/{burst}"
+            )
+        self.rate = float(rate)
+        self.burst = burst
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(rate={self.rate}, burst={self.burst})"
+
+    def bucket(self):
+        """Returns a new (full) :class:`TokenBucket` for this limit."""
+        return TokenBucket(self.rate, self.burst)
+
+
+def from_config(config):
+    """Builds a :class:`RateLimit` from a CONFIG `rate_limit` entry.
+
+    :param dict config: A dict with `rate` and optionally `burst` keys, or
+        `None`.
+    :return: A :class:`RateLimit`, or `None` if `config` is empty.
+    """
+    if not config:
+        return None
+
+    try:
+        return RateLimit(rate=config["rate"], burst=config.get("burst", 1))
+    except KeyError as exc:
+        raise exceptions.InvalidOptions(f"Missing {exc} in rate_limit config: {config}") from exc
@@ -0,0 +1,224 @@
+"""
+:mod:`tornado_rest_client.streaming`
+^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^
+
+Incremental decoders used by :func:`~tornado_rest_client.api.RestClient.stream`
+to turn a response body into records as it arrives, rather than buffering the
+whole body and building the full object tree first.
+
+Two formats are understood:
+
+* `ndjson`: one JSON document per line (`application/x-ndjson`,
+  `application/jsonl`, ...)
+* `array`: a top-level JSON array, each element of which is a record
+
+`auto` picks one of the two from the first byte of the body. A decoder only
+holds the record it is working on (plus whatever partial data follows it).
+The records it completes are queued until the caller of
+:func:`~tornado_rest_client.api.RestClient.stream` takes them: memory stays
+bounded only while that caller keeps up with the download (see its
+`max_pending`).
+
+Decoders are fed raw chunks, and return the records completed by each one:
+
+    >>> decoder = streaming.JSONArrayDecoder()
+    >>> decoder.feed(b'[{"id": 1}, {"i')
+    [{'id': 1}]
+    >>> decoder.feed(b'd": 2}]')
+    [{'id': 2}]
+    >>> decoder.close()
+    []
+"""
+
+import logging
+
+log = logging.getLogger(__name__)
+
+import json
+import re
+
+from tornado_rest_client import exceptions
+
+AUTO = "auto"
+ARRAY = "array"
+NDJSON = "ndjson"
+
+# Bytes that change the nesting (or string) state while scanning an array
+_STRUCTURAL_RE = re.compile(rb'[\[\]{},"]')
+_STRING_END_RE = re.compile(rb'["\\]')
+_WHITESPACE = b" \t\r\n"
+
+
+class NDJSONDecoder:
+    """Decodes newline delimited JSON, one record per non-blank line.
+
+    :param callable loads: Decodes a single record from `bytes`
+    """
+
+    def __init__(self, loads=json.loads):
+        self._loads = loads
+        self._buffer = bytearray()
+
+    def feed(self, chunk):
+        """Consumes `chunk`, and returns the records it completed."""
+        self._buffer += chunk
+        end = self._buffer.rfind(b"\n")
+        if end < 0:
+            return []
+
+        lines = self._buffer[:end].split(b"\n")
+        del self._buffer[: end + 1]
+        return [self._loads(line) for line in lines if line.strip()]
+
+    def close(self):
+        """Returns the record on the last (unterminated) line, if any."""
+        line, self._buffer = bytes(self._buffer), bytearray()
+        return [self._loads(line)] if line.strip() else []
+
+
+class JSONArrayDecoder:
+    """Decodes the elements of a top-level JSON array, one at a time.
+
+    The body is scanned (once) for the commas that separate elements at the
+    top level of the array; every complete element is then decoded on its
+    own.
+
+    :param callable loads: Decodes a single record from `bytes`
+    """
+
+    def __init__(self, loads=json.loads):
+        self._loads = loads
+        self._buffer = bytearray()
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._started = False
+        self._finished = False
+
+    def _emit(self, records, end):
+        element = bytes(self._buffer[:end])
+        if element.strip(_WHITESPACE):
+            records.append(self._loads(element))
+        del self._buffer[: end + 1]
+        self._pos = 0
+
+    def feed(self, chunk):
+        """Consumes `chunk`, and returns the records it completed."""
+        if self._finished:
+            if chunk.strip(_WHITESPACE):
+                raise ValueError("Unexpected data after the end of the JSON array")
+            return []
+
+        self._buffer += chunk
+        records = []
+
+        if not self._started:
+            stripped = self._buffer.lstrip(_WHITESPACE)
+            if not stripped:
+                return records
+            if stripped[:1] != b"[":
+                raise ValueError("Streamed JSON body is not an array")
+            self._buffer = bytearray(stripped[1:])
+            self._started = True
+
+        buffer = self._buffer
+        while True:
+            if self._in_string:
+                match = _STRING_END_RE.search(buffer, self._pos)
+                if match is None:
+                    self._pos = len(buffer)
+                    break
+                if match.group() == b"\\":
+                    if match.end() >= len(buffer):
+                        # Wait for the escaped character
+                        self._pos = match.start()
+                        break
+                    self._pos = match.end() + 1
+                    continue
+                self._in_string = False
+                self._pos = match.end()
+                continue
+
+            match = _STRUCTURAL_RE.search(buffer, self._pos)
+            if match is None:
+                self._pos = len(buffer)
+                break
+
+            char = match.group()
+            self._pos = match.end()
+            if char == b'"':
+                self._in_string = True
+            elif char in (b"[", b"{"):
+                self._depth += 1
+            elif self._depth:
+                if char in (b"]", b"}"):
+                    self._depth -= 1
+            elif char == b",":
+                self._emit(records, match.start())
+                buffer = self._buffer
+            elif char == b"]":
+                self._emit(records, match.start())
+                self._finished = True
+                if self._buffer.strip(_WHITESPACE):
+                    raise ValueError("Unexpected data after the end of the JSON array")
+                break
+            else:
+                raise ValueError("Unbalanced JSON array")
+
+        return records
+
+    def close(self):
+        """Checks that the array was complete.
+
+        :raises ValueError: if the body ended in the middle of the array
+        """
+        if self._started and not self._finished:
+            raise ValueError("Streamed JSON array is truncated")
+        return []
+
+
+class AutoDecoder:
+    """Picks :class:`JSONArrayDecoder` or :class:`NDJSONDecoder` from the body.
+
+    A body starting with `[` is decoded as an array, anything else as NDJSON.
+    """
+
+    def __init__(self, loads=json.loads):
+        self._loads = loads
+        self._decoder = None
+        self._pending = b""
+
+    def feed(self, chunk):
+        """Consumes `chunk`, and returns the records it completed."""
+        if self._decoder is None:
+            self._pending += chunk
+            stripped = self._pending.lstrip(_WHITESPACE)
+            if not stripped:
+                return []
+            if stripped[:1] == b"[":
+                self._decoder = JSONArrayDecoder(self._loads)
+            else:
+                self._decoder = NDJSONDecoder(self._loads)
+            chunk, self._pending = self._pending, b""
+        return self._decoder.feed(chunk)
+
+    def close(self):
+        """Returns whatever records the body still held."""
+        if self._decoder is None:
+            return []
+        return self._decoder.close()
+
+
+_DECODERS = {AUTO: AutoDecoder, ARRAY: JSONArrayDecoder, NDJSON: NDJSONDecoder}
+
+
+def decoder(fmt=AUTO, loads=json.loads):
+    """Returns a new incremental decoder for `fmt`.
+
+    :param str fmt: `auto`, `array` or `ndjson`
+    :param callable loads: Decodes a single record from `bytes`
+    """
+    try:
+        return _DECODERS[fmt](loads)
+    except KeyError:
+        raise exceptions.InvalidOptions(f"Unknown stream format: {fmt}") from None
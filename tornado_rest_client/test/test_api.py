@@ -1,10 +1,33 @@
 """Tests for the actors.base package."""
 
+import asyncio
+import dataclasses
+import gzip
+import inspect
+import io
+import json
+import unittest
+
 import mock
 
-from tornado import gen, httpclient, testing
+from tornado import gen, httpclient, httputil, simple_httpclient, testing, web
+from tornado.concurrent import Future
 
-from tornado_rest_client import api, exceptions
+from tornado_rest_client import (
+    api,
+    backoff,
+    bulkhead,
+    cache,
+    compress,
+    circuit,
+    diagnostics,
+    exceptions,
+    hedge,
+    metrics,
+    ratelimit,
+    tracing,
+    uploads,
+)
 
 
 @gen.coroutine
@@ -57,6 +80,15 @@ class RestConsumerTest(api.RestConsumer):
                 "new": True,
                 "http_methods": {"get": {}},
             },
+            "test_rate_limited": {
+                "path": "/test/limited",
+                "rate_limit": {"rate": 1, "burst": 2},
+                "http_methods": {
+                    "get": {},
+                    "post": {},
+                    "put": {"rate_limit": {"rate": 5}},
+                },
+            },
         }
     }
     ENDPOINT = "http://unittest.com"
@@ -118,6 +150,186 @@ class TestRetry(testing.AsyncTestCase):
 
         self.assertEqual(fail._call_count, 7)
 
+    @testing.gen_test
+    async def test_decorator_native_coroutine(self):
+        class TestException(Exception):
+            pass
+
+        class FailingClass:
+            """Test class that is intended for @retry decorator"""
+
+            EXCEPTIONS = {TestException: {"cruel": None}}  # Retry during cruelty
+
+            _call_count = 0
+
+            @api.retry(delay=0, retries=4)
+            async def func(self):
+                self._call_count = self._call_count + 1
+                if self._call_count < 4:
+                    raise TestException("Goodbye cruel world...")
+                return self._call_count
+
+        fail = FailingClass()
+        self.assertTrue(inspect.iscoroutinefunction(FailingClass.func))
+        self.assertEqual(await fail.func(), 4)
+
+    @testing.gen_test
+    def test_decorator_legacy_shim_returns_value(self):
+        class PassingClass:
+            EXCEPTIONS = {}
+
+            @gen.coroutine
+            @api.retry
+            def func(self, value):
+                raise gen.Return(value)
+
+        ret = yield PassingClass().func("foo")
+        self.assertEqual(ret, "foo")
+
+    @testing.gen_test
+    async def test_retry_is_described_only_when_it_happens(self):
+        class TestException(Exception):
+            pass
+
+        class FlakyClass:
+            EXCEPTIONS = {TestException: {"cruel": None}}
+            _private_kwargs = ["password"]
+
+            def __init__(self):
+                self.trace = mock.MagicMock(name="trace")
+                self.calls = 0
+
+            @api.retry(delay=0)
+            async def func(self, **kwargs):
+                self.calls += 1
+                if self.calls < 2:
+                    raise TestException("Goodbye cruel world...")
+                return self.calls
+
+        flaky = FlakyClass()
+        with mock.patch.object(api, "_safe_kwargs", wraps=api._safe_kwargs) as safe:
+            self.assertEqual(await flaky.func(user="bob", password="hunter2"), 2)
+            self.assertEqual(await flaky.func(), 3)
+        safe.assert_called_once_with(flaky, {"user": "bob", "password": "hunter2"})
+
+        flaky.trace.emit.assert_called_once_with(
+            "retry",
+            call="TestRetry.test_retry_is_described_only_when_it_happens."
+            "<locals>.FlakyClass.func",
+            attempt=1,
+            error=mock.ANY,
+            wait=0,
+            kwargs={"user": "bob", "password": "****"},
+        )
+
+    @testing.gen_test
+    async def test_retry_quiet_without_listeners(self):
+        class TestException(Exception):
+            pass
+
+        class FlakyClass:
+            EXCEPTIONS = {TestException: {"cruel": None}}
+            calls = 0
+
+            @api.retry(delay=0)
+            async def func(self, **kwargs):
+                self.calls += 1
+                if self.calls < 2:
+                    raise TestException("Goodbye cruel world...")
+
+        with mock.patch.object(api, "_safe_kwargs") as safe:
+            with mock.patch.object(api.log, "isEnabledFor", return_value=False):
+                await FlakyClass().func(password="hunter2")
+        safe.assert_not_called()
+
+
+class TestExceptionMatcher(unittest.TestCase):
+    def setUp(self):
+        self.matcher = api.ExceptionMatcher(
+            {
+                httpclient.HTTPError: {
+                    "401": exceptions.InvalidCredentials,
+                    429: None,
+                    "50x": None,
+                    "599": None,
+                    range(400, 410): exceptions.InvalidOptions,
+                    "Bad Gateway": exceptions.UnrecoverableFailure,
+                    "": exceptions.RecoverableFailure,
+                },
+                ValueError: {"cruel": None, "500": exceptions.InvalidOptions},
+            }
+        )
+
+    def test_exact_codes(self):
+        match = self.matcher.match
+        self.assertEqual(match(httpclient.HTTPError(401)), (exceptions.InvalidCredentials, False))
+        self.assertEqual(match(httpclient.HTTPError(429)), (None, False))
+
+    def test_code_ranges(self):
+        match = self.matcher.match
+        self.assertEqual(match(httpclient.HTTPError(503)), (None, False))
+        self.assertEqual(match(httpclient.HTTPError(404)), (exceptions.InvalidOptions, False))
+
+    def test_codes_do_not_match_on_message(self):
+        exc = httpclient.HTTPError(418, "Resource 503 is a teapot")
+        self.assertEqual(self.matcher.match(exc), (exceptions.RecoverableFailure, True))
+
+    def test_message_keys_still_match(self):
+        exc = httpclient.HTTPError(520, "Bad Gateway")
+        self.assertEqual(self.matcher.match(exc), (exceptions.UnrecoverableFailure, False))
+
+    def test_subclasses_match_through_mro(self):
+        exc = simple_httpclient.HTTPTimeoutError("Timeout while connecting")
+        self.assertEqual(self.matcher.match(exc), (None, False))
+
+    def test_codeless_exceptions_match_on_message(self):
+        match = self.matcher.match
+        self.assertEqual(match(ValueError("cruel world")), (None, False))
+        self.assertEqual(match(ValueError("HTTP 500")), (exceptions.InvalidOptions, False))
+        self.assertEqual(match(ValueError("nope")), (api.RERAISE, True))
+
+    def test_unconfigured_exception(self):
+        self.assertEqual(self.matcher.match(KeyError()), (api.RERAISE, False))
+
+    def test_compile_is_cached(self):
+        config = {ValueError: {}}
+        self.assertIs(api.compile_exceptions(config), api.compile_exceptions(config))
+        self.assertEqual(api.compile_exceptions(config).catch, (ValueError,))
+
+    def test_first_matching_key_wins(self):
+        exc = httpclient.HTTPError(503, "Service Unavailable")
+        matcher = api.ExceptionMatcher(
+            {
+                httpclient.HTTPError: {
+                    "Unavailable": exceptions.InvalidOptions,
+                    "5xx": None,
+                    "": exceptions.RecoverableFailure,
+                }
+            }
+        )
+        self.assertEqual(matcher.match(exc), (exceptions.InvalidOptions, False))
+
+        matcher = api.ExceptionMatcher(
+            {
+                httpclient.HTTPError: {
+                    "503": None,
+                    "Unavailable": exceptions.InvalidOptions,
+                }
+            }
+        )
+        self.assertEqual(matcher.match(exc), (None, False))
+        self.assertEqual(
+            matcher.match(httpclient.HTTPError(502, "Unavailable")),
+            (exceptions.InvalidOptions, False),
+        )
+
+    def test_compile_cache_is_bounded(self):
+        with mock.patch.object(api, "_MAX_EXCEPTION_MATCHERS", 10):
+            for _ in range(25):
+                config = {ValueError: {}}
+                self.assertIs(api.compile_exceptions(config).config, config)
+            self.assertLessEqual(len(api._EXCEPTION_MATCHERS), 10)
+
 
 class TestRestConsumer(testing.AsyncTestCase):
     @testing.gen_test
@@ -126,6 +338,37 @@ class TestRestConsumer(testing.AsyncTestCase):
         self.assertEqual(test_consumer.__repr__(), "RestConsumerTest(None)")
         self.assertEqual(test_consumer.testA().__repr__(), "RestConsumerTest(/testA)")
 
+    def test_compiled_class_is_cached(self):
+        client = RestClientTest()
+        first = RestConsumerTest(client=client)
+        second = RestConsumerTest(client=client)
+        self.assertIs(type(first), type(second))
+        self.assertIsInstance(first, RestConsumerTest)
+        self.assertIs(type(first.testA()), type(second.testA()))
+        self.assertIsNot(type(first), type(first.testA()))
+
+        # The access methods live on the class, not on every instance
+        child = first.testA()
+        self.assertNotIn("http_get", child.__dict__)
+        self.assertNotIn("testA", first.__dict__)
+        self.assertTrue(hasattr(child, "http_post"))
+        self.assertFalse(hasattr(first, "http_get"))
+
+    def test_compiled_classes_are_bounded(self):
+        client = RestClientTest()
+        with mock.patch.object(api, "_MAX_COMPILED_CONSUMERS", 10):
+            for i in range(25):
+                config = {"path": f"/{i}", "http_methods": {"get": {}}}
+                consumer = api.RestConsumer(config=config, client=client)
+                self.assertIs(type(consumer)._compiled_config, config)
+            self.assertLessEqual(len(api._COMPILED_CONSUMERS), 10)
+
+    def test_new_style_property_is_cached_on_instance(self):
+        test_consumer = RestConsumerTest(client=RestClientTest())
+        ret = test_consumer.test_path_with_new_access_type
+        self.assertIs(ret, test_consumer.test_path_with_new_access_type)
+        self.assertIn("test_path_with_new_access_type", test_consumer.__dict__)
+
     @testing.gen_test
     def test_replace_path_tokens(self):
         test_consumer = RestConsumerTest(client=RestClientTest())
@@ -138,15 +381,17 @@ class TestRestConsumer(testing.AsyncTestCase):
         ret = test_consumer.test_path_with_res(res="abcd")
         self.assertEqual(str(ret), "/test/abcd/info")
 
+        # values are escaped into a single path segment
+        ret = test_consumer.test_path_with_res(res="a b/c")
+        self.assertEqual(str(ret), "/test/a%20b%2Fc/info")
+
     @testing.gen_test
     def test_new_style_path_with_property_access(self):
         test_consumer = RestConsumerTest(client=RestClientTest())
 
         # the path with an arg must exist as an access method, and fail if you
         # don't supply the arg.
-        self.assertFalse(
-            callable(test_consumer.test_path_with_new_access_type_with_res)
-        )
+        self.assertFalse(callable(test_consumer.test_path_with_new_access_type_with_res))
 
         # with arg, it should pass
         ret = test_consumer.test_path_with_new_access_type
@@ -184,6 +429,111 @@ class TestRestConsumer(testing.AsyncTestCase):
         with self.assertRaises(exceptions.InvalidOptions):
             yield test_consumer.testA().http_get("foo")
 
+    @testing.gen_test
+    async def test_http_method_get_awaitable(self):
+        test_consumer = RestConsumerTest(client=RestClientTest())
+        ret = await test_consumer.testA().http_get(foo="bar")
+        self.assertEqual(ret["params"], {"foo": "bar"})
+
+    def test_rate_limit_compiled_per_node(self):
+        first = RestConsumerTest(client=RestClientTest()).test_rate_limited()
+        second = RestConsumerTest(client=RestClientTest()).test_rate_limited()
+        limiter = first.http_get.rate_limiter
+        self.assertIsInstance(limiter, ratelimit.RateLimit)
+        self.assertEqual((limiter.rate, limiter.burst), (1.0, 2))
+
+        # Shared by every consumer, and every method of the node...
+        self.assertIs(second.http_get.rate_limiter, limiter)
+        self.assertIs(first.http_post.rate_limiter, limiter)
+
+        # ... unless the method has its own
+        self.assertEqual(first.http_put.rate_limiter.rate, 5.0)
+        self.assertEqual(RestConsumerTest().testA().http_get.rate_limiter, None)
+
+    @testing.gen_test
+    async def test_batch(self):
+        rest_consumer = RestConsumerTest(client=RestClientTest())
+        results = [
+            result
+            async for result in rest_consumer.batch(
+                lambda **kwargs: rest_consumer.test_path_with_res(**kwargs).http_get(),
+                ({"res": res} for res in ("a", "b", "c")),
+                concurrency=2,
+            )
+        ]
+        self.assertEqual(
+            [r.result["url"] for r in results],
+            [f"http://unittest.com/test/{res}/info" for res in "abc"],
+        )
+
+        testA = rest_consumer.testA()
+        results = [r async for r in testA.batch("http_get", [{"foo": 1}, {"foo": 2}])]
+        self.assertEqual([r.result["params"] for r in results], [{"foo": 1}, {"foo": 2}])
+
+    def rate_limited_client(self, *responses):
+        """Returns a RestClient whose HTTP client answers with `responses`."""
+        client = api.RestClient()
+        client._client = mock.MagicMock(name="http_client")
+        client._client.fetch.side_effect = [
+            r if isinstance(r, Exception) else tornado_value(r) for r in responses
+        ]
+        return client
+
+    @testing.gen_test
+    async def test_rate_limited_method_waits_for_token(self):
+        response = mock.MagicMock(code=200, body=b"{}", time_info=None)
+        client = self.rate_limited_client(*[response] * 5)
+        consumer = RestConsumerTest(client=client).test_rate_limited()
+        bucket = client.rate_limiter(consumer.http_put.rate_limiter)
+        self.assertIs(client.rate_limiter(consumer.http_put.rate_limiter), bucket)
+        sleeps = []
+        with mock.patch.object(
+            bucket, "sleep", side_effect=lambda s: sleeps.append(s) or tornado_value()
+        ):
+            for _ in range(3):
+                ret = await consumer.http_put(foo="bar")
+        self.assertEqual(ret, {})
+        self.assertEqual(len(sleeps), 2)
+
+        # Another client (ie, with other credentials) has a bucket of its own
+        other = self.rate_limited_client(*[response] * 2)
+        other_bucket = other.rate_limiter(consumer.http_put.rate_limiter)
+        self.assertIsNot(other_bucket, bucket)
+        consumer = RestConsumerTest(client=other).test_rate_limited()
+        with mock.patch.object(other_bucket, "sleep") as sleep:
+            await consumer.http_put(foo="bar")
+        sleep.assert_not_called()
+
+    @testing.gen_test
+    async def test_rate_limited_retries_take_a_token(self):
+        response = mock.MagicMock(code=200, body=b"{}", time_info=None)
+        client = self.rate_limited_client(
+            httpclient.HTTPError(503), httpclient.HTTPError(503), response
+        )
+        consumer = RestConsumerTest(client=client).test_rate_limited()
+        bucket = client.rate_limiter(consumer.http_get.rate_limiter)
+        with mock.patch.object(bucket, "acquire", side_effect=lambda: tornado_value()) as acquire:
+            with mock.patch.object(gen, "sleep", return_value=tornado_value()):
+                self.assertEqual(await consumer.http_get(), {})
+        self.assertEqual(acquire.call_count, 3)
+
+    @testing.gen_test
+    async def test_rate_limited_method_pauses_on_retry_after(self):
+        client = api.RestClient()
+        client._client = mock.MagicMock(name="http_client")
+        response = httpclient.HTTPResponse(
+            httpclient.HTTPRequest("http://foo.com"),
+            429,
+            headers=httputil.HTTPHeaders({"Retry-After": "30"}),
+        )
+        client._client.fetch.side_effect = httpclient.HTTPError(429, response=response)
+        consumer = RestConsumerTest(client=client).test_rate_limited()
+        bucket = client.rate_limiter(consumer.http_get.rate_limiter)
+        with mock.patch.object(bucket, "pause") as pause:
+            with self.assertRaises(exceptions.RecoverableFailure):
+                await consumer.http_get()
+        pause.assert_called_once_with(30.0)
+
     @testing.gen_test
     def test_http_method_post(self):
         test_consumer = RestConsumerTest(client=RestClientTest())
@@ -223,16 +573,169 @@ class TestRestConsumer(testing.AsyncTestCase):
             yield test_consumer.testA().http_get("bar")
 
 
+class PreparedConsumer(api.RestConsumer):
+
+    ENDPOINT = "http://prepared"
+    CONFIG = {
+        "auth": {"user": "username", "pass": "password"},
+        "attrs": {
+            "items": {
+                "path": "/items",
+                "headers": {"Accept": "application/json", "X-Node": "items"},
+                "timeout": 5,
+                "http_methods": {
+                    "get": {"pagination": {"type": "page"}},
+                    "post": {"headers": {"X-Node": "post"}, "timeout": 30},
+                },
+            },
+            "plain": {"path": "/plain", "http_methods": {"delete": {}}},
+        },
+    }
+
+
+class FormattedConsumer(api.RestConsumer):
+
+    ENDPOINT = "http://formatted"
+    CONFIG = {
+        "attrs": {
+            "export": {
+                "path": "/export",
+                "response_format": "bytes",
+                "http_methods": {"get": {}, "post": {"response_format": "auto"}},
+            },
+        },
+    }
+
+
+class TestPreparedEndpoint(testing.AsyncTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = mock.MagicMock(name="client")
+        self.client.fetch.side_effect = lambda **kwargs: tornado_value([])
+        self.consumer = PreparedConsumer(client=self.client)
+
+    def test_endpoint(self):
+        endpoint = api.PreparedEndpoint("get", auth={"user": "u", "pass": "p"}, timeout=0)
+        self.assertEqual(endpoint.method, "GET")
+        self.assertEqual((endpoint.auth_username, endpoint.auth_password), ("u", "p"))
+        self.assertEqual(endpoint.options, {"timeout": 0})
+        self.assertEqual(api.PreparedEndpoint("put").options, {})
+
+    def test_compiled_once_per_node(self):
+        first = self.consumer.items().http_get.endpoint
+        self.assertIs(first, self.consumer.items().http_get.endpoint)
+        self.assertIs(first, self.consumer.items().iter_get.endpoint)
+        self.assertIs(first, self.consumer.items().stream_get.endpoint)
+
+    @testing.gen_test
+    async def test_node_options(self):
+        await self.consumer.items().http_get(q="x")
+        self.client.fetch.assert_called_once_with(
+            url="http://prepared/items",
+            method="GET",
+            params={"q": "x"},
+            auth_username="username",
+            auth_password="password",
+            headers={"Accept": "application/json", "X-Node": "items"},
+            timeout=5,
+        )
+
+    @testing.gen_test
+    async def test_method_options(self):
+        await self.consumer.items().http_post()
+        kwargs = self.client.fetch.call_args[1]
+        self.assertEqual(kwargs["headers"], {"Accept": "application/json", "X-Node": "post"})
+        self.assertEqual(kwargs["timeout"], 30)
+
+    @testing.gen_test
+    async def test_iter_options(self):
+        async for _ in self.consumer.items().iter_get():
+            pass
+        kwargs = self.client.fetch.call_args[1]
+        self.assertEqual(kwargs["method"], "GET")
+        self.assertEqual(kwargs["timeout"], 5)
+        self.assertEqual(kwargs["auth_username"], "username")
+
+    @testing.gen_test
+    async def test_response_format(self):
+        consumer = FormattedConsumer(client=self.client).export()
+        await consumer.http_get()
+        self.assertEqual(self.client.fetch.call_args[1]["response_format"], "bytes")
+        await consumer.http_post()
+        self.assertEqual(self.client.fetch.call_args[1]["response_format"], "auto")
+        # Streams decode their own records
+        self.assertNotIn("response_format", consumer.stream_get.endpoint.options)
+
+    def test_invalid_response_format(self):
+        for method_config in (
+            {"response_format": "xml"},
+            {"response_format": "bytes", "response_model": Member},
+            {"response_format": "text", "pagination": {"type": "page"}},
+        ):
+            with self.subTest(**method_config):
+
+                class Consumer(api.RestConsumer):
+                    CONFIG = {"path": "/", "http_methods": {"get": method_config}}
+
+                with self.assertRaises(exceptions.InvalidOptions):
+                    Consumer(client=self.client)
+
+    @testing.gen_test
+    async def test_no_options(self):
+        await self.consumer.plain().http_delete()
+        self.assertNotIn("headers", self.client.fetch.call_args[1])
+        self.assertNotIn("timeout", self.client.fetch.call_args[1])
+
+
 class TestRestClient(testing.AsyncTestCase):
     def setUp(self, *args, **kwargs):
         super(TestRestClient, self).setUp()
         self.client = api.RestClient()
         self.http_response_mock = mock.MagicMock(name="response")
         self.http_client_mock = mock.MagicMock(name="http_client")
-        self.http_client_mock.fetch.return_value = tornado_value(
+        self.http_client_mock.fetch.return_value = tornado_value(self.http_response_mock)
+        self.client._client = self.http_client_mock
+
+    @testing.gen_test
+    async def test_fetch_traces_sampled_requests(self):
+        events = []
+        self.client.trace = diagnostics.TraceHook(
+            lambda event, **fields: events.append((event, fields))
+        )
+        self.http_response_mock.code = 200
+        self.http_response_mock.body = b"{}"
+        self.http_response_mock.headers = {}
+        self.http_client_mock.fetch.side_effect = lambda request: tornado_value(
             self.http_response_mock
         )
-        self.client._client = self.http_client_mock
+        await self.client.fetch(url="http://foo.com/api", method="GET", params={"token": "secret"})
+
+        self.assertEqual(len(events), 1)
+        event, fields = events[0]
+        self.assertEqual(event, "request")
+        self.assertEqual(fields["method"], "GET")
+        self.assertEqual(fields["url"], "http://foo.com/api")
+        self.assertEqual(fields["status"], 200)
+        self.assertEqual(fields["response_bytes"], 2)
+        self.assertIsNone(fields["error"])
+        self.assertGreaterEqual(fields["duration"], 0)
+
+        # Unsampled requests are not traced
+        self.client.trace.sample_rate = 0.0
+        await self.client.fetch(url="http://foo.com/api", method="GET")
+        self.assertEqual(len(events), 1)
+
+    @testing.gen_test
+    async def test_fetch_traces_failed_requests(self):
+        events = []
+        self.client.trace = diagnostics.TraceHook(
+            lambda event, **fields: events.append((event, fields))
+        )
+        self.http_client_mock.fetch.side_effect = exceptions.CircuitOpen("open")
+        with self.assertRaises(exceptions.CircuitOpen):
+            await self.client.fetch(url="http://foo.com/api", method="GET")
+        self.assertEqual(events[0][1]["status"], None)
+        self.assertIsInstance(events[0][1]["error"], exceptions.CircuitOpen)
 
     def test_init_content_type(self):
         client = api.RestClient(json=True)
@@ -244,14 +747,16 @@ class TestRestClient(testing.AsyncTestCase):
         self.assertEqual("http://unittest?foo=bar", result)
         result = self.client._generate_escaped_url("http://unittest", {"foo": True})
         self.assertEqual("http://unittest?foo=true", result)
-        result = self.client._generate_escaped_url(
-            "http://unittest", {"foo": "bar", "xyz": "abc"}
-        )
+        result = self.client._generate_escaped_url("http://unittest", {"foo": "bar", "xyz": "abc"})
         self.assertEqual("http://unittest?foo=bar&xyz=abc", result)
         result = self.client._generate_escaped_url(
             "http://unittest", {"foo": "bar baz", "xyz": "abc"}
         )
         self.assertEqual("http://unittest?foo=bar+baz&xyz=abc", result)
+        result = self.client._generate_escaped_url(
+            "http://unittest", {"foo": 0, "bar": "", "baz": None, "id": [1, 2]}
+        )
+        self.assertEqual("http://unittest?bar=&foo=0&id=1&id=2", result)
 
     @testing.gen_test
     def test_fetch_post_with_args(self):
@@ -272,6 +777,23 @@ class TestRestClient(testing.AsyncTestCase):
         self.assertEqual({"foo": "bar"}, ret)
         self.http_client_mock.fetch.assert_called_once()
 
+    @testing.gen_test
+    def test_fetch_uses_client_codec(self):
+        self.client = api.RestClient(client=self.http_client_mock, codec="stdlib")
+        self.client.JSON_BODY = True
+        self.http_response_mock.body = b"not json"
+        ret = yield self.client.fetch(url="http://foo.com", method="POST", params={})
+        self.assertEqual(b"not json", ret)
+
+        codec = mock.MagicMock(name="codec", decode_errors=(ValueError,))
+        codec.dumps.return_value = b"{}"
+        codec.loads.return_value = {"decoded": True}
+        self.client.codec = codec
+        ret = yield self.client.fetch(url="http://foo.com", method="POST", params={"foo": "bar"})
+        self.assertEqual({"decoded": True}, ret)
+        codec.dumps.assert_called_once_with({"foo": "bar"})
+        codec.loads.assert_called_once_with(b"not json")
+
     @testing.gen_test
     def test_fetch_get_with_args(self):
         self.http_response_mock.body = '{"foo": "bar"}'
@@ -335,6 +857,290 @@ class TestRestClient(testing.AsyncTestCase):
                 auth_password="pass",
             )
 
+    @testing.gen_test
+    def test_fetch_500_sleeps_with_backoff_policy(self):
+        response = httpclient.HTTPResponse(
+            httpclient.HTTPRequest("http://foo.com"),
+            503,
+            headers=httputil.HTTPHeaders({"Retry-After": "2"}),
+        )
+        e = httpclient.HTTPError(503, "Failure", response=response)
+        self.http_client_mock.fetch.side_effect = e
+        self.client.BACKOFF = backoff.ConstantBackoff(0.5, cap=1.5)
+        with mock.patch.object(gen, "sleep", return_value=tornado_value()) as sleep:
+            with self.assertRaises(httpclient.HTTPError):
+                yield self.client.fetch(url="http://foo.com", method="GET")
+        self.assertEqual(sleep.call_args_list, [mock.call(1.5), mock.call(1.5)])
+
+    @testing.gen_test
+    def test_fetch_timeout_subclass_is_retried(self):
+        e = simple_httpclient.HTTPTimeoutError("Timeout while connecting")
+        self.http_client_mock.fetch.side_effect = e
+        with mock.patch.object(gen, "sleep", return_value=tornado_value()):
+            with self.assertRaises(simple_httpclient.HTTPTimeoutError):
+                yield self.client.fetch(url="http://foo.com", method="GET")
+        self.assertEqual(3, len(self.http_client_mock.method_calls))
+
+    @testing.gen_test
+    def test_fetch_fails_fast_with_open_circuit(self):
+        self.client.circuit_breakers = circuit.CircuitBreakers(failure_threshold=2)
+        e = httpclient.HTTPError(500, "Failure")
+        self.http_client_mock.fetch.side_effect = e
+        with mock.patch.object(gen, "sleep", return_value=tornado_value()):
+            with self.assertRaises(exceptions.CircuitOpen):
+                yield self.client.fetch(url="http://foo.com", method="GET")
+            self.assertEqual(2, len(self.http_client_mock.method_calls))
+
+            with self.assertRaises(exceptions.CircuitOpen):
+                yield self.client.fetch(url="http://foo.com", method="GET")
+            self.assertEqual(2, len(self.http_client_mock.method_calls))
+
+        self.assertEqual(self.client.circuit_breakers.states(), {"foo.com": "open"})
+
+    @testing.gen_test
+    async def test_fetch_limited_by_bulkhead(self):
+        self.client.bulkheads = bulkhead.Bulkheads(per_endpoint=1)
+        self.http_response_mock.body = b"{}"
+        pending = Future()
+        self.http_client_mock.fetch.return_value = pending
+
+        first = asyncio.ensure_future(self.client.fetch(url="http://foo.com/a", method="GET"))
+        second = asyncio.ensure_future(self.client.fetch(url="http://foo.com/b", method="GET"))
+        await asyncio.sleep(0)
+        self.http_client_mock.fetch.assert_called_once()
+        self.assertEqual(self.client.bulkheads.stats()["foo.com"]["waiting"], 1)
+
+        self.http_client_mock.fetch.return_value = tornado_value(self.http_response_mock)
+        pending.set_result(self.http_response_mock)
+        await asyncio.gather(first, second)
+        self.assertEqual(2, self.http_client_mock.fetch.call_count)
+        self.assertEqual(self.client.bulkheads.stats()["foo.com"]["active"], 0)
+
+    @testing.gen_test
+    def test_fetch_get_served_from_cache(self):
+        self.client.cache = cache.LRUCache()
+        self.http_response_mock.code = 200
+        self.http_response_mock.body = b'{"foo": "bar"}'
+        self.http_response_mock.headers = httputil.HTTPHeaders({"Cache-Control": "max-age=60"})
+        for _ in range(3):
+            ret = yield self.client.fetch(
+                url="http://foo.com", method="GET", params={"b": 1, "a": 2}
+            )
+            self.assertEqual({"foo": "bar"}, ret)
+        self.http_client_mock.fetch.assert_called_once()
+        self.assertEqual(self.client.cache.stats.hits, 2)
+
+        # Other users, and other methods, are not served from the cache
+        yield self.client.fetch(
+            url="http://foo.com",
+            method="GET",
+            params={"b": 1, "a": 2},
+            auth_username="user",
+        )
+        yield self.client.fetch(url="http://foo.com", method="POST")
+        self.assertEqual(3, self.http_client_mock.fetch.call_count)
+
+    @testing.gen_test
+    async def test_fetch_get_cache_varies_on_headers(self):
+        self.client.cache = cache.LRUCache()
+        self.http_response_mock.code = 200
+        self.http_response_mock.body = b'{"foo": "bar"}'
+        self.http_response_mock.headers = httputil.HTTPHeaders({"Cache-Control": "max-age=60"})
+        for headers in (
+            None,
+            {"Authorization": "Bearer alice"},
+            {"Authorization": "Bearer bob"},
+            {"authorization": "Bearer bob"},
+            {"Accept": "text/csv"},
+        ):
+            await self.client.fetch(url="http://foo.com", method="GET", headers=headers)
+        # Header names are not case sensitive
+        self.assertEqual(4, self.http_client_mock.fetch.call_count)
+        self.assertEqual(self.client.cache.stats.hits, 1)
+
+    @testing.gen_test
+    async def test_fetch_get_coalesces_identical_requests(self):
+        self.client.coalesce = True
+        self.http_response_mock.body = b'{"foo": "bar"}'
+        pending = Future()
+        self.http_client_mock.fetch.return_value = pending
+
+        calls = [
+            self.client.fetch(url="http://foo.com", method="GET", params={"a": 1}) for _ in range(5)
+        ]
+        calls.append(
+            self.client.fetch(
+                url="http://foo.com", method="GET", params={"a": 1}, auth_username="u"
+            )
+        )
+        calls.append(self.client.fetch(url="http://foo.com", method="POST"))
+        waiters = asyncio.gather(*calls)
+        await asyncio.sleep(0)
+        pending.set_result(self.http_response_mock)
+        results = await waiters
+
+        # One request for the five identical GETs, plus the other user's and
+        # the POST. The identical GETs share the same decoded body.
+        self.assertEqual(3, self.http_client_mock.fetch.call_count)
+        self.assertEqual({"foo": "bar"}, results[0])
+        for result in results[1:5]:
+            self.assertIs(results[0], result)
+        self.assertEqual({}, self.client._in_flight)
+
+        # Once landed, the next call makes a new request
+        self.http_client_mock.fetch.return_value = tornado_value(self.http_response_mock)
+        result = await self.client.fetch(url="http://foo.com", method="GET", params={"a": 1})
+        self.assertIsNot(results[0], result)
+        self.assertEqual(4, self.http_client_mock.fetch.call_count)
+
+    @testing.gen_test
+    async def test_fetch_get_coalesce_varies_on_headers(self):
+        self.client.coalesce = True
+        self.http_response_mock.body = b'{"foo": "bar"}'
+        pending = Future()
+        self.http_client_mock.fetch.return_value = pending
+
+        calls = [
+            self.client.fetch(url="http://foo.com", method="GET", headers=headers)
+            for headers in (
+                {"Authorization": "Bearer alice"},
+                {"Authorization": "Bearer bob"},
+                {"Authorization": "Bearer bob"},
+                {"Accept": "text/csv"},
+            )
+        ]
+        waiters = asyncio.gather(*calls)
+        await asyncio.sleep(0)
+        pending.set_result(self.http_response_mock)
+        results = await waiters
+
+        # Only bob's two identical requests were shared
+        self.assertEqual(3, self.http_client_mock.fetch.call_count)
+        self.assertIs(results[1], results[2])
+        self.assertIsNot(results[0], results[1])
+
+    @testing.gen_test
+    async def test_fetch_get_coalesced_caller_cancellation(self):
+        self.client.coalesce = True
+        self.http_response_mock.body = b'{"foo": "bar"}'
+        pending = Future()
+        self.http_client_mock.fetch.return_value = pending
+
+        first = asyncio.ensure_future(self.client.fetch(url="http://foo.com", method="GET"))
+        second = asyncio.ensure_future(self.client.fetch(url="http://foo.com", method="GET"))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        pending.set_result(self.http_response_mock)
+
+        self.assertEqual({"foo": "bar"}, await second)
+        self.assertTrue(first.cancelled())
+        self.http_client_mock.fetch.assert_called_once()
+
+    @testing.gen_test
+    async def test_fetch_headers(self):
+        self.client.headers = {"Content-Type": "application/json", "X-A": "a"}
+        self.http_response_mock.body = b"{}"
+        await self.client.fetch(
+            url="http://foo.com", method="GET", headers={"X-A": "b", "X-B": "b"}
+        )
+        http_req = self.http_client_mock.fetch.call_args[0][0]
+        self.assertEqual(
+            dict(http_req.headers),
+            {"Content-Type": "application/json", "X-A": "b", "X-B": "b"},
+        )
+        self.assertEqual(self.client.headers["X-A"], "a")
+
+    @testing.gen_test
+    async def test_requests_are_built_from_templates(self):
+        self.http_response_mock.body = b"{}"
+        await self.client.fetch(url="http://foo.com", method="GET", auth_username="u", timeout=3)
+        await self.client.fetch(
+            url="http://foo.com/a", method="POST", params={"a": 1}, auth_username="u"
+        )
+        first, second = [call[0][0] for call in self.http_client_mock.fetch.call_args_list]
+        self.assertEqual((first.url, first.method), ("http://foo.com", "GET"))
+        self.assertEqual((first.request_timeout, first.connect_timeout), (3, 3))
+        self.assertEqual((second.url, second.method), ("http://foo.com/a", "POST"))
+        self.assertEqual(second.body, b"a=1")
+        self.assertIsNone(second.request_timeout)
+        self.assertEqual(second.auth_username, "u")
+        self.assertTrue(second.follow_redirects)
+        self.assertIsNot(first.headers, second.headers)
+        self.assertEqual(len(self.client._templates), 2)
+
+        # Changed client options take effect right away
+        self.client.decompress_response = False
+        await self.client.fetch(url="http://foo.com", method="GET")
+        third = self.http_client_mock.fetch.call_args[0][0]
+        self.assertFalse(third.decompress_response)
+
+    @testing.gen_test
+    async def test_fetch_response_format(self):
+        self.http_response_mock.code = 200
+        self.http_response_mock.body = b'{"foo": "bar"}'
+        self.http_response_mock.buffer = io.BytesIO(b'{"foo": "bar"}')
+        self.http_response_mock.headers = httputil.HTTPHeaders(
+            {"Content-Type": "text/plain; charset=utf-8"}
+        )
+        url = "http://foo.com"
+
+        with mock.patch.object(self.client.codec, "loads") as loads:
+            ret = await self.client.fetch(url=url, method="GET", response_format="bytes")
+            self.assertEqual(ret, b'{"foo": "bar"}')
+            ret = await self.client.fetch(url=url, method="GET", response_format="auto")
+            self.assertEqual(ret, '{"foo": "bar"}')
+            loads.assert_not_called()
+
+        ret = await self.client.fetch(url=url, method="GET", response_format="memoryview")
+        self.assertEqual(ret.tobytes(), b'{"foo": "bar"}')
+        ret.release()
+        # Responses without a buffer (ie, empty ones) get an empty view
+        self.http_response_mock.buffer = None
+        ret = await self.client.fetch(url=url, method="GET", response_format="memoryview")
+        self.assertEqual(ret.tobytes(), b"")
+        ret = await self.client.fetch(url=url, method="GET", response_format="json")
+        self.assertEqual(ret, {"foo": "bar"})
+
+        self.http_response_mock.body = b"<html>"
+        with self.assertRaises(exceptions.InvalidResponse):
+            await self.client.fetch(url=url, method="GET", response_format="json")
+        # Without a format, non-JSON bodies are still handed out as-is
+        self.assertEqual(await self.client.fetch(url=url, method="GET"), b"<html>")
+
+        with self.assertRaises(exceptions.InvalidOptions):
+            await self.client.fetch(url=url, method="GET", response_format="xml")
+
+    @testing.gen_test
+    async def test_fetch_response_format_from_cache(self):
+        self.client.cache = cache.LRUCache()
+        self.http_response_mock.code = 200
+        self.http_response_mock.body = b"a,b"
+        self.http_response_mock.headers = httputil.HTTPHeaders(
+            {"Content-Type": "text/csv", "Cache-Control": "max-age=60"}
+        )
+        await self.client.fetch(url="http://foo.com", method="GET")
+        ret = await self.client.fetch(url="http://foo.com", method="GET", response_format="auto")
+        self.assertEqual(ret, "a,b")
+        self.assertEqual(self.client.cache.stats.hits, 1)
+
+    @testing.gen_test
+    def test_fetch_get_revalidates_stale_cache_entry(self):
+        self.client.cache = cache.LRUCache()
+        self.http_response_mock.code = 200
+        self.http_response_mock.body = b'{"foo": "bar"}'
+        self.http_response_mock.headers = httputil.HTTPHeaders({"ETag": '"v1"'})
+        yield self.client.fetch(url="http://foo.com", method="GET")
+
+        not_modified = httpclient.HTTPResponse(httpclient.HTTPRequest("http://foo.com"), 304)
+        self.http_client_mock.fetch.side_effect = httpclient.HTTPError(304, response=not_modified)
+        ret = yield self.client.fetch(url="http://foo.com", method="GET")
+        self.assertEqual({"foo": "bar"}, ret)
+
+        http_req = self.http_client_mock.fetch.call_args[0][0]
+        self.assertEqual(http_req.headers["If-None-Match"], '"v1"')
+        self.assertEqual(self.client.cache.stats.revalidations, 1)
+
     @testing.gen_test
     def test_fetch_501_raises_recoverable(self):
         e = httpclient.HTTPError(501, "Failure")
@@ -343,15 +1149,856 @@ class TestRestClient(testing.AsyncTestCase):
             yield self.client.fetch(url="http://foo.com", method="GET")
 
 
+class RecordsHandler(web.RequestHandler):
+    """Streams a JSON array (or NDJSON) of records, a few at a time."""
+
+    failures = 0
+
+    async def get(self):
+        if RecordsHandler.failures:
+            RecordsHandler.failures -= 1
+            raise web.HTTPError(int(self.get_argument("fail_with", 503)))
+
+        count = int(self.get_argument("count", 100))
+        ndjson = self.get_argument("ndjson", "false") == "true"
+        self.write(b"" if ndjson else b"[")
+        for i in range(count):
+            record = json.dumps({"id": i, "token": self.get_argument("token", None)})
+            if ndjson:
+                self.write(f"{record}\n".encode())
+            else:
+                self.write(f"{',' if i else ''}{record}".encode())
+            if i % 10 == 9:
+                await self.flush()
+        self.write(b"" if ndjson else b"]")
+
+
+class StreamingConsumer(api.RestConsumer):
+
+    CONFIG = {"attrs": {"records": {"path": "/records", "http_methods": {"get": {}}}}}
+
+
+class TestRestClientStream(testing.AsyncHTTPTestCase):
+    def setUp(self):
+        super().setUp()
+        RecordsHandler.failures = 0
+        self.client = api.RestClient()
+
+    def get_app(self):
+        return web.Application([("/records", RecordsHandler)])
+
+    async def collect(self, records):
+        return [record async for record in records]
+
+    @testing.gen_test
+    async def test_stream_json_array(self):
+        records = await self.collect(
+            self.client.stream(self.get_url("/records"), params={"count": 95})
+        )
+        self.assertEqual([r["id"] for r in records], list(range(95)))
+
+    @testing.gen_test
+    async def test_stream_ndjson(self):
+        records = await self.collect(
+            self.client.stream(
+                self.get_url("/records"),
+                params={"count": 5, "ndjson": True},
+                fmt="ndjson",
+            )
+        )
+        self.assertEqual([r["id"] for r in records], list(range(5)))
+
+    @testing.gen_test
+    async def test_stream_stopped_early(self):
+        seen = []
+        async for record in self.client.stream(self.get_url("/records")):
+            seen.append(record["id"])
+            if len(seen) == 3:
+                break
+        self.assertEqual(seen, [0, 1, 2])
+
+    @testing.gen_test
+    async def test_stream_max_pending(self):
+        records = self.client.stream(
+            self.get_url("/records"), params={"count": 1000}, max_pending=15
+        )
+        seen = []
+        with self.assertRaises(exceptions.StreamOverflow):
+            async for record in records:
+                seen.append(record["id"])
+                # A slow caller, that lets the download run ahead
+                await asyncio.sleep(0.01)
+        self.assertLess(len(seen), 1000)
+
+        # Under the limit, everything comes through
+        records = await self.collect(
+            self.client.stream(self.get_url("/records"), params={"count": 95}, max_pending=100)
+        )
+        self.assertEqual(len(records), 95)
+
+    @testing.gen_test
+    async def test_stream_retries_before_first_record(self):
+        RecordsHandler.failures = 2
+        with mock.patch.object(gen, "sleep", return_value=tornado_value()):
+            records = await self.collect(
+                self.client.stream(self.get_url("/records"), params={"count": 3})
+            )
+        self.assertEqual(len(records), 3)
+
+    @testing.gen_test
+    async def test_stream_raises_configured_exception(self):
+        RecordsHandler.failures = 1
+        with self.assertRaises(exceptions.InvalidCredentials):
+            await self.collect(
+                self.client.stream(self.get_url("/records"), params={"fail_with": 401})
+            )
+
+    @testing.gen_test
+    async def test_consumer_stream_get(self):
+        token_client = api.SimpleTokenRestClient(tokens={"token": "abc"})
+        consumer = StreamingConsumer(client=token_client)
+        with mock.patch.object(StreamingConsumer, "ENDPOINT", self.get_url("")):
+            records = await self.collect(consumer.records().stream_get(count=12))
+        self.assertEqual([r["id"] for r in records], list(range(12)))
+        self.assertEqual({r["token"] for r in records}, {"abc"})
+
+
+class EchoSizeHandler(web.RequestHandler):
+    """Returns what it received, after decompressing it."""
+
+    def post(self, accepts):
+        encoding = self.request.headers.get("Content-Encoding")
+        if encoding and accepts == "plain":
+            raise web.HTTPError(415)
+        body = self.request.body
+        if encoding == "gzip":
+            body = gzip.decompress(body)
+        self.write({"encoding": encoding, "received": len(body), "pad": "x" * 2000})
+
+
+class TestRestClientCompression(testing.AsyncHTTPTestCase):
+    def get_app(self):
+        return web.Application([("/echo/(gzip|plain)", EchoSizeHandler)], compress_response=True)
+
+    @testing.gen_test
+    async def test_compressed_request_body(self):
+        client = api.RestClient(json=True, compression=compress.Compression(threshold=100))
+        params = {"records": [{"id": i} for i in range(100)]}
+        ret = await client.fetch(self.get_url("/echo/gzip"), "POST", params)
+        self.assertEqual(ret["encoding"], "gzip")
+        self.assertEqual(ret["received"], len(client.codec.dumps(params)))
+
+        stats = client.transfer_stats
+        self.assertEqual(stats.request_bytes, len(client.codec.dumps(params)))
+        self.assertLess(stats.request_wire_bytes, stats.request_bytes / 4)
+        # tornado asks for (and decompresses) a gzip response
+        self.assertLess(stats.response_wire_bytes, stats.response_bytes)
+
+        # Small bodies are sent as-is
+        ret = await client.fetch(self.get_url("/echo/gzip"), "POST", {"id": 1})
+        self.assertEqual(ret["encoding"], None)
+
+    @testing.gen_test
+    async def test_falls_back_when_not_accepted(self):
+        compression = compress.Compression(threshold=0)
+        client = api.RestClient(compression=compression)
+        params = {"a": "b" * 500}
+        for _ in range(2):
+            ret = await client.fetch(self.get_url("/echo/plain"), "POST", params)
+            self.assertEqual(ret["encoding"], None)
+
+        # The 415 is only seen once, the host then gets plain bodies
+        self.assertEqual(client.transfer_stats.requests, 3)
+
+    @testing.gen_test
+    async def test_decompress_response_disabled(self):
+        client = api.RestClient(decompress_response=False)
+        ret = await client.fetch(self.get_url("/echo/gzip"), "POST", {"a": 1})
+        self.assertEqual(ret["received"], 3)
+        self.assertEqual(
+            client.transfer_stats.response_bytes,
+            client.transfer_stats.response_wire_bytes,
+        )
+
+
+class PagesHandler(web.RequestHandler):
+    """Pages through 25 items, by cursor or with Link headers."""
+
+    total = 25
+
+    def get(self, style):
+        limit = int(self.get_argument("limit", 10))
+        start = int(self.get_argument("cursor", self.get_argument("start", 0)))
+        items = list(range(start, min(start + limit, self.total)))
+        end = start + len(items)
+        if style == "cursor":
+            self.write({"items": items, "meta": {"next": end < self.total and end}})
+            return
+
+        if end < self.total:
+            next_url = self.request.full_url().split("?")[0]
+            self.set_header(
+                "Link",
+                f'<{next_url}?start=0>; rel="first", '
+                f'<{next_url}?start={end}&limit={limit}>; rel="next"',
+            )
+        self.write(json.dumps(items))
+
+
+class PaginatedConsumer(api.RestConsumer):
+
+    CONFIG = {
+        "attrs": {
+            "by_cursor": {
+                "path": "/pages/cursor",
+                "http_methods": {
+                    "get": {
+                        "pagination": {
+                            "type": "cursor",
+                            "next": "meta.next",
+                            "items": "items",
+                        }
+                    }
+                },
+            },
+            "by_link": {
+                "path": "/pages/link",
+                "http_methods": {"get": {"pagination": {"type": "link"}}},
+            },
+            "by_page": {
+                "path": "/pages/numbered",
+                "http_methods": {"get": {"pagination": {"type": "page", "prefetch": 2}}},
+            },
+        }
+    }
+
+
+class TestRestConsumerPagination(testing.AsyncHTTPTestCase):
+    def setUp(self):
+        super().setUp()
+        PaginatedConsumer.ENDPOINT = self.get_url("")
+        self.consumer = PaginatedConsumer(client=api.RestClient())
+
+    def tearDown(self):
+        PaginatedConsumer.ENDPOINT = None
+        super().tearDown()
+
+    def get_app(self):
+        return web.Application([("/pages/(cursor|link)", PagesHandler)])
+
+    async def collect(self, items):
+        return [item async for item in items]
+
+    def test_generated_methods(self):
+        self.assertTrue(hasattr(self.consumer.by_cursor(), "iter_get"))
+        self.assertFalse(hasattr(self.consumer.by_cursor(), "iter_post"))
+        self.assertEqual(self.consumer.by_page().iter_get.paginator.prefetch, 2)
+
+    def test_invalid_config(self):
+        with self.assertRaises(exceptions.InvalidOptions):
+            api.RestConsumer(
+                config={
+                    "path": "/",
+                    "http_methods": {"get": {"pagination": {"type": "scroll"}}},
+                }
+            )
+
+    @testing.gen_test
+    async def test_iter_get_by_cursor(self):
+        items = await self.collect(self.consumer.by_cursor().iter_get(limit=10))
+        self.assertEqual(items, list(range(25)))
+
+    @testing.gen_test
+    async def test_iter_get_by_link(self):
+        items = await self.collect(self.consumer.by_link().iter_get(limit=7))
+        self.assertEqual(items, list(range(25)))
+
+    @testing.gen_test
+    async def test_iter_get_stopped_early(self):
+        seen = []
+        async for item in self.consumer.by_cursor().iter_get(limit=10):
+            seen.append(item)
+            if item == 12:
+                break
+        self.assertEqual(seen, list(range(13)))
+
+    @testing.gen_test
+    async def test_iter_get_prefetches_pages(self):
+        fetched = []
+
+        async def fetch(url, method, params, **kwargs):
+            fetched.append(params["page"])
+            return [] if params["page"] > 4 else [params["page"]] * 3
+
+        client = mock.MagicMock(name="client")
+        client.fetch.side_effect = fetch
+        consumer = PaginatedConsumer(client=client).by_page()
+
+        items = []
+        async for item in consumer.iter_get(limit=3):
+            items.append(item)
+            if len(items) == 1:
+                # While the first page is consumed, the next two are fetched
+                await asyncio.sleep(0)
+                self.assertEqual(fetched, [1, 2, 3])
+
+        self.assertEqual(items, [1, 1, 1, 2, 2, 2, 3, 3, 3, 4, 4, 4])
+        self.assertEqual(fetched, [1, 2, 3, 4, 5])
+
+    @testing.gen_test
+    async def test_iter_get_without_prefetch(self):
+        fetched = []
+
+        async def fetch(url, method, params, **kwargs):
+            fetched.append(params["page"])
+            return [] if params["page"] > 2 else [params["page"]]
+
+        client = mock.MagicMock(name="client")
+        client.fetch.side_effect = fetch
+        consumer = PaginatedConsumer(client=client).by_page()
+
+        async for item in consumer.iter_get(prefetch=0):
+            await asyncio.sleep(0)
+            self.assertEqual(fetched[-1], item)
+        self.assertEqual(fetched, [1, 2, 3])
+
+    @testing.gen_test
+    async def test_iter_get_raises_page_failure(self):
+        client = mock.MagicMock(name="client")
+        client.fetch.side_effect = exceptions.RecoverableFailure("nope")
+        consumer = PaginatedConsumer(client=client).by_page()
+        with self.assertRaises(exceptions.RecoverableFailure):
+            await self.collect(consumer.iter_get())
+
+
+class FlakyHandler(web.RequestHandler):
+    """Fails the first `failures` requests with a 503."""
+
+    failures = 0
+
+    def get(self, user):
+        if FlakyHandler.failures:
+            FlakyHandler.failures -= 1
+            raise web.HTTPError(503)
+        body = {"user": user}
+        if "traceparent" in self.request.headers:
+            body["traceparent"] = self.request.headers["traceparent"]
+        self.write(body)
+
+
+class MeasuredConsumer(api.RestConsumer):
+
+    CONFIG = {
+        "attrs": {
+            "user": {
+                "path": "/users/%user%",
+                "http_methods": {"get": {}},
+                "rate_limit": {"rate": 1000, "burst": 10},
+            },
+        }
+    }
+
+
+class ZeroBackoffRestClient(api.RestClient):
+    BACKOFF = backoff.ConstantBackoff(delay=0)
+
+
+class TestRestClientMetrics(testing.AsyncHTTPTestCase):
+    def setUp(self):
+        super().setUp()
+        self.sink = metrics.InMemorySink()
+        self.client = ZeroBackoffRestClient(
+            metrics=self.sink, bulkheads=bulkhead.Bulkheads(max_concurrent=5)
+        )
+        self.patch = mock.patch.object(MeasuredConsumer, "ENDPOINT", self.get_url(""))
+        self.patch.start()
+        self.consumer = MeasuredConsumer(client=self.client)
+
+    def tearDown(self):
+        self.patch.stop()
+        FlakyHandler.failures = 0
+        super().tearDown()
+
+    def get_app(self):
+        return web.Application([("/users/(.*)", FlakyHandler)])
+
+    def series(self):
+        return {
+            (name, dict(tags).get("consumer"), dict(tags).get("path"))
+            for name, tags in self.sink.histograms
+        }
+
+    @testing.gen_test
+    async def test_phases_are_tagged_with_the_consumer(self):
+        ret = await self.consumer.user(user="U1").http_get()
+        self.assertEqual(ret, {"user": "U1"})
+
+        for name in (
+            "rate_limit_seconds",
+            "queue_seconds",
+            "request_seconds",
+            "decode_seconds",
+        ):
+            self.assertIn((name, "user", "/users/%user%"), self.series())
+
+        request = self.sink.get("request_seconds", consumer="user", method="GET", status=200)
+        self.assertEqual(request.count, 1)
+        self.assertGreater(request.sum, 0)
+
+    @testing.gen_test
+    async def test_retry_sleeps_and_failures_are_measured(self):
+        FlakyHandler.failures = 1
+        ret = await self.consumer.user(user="U1").http_get()
+        self.assertEqual(ret, {"user": "U1"})
+        self.assertEqual(self.sink.get("request_seconds", status=503).count, 1)
+        self.assertEqual(self.sink.get("request_seconds", status=200).count, 1)
+        self.assertEqual(self.sink.get("retry_sleep_seconds", consumer="user").count, 1)
+
+    @testing.gen_test
+    async def test_direct_calls_are_untagged(self):
+        await self.client.fetch(self.get_url("/users/U2"), "GET")
+        self.assertEqual(
+            self.series(),
+            {
+                ("queue_seconds", None, None),
+                ("request_seconds", None, None),
+                ("decode_seconds", None, None),
+            },
+        )
+
+    @testing.gen_test
+    async def test_curl_time_info(self):
+        response = mock.MagicMock(
+            code=200,
+            body=b"{}",
+            request_time=None,
+            time_info={"queue": 0.5, "namelookup": 0.1, "total": 1},
+        )
+        self.client._client = mock.MagicMock(name="http_client")
+        self.client._client.fetch.return_value = tornado_value(response)
+        await self.client.fetch(self.get_url("/users/U3"), "GET")
+        self.assertGreaterEqual(self.sink.get("queue_seconds").sum, 0.5)
+        self.assertEqual(self.sink.get("dns_seconds").sum, 0.1)
+
+
+class TestRestClientTracing(testing.AsyncHTTPTestCase):
+    def setUp(self):
+        super().setUp()
+        self.spans = []
+        self.client = ZeroBackoffRestClient(
+            tracer=tracing.SimpleTracer(on_end=self.spans.append),
+            headers={"X-Shared": "yes"},
+        )
+        self.patch = mock.patch.object(MeasuredConsumer, "ENDPOINT", self.get_url(""))
+        self.patch.start()
+        self.consumer = MeasuredConsumer(client=self.client)
+
+    def tearDown(self):
+        self.patch.stop()
+        FlakyHandler.failures = 0
+        super().tearDown()
+
+    def get_app(self):
+        return web.Application([("/users/(.*)", FlakyHandler)])
+
+    @testing.gen_test
+    async def test_call_and_attempt_spans(self):
+        FlakyHandler.failures = 1
+        ret = await self.consumer.user(user="U1").http_get(token="secret")
+
+        failed, attempt, call = self.spans
+        self.assertEqual(call.name, "GET /users/%user%")
+        self.assertEqual(call.kind, tracing.INTERNAL)
+        self.assertIsNone(call.parent_id)
+        self.assertEqual(call.attributes["rest_client.consumer"], "user")
+        self.assertEqual(call.attributes["url.template"], "/users/%user%")
+        self.assertEqual(
+            call.events,
+            [
+                (
+                    "retry",
+                    {
+                        "attempt": 1,
+                        "reason": "HTTP 503: Service Unavailable",
+                        "wait": 0,
+                    },
+                )
+            ],
+        )
+        self.assertIsNone(call.error)
+
+        for span in (failed, attempt):
+            self.assertEqual(span.kind, tracing.CLIENT)
+            self.assertEqual(span.trace_id, call.trace_id)
+            self.assertEqual(span.parent_id, call.span_id)
+            self.assertEqual(span.attributes["http.request.method"], "GET")
+            self.assertEqual(span.attributes["url.full"], self.get_url("/users/U1"))
+        self.assertEqual(failed.attributes["http.response.status_code"], 503)
+        self.assertEqual(failed.attributes["error.type"], "HTTPClientError")
+        self.assertEqual(attempt.attributes["http.response.status_code"], 200)
+        self.assertEqual(
+            attempt.attributes["http.response.body.size"],
+            len(json.dumps(ret)),
+        )
+        self.assertNotIn("error.type", attempt.attributes)
+
+        # The attempt's context went along with the request, and the shared
+        # headers were left alone.
+        self.assertEqual(ret["traceparent"], attempt.traceparent)
+        self.assertEqual(self.client.headers, {"X-Shared": "yes"})
+
+    @testing.gen_test
+    async def test_failed_call(self):
+        with mock.patch.object(ZeroBackoffRestClient, "EXCEPTIONS", {}):
+            FlakyHandler.failures = 1
+            with self.assertRaises(httpclient.HTTPError):
+                await self.consumer.user(user="U1").http_get()
+        attempt, call = self.spans
+        self.assertIsInstance(call.error, httpclient.HTTPError)
+        self.assertEqual(call.attributes["error.type"], "HTTPClientError")
+
+    @testing.gen_test
+    async def test_untraced_client(self):
+        self.client.tracer = None
+        ret = await self.consumer.user(user="U1").http_get()
+        self.assertEqual(ret, {"user": "U1"})
+        self.assertEqual(self.spans, [])
+
+
+class SlowReplicaHandler(web.RequestHandler):
+    """Answers after the next of `delays`, failing with the next of
+    `failures` (when not `None`)."""
+
+    delays = []
+    failures = []
+    served = []
+
+    async def get(self):
+        delay = SlowReplicaHandler.delays.pop(0) if SlowReplicaHandler.delays else 0
+        fail = SlowReplicaHandler.failures.pop(0) if SlowReplicaHandler.failures else None
+        await asyncio.sleep(delay)
+        SlowReplicaHandler.served.append(delay)
+        if fail:
+            raise web.HTTPError(fail)
+        self.write({"delay": delay})
+
+    post = get
+
+
+class TestRestClientHedging(testing.AsyncHTTPTestCase):
+    def setUp(self):
+        super().setUp()
+        SlowReplicaHandler.delays = []
+        SlowReplicaHandler.failures = []
+        SlowReplicaHandler.served = []
+
+    def get_app(self):
+        return web.Application([("/replica", SlowReplicaHandler)])
+
+    def client(self, **kwargs):
+        client = api.RestClient(hedging=hedge.Hedging(**kwargs))
+        client.EXCEPTIONS = {}
+        return client
+
+    @testing.gen_test
+    async def test_hedge_wins_over_slow_replica(self):
+        SlowReplicaHandler.delays = [1.0]
+        client = self.client(delay=0.05)
+        started = self.io_loop.time()
+        ret = await client.fetch(self.get_url("/replica"), "GET")
+        self.assertEqual(ret, {"delay": 0})
+        self.assertLess(self.io_loop.time() - started, 0.5)
+        self.assertEqual((client.hedging.hedged, client.hedging.won), (1, 1))
+
+    @testing.gen_test
+    async def test_fast_requests_are_not_hedged(self):
+        client = self.client(delay=0.5)
+        ret = await client.fetch(self.get_url("/replica"), "GET")
+        self.assertEqual(ret, {"delay": 0})
+        self.assertEqual(client.hedging.hedged, 0)
+        self.assertEqual(SlowReplicaHandler.served, [0])
+
+    @testing.gen_test
+    async def test_primary_can_still_win(self):
+        SlowReplicaHandler.delays = [0.1, 1.0]
+        client = self.client(delay=0.05)
+        ret = await client.fetch(self.get_url("/replica"), "GET")
+        self.assertEqual(ret, {"delay": 0.1})
+        self.assertEqual((client.hedging.hedged, client.hedging.won), (1, 0))
+
+    @testing.gen_test
+    async def test_budget_bounds_hedges(self):
+        client = self.client(delay=0.02, budget=0, burst=1)
+        for _ in range(3):
+            SlowReplicaHandler.delays = [0.1]
+            await client.fetch(self.get_url("/replica"), "GET")
+        self.assertEqual(client.hedging.hedged, 1)
+
+    @testing.gen_test
+    async def test_only_idempotent_methods(self):
+        SlowReplicaHandler.delays = [0.1]
+        client = self.client(delay=0)
+        await client.fetch(self.get_url("/replica"), "POST", params={"a": 1})
+        self.assertEqual(client.hedging.hedged, 0)
+        self.assertEqual(SlowReplicaHandler.served, [0.1])
+
+    @testing.gen_test
+    async def test_first_failure_is_raised(self):
+        SlowReplicaHandler.delays = [0.1, 0.2]
+        SlowReplicaHandler.failures = [503, 500]
+        client = self.client(delay=0.05)
+        with self.assertRaises(httpclient.HTTPError) as raised:
+            await client.fetch(self.get_url("/replica"), "GET")
+        self.assertEqual(raised.exception.code, 503)
+        self.assertEqual(client.hedging.hedged, 1)
+
+    @testing.gen_test
+    async def test_success_beats_earlier_failure(self):
+        SlowReplicaHandler.delays = [0.05, 0.1]
+        SlowReplicaHandler.failures = [500, None]
+        client = self.client(delay=0.01)
+        ret = await client.fetch(self.get_url("/replica"), "GET")
+        self.assertEqual(ret, {"delay": 0.1})
+        self.assertEqual(client.hedging.won, 1)
+
+    @testing.gen_test
+    async def test_adaptive_delay(self):
+        client = self.client(min_samples=5, quantile=0.5, initial_delay=5)
+        for _ in range(5):
+            await client.fetch(self.get_url("/replica"), "GET")
+        self.assertLess(client.hedging.delay(f"127.0.0.1:{self.get_http_port()}"), 1)
+
+        SlowReplicaHandler.delays = [1.0]
+        started = self.io_loop.time()
+        await client.fetch(self.get_url("/replica"), "GET")
+        self.assertLess(self.io_loop.time() - started, 0.5)
+        self.assertEqual(client.hedging.won, 1)
+
+
+@web.stream_request_body
+class UploadHandler(web.RequestHandler):
+    """Counts the chunks of the body it receives, failing with the next of
+    `failures` (when not `None`) once it is all in."""
+
+    failures = []
+    attempts = 0
+
+    def prepare(self):
+        UploadHandler.attempts += 1
+        self.received = []
+
+    def data_received(self, chunk):
+        self.received.append(chunk)
+
+    def put(self):
+        fail = UploadHandler.failures.pop(0) if UploadHandler.failures else None
+        if fail:
+            raise web.HTTPError(fail)
+        body = b"".join(self.received)
+        self.write(
+            {
+                "size": len(body),
+                "head": body[:20].decode("latin-1"),
+                "chunked": self.request.headers.get("Transfer-Encoding"),
+                "length": self.request.headers.get("Content-Length"),
+                "type": self.request.headers.get("Content-Type"),
+                "args": {k: self.get_argument(k) for k in self.request.arguments},
+            }
+        )
+
+    post = put
+
+
+class UploadConsumer(api.RestConsumer):
+
+    CONFIG = {
+        "attrs": {
+            "files": {
+                "path": "/upload",
+                "http_methods": {"get": {}, "post": {}, "put": {}},
+            }
+        }
+    }
+
+
+class TestRestClientUploads(testing.AsyncHTTPTestCase):
+    def setUp(self):
+        super().setUp()
+        UploadHandler.failures = []
+        UploadHandler.attempts = 0
+        UploadConsumer.ENDPOINT = self.get_url("")
+        self.client = api.RestClient(json=True)
+        self.client.EXCEPTIONS = {httpclient.HTTPError: {"503": None, "": None}}
+        self.consumer = UploadConsumer(client=self.client)
+
+    def tearDown(self):
+        UploadConsumer.ENDPOINT = None
+        super().tearDown()
+
+    def get_app(self):
+        return web.Application([("/upload", UploadHandler)])
+
+    @testing.gen_test
+    async def test_file_upload(self):
+        data = b"x" * 300000
+        ret = await self.client.fetch(
+            self.get_url("/upload"), "PUT", uploads.FileUpload(io.BytesIO(data))
+        )
+        self.assertEqual(ret["size"], len(data))
+        self.assertEqual(ret["length"], str(len(data)))
+        self.assertEqual(ret["type"], "application/octet-stream")
+        self.assertEqual(self.client.transfer_stats.request_wire_bytes, len(data))
+
+    @testing.gen_test
+    async def test_chunked_generator(self):
+        async def chunks():
+            for i in range(10):
+                yield b"%d" % i * 1000
+
+        ret = await self.consumer.files().http_post(chunks(), page=2)
+        self.assertEqual(ret["size"], 10000)
+        self.assertEqual(ret["chunked"], "chunked")
+        self.assertEqual(ret["args"], {"page": "2"})
+
+    @testing.gen_test
+    async def test_multipart(self):
+        upload = uploads.Multipart(
+            fields={"title": "a"}, files={"f": io.BytesIO(b"abc")}, boundary="b"
+        )
+        ret = await self.consumer.files().http_put(upload)
+        self.assertEqual(ret["type"], "multipart/form-data; boundary=b")
+        self.assertEqual(ret["size"], upload.length)
+        self.assertEqual(ret["head"], "--b\r\nContent-Disposi")
+
+    @testing.gen_test
+    async def test_invalid_uploads(self):
+        with self.assertRaises(exceptions.InvalidOptions):
+            await self.consumer.files().http_get(iter([b"a"]))
+        with self.assertRaises(exceptions.InvalidOptions):
+            await self.consumer.files().http_post("not a body")
+        with self.assertRaises(exceptions.InvalidOptions):
+            await self.client.fetch(
+                self.get_url("/upload"), "DELETE", uploads.StreamUpload(iter([]))
+            )
+
+    @testing.gen_test
+    async def test_rewindable_upload_is_retried(self):
+        UploadHandler.failures = [503]
+        records = [{"id": 1}, {"id": 2}]
+        ret = await self.consumer.files().http_post(uploads.NDJSONUpload(records))
+        lines = [self.client.codec.dumps(record) + b"\n" for record in records]
+        self.assertEqual(ret["size"], len(b"".join(lines)))
+        self.assertEqual(UploadHandler.attempts, 2)
+
+    @testing.gen_test
+    async def test_sent_stream_is_not_retried(self):
+        UploadHandler.failures = [503]
+        with self.assertRaises(exceptions.UploadNotReplayable) as raised:
+            await self.consumer.files().http_post(iter([b"abc"]))
+        self.assertIsInstance(raised.exception.__cause__, httpclient.HTTPError)
+        self.assertEqual(UploadHandler.attempts, 1)
+
+    @testing.gen_test
+    async def test_token_client(self):
+        client = api.SimpleTokenRestClient({"token": "t"})
+        ret = await client.fetch(
+            url=self.get_url("/upload?a=1"),
+            method="POST",
+            params=uploads.StreamUpload(iter([b"abc"])),
+        )
+        self.assertEqual(ret["args"], {"a": "1", "token": "t"})
+
+
+@dataclasses.dataclass
+class Member:
+    id: str
+    name: str
+    deleted: bool = False
+
+
+class ModelConsumer(api.RestConsumer):
+
+    ENDPOINT = "http://models"
+    CONFIG = {
+        "attrs": {
+            "info": {
+                "path": "/users.info",
+                "http_methods": {"get": {"response_model": Member}, "post": {}},
+            },
+            "members": {
+                "path": "/users.list",
+                "http_methods": {
+                    "get": {
+                        "response_model": Member,
+                        "pagination": {"type": "cursor", "items": "members"},
+                    }
+                },
+            },
+        }
+    }
+
+
+class TestRestConsumerResponseModel(testing.AsyncTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = mock.MagicMock(name="client")
+        self.consumer = ModelConsumer(client=self.client)
+
+    @testing.gen_test
+    async def test_http_get(self):
+        self.client.fetch.return_value = tornado_value(
+            {"id": "U1", "name": "bob", "color": "9f69e7"}
+        )
+        member = await self.consumer.info().http_get(user="U1")
+        self.assertEqual(member, Member(id="U1", name="bob"))
+
+    @testing.gen_test
+    async def test_http_get_list(self):
+        self.client.fetch.return_value = tornado_value(
+            [{"id": "U1", "name": "bob"}, {"id": "U2", "name": "eve"}]
+        )
+        members = await self.consumer.info().http_get()
+        self.assertEqual([member.name for member in members], ["bob", "eve"])
+
+    @testing.gen_test
+    async def test_other_methods_are_untouched(self):
+        self.client.fetch.return_value = tornado_value({"ok": True})
+        self.assertEqual(await self.consumer.info().http_post(), {"ok": True})
+        self.assertIsNone(self.consumer.info().http_post.model)
+
+    @testing.gen_test
+    async def test_invalid_body(self):
+        self.client.fetch.return_value = tornado_value({"id": "U1"})
+        with self.assertRaises(exceptions.InvalidResponse):
+            await self.consumer.info().http_get()
+
+    @testing.gen_test
+    async def test_iter_get_decodes_items(self):
+        pages = [
+            {"members": [{"id": "U1", "name": "bob"}], "next_cursor": "c"},
+            {"members": [{"id": "U2", "name": "eve", "deleted": True}]},
+        ]
+        self.client.fetch.side_effect = lambda **kwargs: tornado_value(pages.pop(0))
+        members = [member async for member in self.consumer.members().iter_get()]
+        self.assertEqual(
+            members,
+            [Member(id="U1", name="bob"), Member(id="U2", name="eve", deleted=True)],
+        )
+
+    def test_invalid_model(self):
+        with self.assertRaises(exceptions.InvalidOptions):
+            api.RestConsumer(
+                config={"path": "/", "http_methods": {"get": {"response_model": dict}}}
+            )
+
+
 class TestSimpleTokenRestClient(testing.AsyncTestCase):
     def setUp(self, *args, **kwargs):
         super(TestSimpleTokenRestClient, self).setUp()
         self.client = api.SimpleTokenRestClient(tokens={"token": "foobar"})
         self.http_response_mock = mock.MagicMock(name="response")
         self.http_client_mock = mock.MagicMock(name="http_client")
-        self.http_client_mock.fetch.return_value = tornado_value(
-            self.http_response_mock
-        )
+        self.http_client_mock.fetch.return_value = tornado_value(self.http_response_mock)
         self.client._client = self.http_client_mock
 
     @testing.gen_test
@@ -365,3 +2012,43 @@ class TestSimpleTokenRestClient(testing.AsyncTestCase):
         http_req = self.http_client_mock.mock_calls[0]
         http_req = self.http_client_mock.fetch.call_args[0][0].__dict__
         self.assertEqual(http_req["url"], "http://foo.com?token=foobar")
+
+    @testing.gen_test
+    async def test_retry_events_mask_the_token(self):
+        events = []
+        self.client.trace = diagnostics.TraceHook(
+            lambda event, **fields: events.append((event, fields))
+        )
+        self.client.BACKOFF = backoff.ConstantBackoff(0)
+        self.http_response_mock.body = '{"foo": "bar"}'
+        self.http_client_mock.fetch.side_effect = [
+            httpclient.HTTPError(503, "Service Unavailable"),
+            tornado_value(self.http_response_mock),
+            httpclient.HTTPError(503, "Service Unavailable"),
+            tornado_value(self.http_response_mock),
+        ]
+
+        with self.assertLogs("tornado_rest_client", "DEBUG") as logs:
+            await self.client.fetch(
+                url="http://foo.com/?user=bob",
+                method="POST",
+                params={"a": 1},
+                headers={"Authorization": "Bearer foobar"},
+            )
+            await api.RestClient.fetch(self.client, "http://foo.com", "GET", {"token": "foobar"})
+
+        retries = [fields for event, fields in events if event == diagnostics.RETRY]
+        self.assertEqual(len(retries), 2)
+        self.assertEqual(
+            retries[0]["kwargs"],
+            {
+                "url": "http://foo.com/",
+                "method": "POST",
+                "params": {"a": 1, "token": "****"},
+                "headers": {"Authorization": "****"},
+            },
+        )
+        self.assertNotIn("foobar", repr(events))
+        tries = [line for line in logs.output if "Try (2/3)" in line]
+        self.assertEqual(len(tries), 2)
+        self.assertNotIn("foobar", "\n".join(tries))
@@ -0,0 +1,147 @@
+"""Tests for the tornado_rest_client.backoff module"""
+
+import collections
+import random
+import unittest
+
+from tornado import httpclient, httputil
+
+from tornado_rest_client import backoff, exceptions
+
+
+def http_error(code=503, headers=None):
+    """Returns an HTTPError with a response that carries `headers`."""
+    request = httpclient.HTTPRequest("http://unittest")
+    response = httpclient.HTTPResponse(request, code, headers=httputil.HTTPHeaders(headers or {}))
+    return httpclient.HTTPError(code, response=response)
+
+
+class FakeClock:
+    """Simulated clock, advanced by hand."""
+
+    def __init__(self, now=1500000000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def simulate_storm(policy, clients=200, retries=5, window=0.01):
+    """Simulates `clients` all failing at t=0 and retrying with `policy`.
+
+    Every client fails every attempt. Returns the largest number of retries
+    that landed in the same `window` of simulated time.
+    """
+    buckets = collections.Counter()
+    for _ in range(clients):
+        now = 0.0
+        wait = None
+        for attempt in range(1, retries):
+            wait = policy.delay(attempt, wait)
+            now += wait
+            buckets[int(now / window)] += 1
+    return max(buckets.values())
+
+
+class TestRetryAfter(unittest.TestCase):
+    def test_no_response(self):
+        self.assertEqual(backoff.retry_after(httpclient.HTTPError(503)), None)
+        self.assertEqual(backoff.retry_after(ValueError()), None)
+
+    def test_retry_after_seconds(self):
+        exc = http_error(headers={"Retry-After": "7"})
+        self.assertEqual(backoff.retry_after(exc), 7.0)
+
+    def test_retry_after_http_date(self):
+        clock = FakeClock()
+        exc = http_error(headers={"Retry-After": httputil.format_timestamp(clock.now + 30)})
+        self.assertEqual(backoff.retry_after(exc, now=clock()), 30.0)
+
+    def test_retry_after_garbage(self):
+        exc = http_error(headers={"Retry-After": "soon"})
+        self.assertEqual(backoff.retry_after(exc), None)
+
+    def test_rate_limit_reset_epoch(self):
+        clock = FakeClock()
+        exc = http_error(
+            429,
+            headers={
+                "X-RateLimit-Remaining": "0",
+                "X-RateLimit-Reset": str(int(clock.now + 12)),
+            },
+        )
+        self.assertEqual(backoff.retry_after(exc, now=clock()), 12.0)
+
+    def test_rate_limit_reset_ignored_with_remaining_calls(self):
+        exc = http_error(429, headers={"RateLimit-Remaining": "10", "RateLimit-Reset": "5"})
+        self.assertEqual(backoff.retry_after(exc), None)
+
+    def test_chained_exception(self):
+        exc = exceptions.RecoverableFailure("wrapped")
+        exc.__cause__ = http_error(headers={"Retry-After": "3"})
+        self.assertEqual(backoff.retry_after(exc), 3.0)
+
+
+class TestPolicies(unittest.TestCase):
+    def test_constant(self):
+        policy = backoff.ConstantBackoff(0.5)
+        self.assertEqual([policy.delay(i) for i in range(1, 4)], [0.5, 0.5, 0.5])
+
+    def test_exponential_without_jitter(self):
+        policy = backoff.ExponentialBackoff(base=0.1, jitter=None, cap=0.5)
+        delays = [policy.delay(i) for i in range(1, 6)]
+        self.assertEqual(delays, [0.1, 0.2, 0.4, 0.5, 0.5])
+
+    def test_exponential_jitter_bounds(self):
+        full = backoff.ExponentialBackoff(base=1, jitter="full", rng=random.Random(1))
+        equal = backoff.ExponentialBackoff(base=1, jitter="equal", rng=random.Random(1))
+        for _ in range(100):
+            self.assertTrue(0 <= full.delay(3) <= 4)
+            self.assertTrue(2 <= equal.delay(3) <= 4)
+
+    def test_exponential_bad_jitter(self):
+        with self.assertRaises(ValueError):
+            backoff.ExponentialBackoff(jitter="lots")
+
+    def test_decorrelated_jitter_bounds(self):
+        policy = backoff.DecorrelatedJitterBackoff(base=0.1, cap=2, rng=random.Random(1))
+        wait = None
+        for attempt in range(1, 50):
+            new_wait = policy.delay(attempt, wait)
+            self.assertTrue(0.1 <= new_wait <= 2)
+            if wait is not None:
+                self.assertTrue(new_wait <= max(wait, 0.1) * 3)
+            wait = new_wait
+
+    def test_retry_after_is_honored_and_capped(self):
+        policy = backoff.ConstantBackoff(0.25, cap=10)
+        self.assertEqual(policy.delay(1, exc=http_error(headers={"Retry-After": "4"})), 4)
+        self.assertEqual(policy.delay(1, exc=http_error(headers={"Retry-After": "60"})), 10)
+
+        # A hint shorter than the policy's own delay does not shorten it
+        self.assertEqual(policy.delay(1, exc=http_error(headers={"Retry-After": "0"})), 0.25)
+
+    def test_retry_after_can_be_ignored(self):
+        policy = backoff.ConstantBackoff(0.25, honor_retry_after=False)
+        exc = http_error(headers={"Retry-After": "4"})
+        self.assertEqual(policy.delay(1, exc=exc), 0.25)
+
+
+class TestRetryStorm(unittest.TestCase):
+    """Simulated-clock check that jitter spreads out a retry storm."""
+
+    clients = 200
+
+    def test_constant_backoff_retries_in_lockstep(self):
+        peak = simulate_storm(backoff.ConstantBackoff(0.25), clients=self.clients)
+        self.assertEqual(peak, self.clients)
+
+    def test_exponential_full_jitter_flattens_storm(self):
+        policy = backoff.ExponentialBackoff(base=0.25, cap=10, rng=random.Random(42))
+        peak = simulate_storm(policy, clients=self.clients)
+        self.assertLess(peak, self.clients * 0.2)
+
+    def test_decorrelated_jitter_flattens_storm(self):
+        policy = backoff.DecorrelatedJitterBackoff(base=0.25, cap=10, rng=random.Random(42))
+        peak = simulate_storm(policy, clients=self.clients)
+        self.assertLess(peak, self.clients * 0.2)
@@ -0,0 +1,90 @@
+"""Tests for the tornado_rest_client.batch module"""
+
+import asyncio
+
+from tornado import testing
+
+from tornado_rest_client import batch, exceptions
+
+
+class Recorder:
+    """A fake call that tracks how many are in flight at once."""
+
+    def __init__(self, delays=None):
+        self.delays = delays or {}
+        self.in_flight = 0
+        self.peak = 0
+        self.started = []
+
+    async def __call__(self, x):
+        self.started.append(x)
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(self.delays.get(x, 0))
+            if x % 7 == 3:
+                raise ValueError(x)
+            return x * 2
+        finally:
+            self.in_flight -= 1
+
+
+class TestRun(testing.AsyncTestCase):
+    async def collect(self, results):
+        return [result async for result in results]
+
+    @testing.gen_test
+    async def test_ordered_with_errors(self):
+        call = Recorder()
+        results = await self.collect(batch.run(call, ({"x": x} for x in range(50)), concurrency=5))
+        self.assertEqual([r.index for r in results], list(range(50)))
+        self.assertLessEqual(call.peak, 5)
+        for result in results:
+            x = result.kwargs["x"]
+            if x % 7 == 3:
+                self.assertIsInstance(result.exception, ValueError)
+                self.assertEqual(result.result, None)
+            else:
+                self.assertEqual((result.result, result.exception), (x * 2, None))
+
+    @testing.gen_test
+    async def test_unordered_yields_as_completed(self):
+        call = Recorder(delays={0: 0.05})
+        results = await self.collect(batch.run(call, ({"x": x} for x in range(5)), ordered=False))
+        self.assertEqual(results[-1].index, 0)
+        self.assertEqual(sorted(r.index for r in results), list(range(5)))
+
+    @testing.gen_test
+    async def test_ordered_window_bounds_slow_head(self):
+        call = Recorder(delays={0: 0.05})
+        results = batch.run(call, ({"x": x} for x in range(100)), concurrency=2, window=4)
+        first = await results.__anext__()
+        self.assertEqual(first.index, 0)
+        # While 0 was running, only the window's worth of calls were made
+        self.assertLessEqual(len(call.started), 5)
+        await results.aclose()
+
+    @testing.gen_test
+    async def test_input_is_consumed_lazily(self):
+        pulled = []
+
+        async def kwargs_iter():
+            for x in range(1000000):
+                pulled.append(x)
+                yield {"x": x}
+
+        results = batch.run(Recorder(), kwargs_iter(), concurrency=3)
+        async for result in results:
+            if result.index == 10:
+                break
+        await results.aclose()
+        self.assertLess(len(pulled), 20)
+
+    @testing.gen_test
+    async def test_empty(self):
+        self.assertEqual(await self.collect(batch.run(Recorder(), [])), [])
+
+    @testing.gen_test
+    async def test_invalid_concurrency(self):
+        with self.assertRaises(exceptions.InvalidOptions):
+            await self.collect(batch.run(Recorder(), [], concurrency=0))
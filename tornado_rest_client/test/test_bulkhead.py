@@ -0,0 +1,146 @@
+"""Tests for the tornado_rest_client.bulkhead module"""
+
+import asyncio
+import unittest
+
+import mock
+
+from tornado import testing, util
+
+from tornado_rest_client import bulkhead, exceptions
+
+
+class TestBulkhead(testing.AsyncTestCase):
+    def setUp(self):
+        super().setUp()
+        self.bulkhead = bulkhead.Bulkhead("api.unittest", max_concurrent=2)
+
+    @testing.gen_test
+    async def test_queues_over_the_limit(self):
+        await self.bulkhead.acquire()
+        await self.bulkhead.acquire()
+
+        waiter = asyncio.ensure_future(self.bulkhead.acquire())
+        await asyncio.sleep(0)
+        self.assertFalse(waiter.done())
+        self.assertEqual((self.bulkhead.active, self.bulkhead.waiting), (2, 1))
+
+        self.bulkhead.release()
+        await waiter
+        self.assertEqual((self.bulkhead.active, self.bulkhead.waiting), (2, 0))
+        self.assertEqual(self.bulkhead.stats()["max_waiting"], 1)
+        self.assertEqual(self.bulkhead.stats()["acquired"], 3)
+
+    @testing.gen_test
+    async def test_queue_timeout(self):
+        self.bulkhead.queue_timeout = 0.01
+        await self.bulkhead.acquire()
+        await self.bulkhead.acquire()
+        with self.assertRaises(exceptions.BulkheadFull):
+            await self.bulkhead.acquire()
+        self.assertEqual((self.bulkhead.waiting, self.bulkhead.rejected), (0, 1))
+
+        # The timed out waiter does not swallow the next free slot
+        self.bulkhead.release()
+        await self.bulkhead.acquire()
+        self.assertEqual(self.bulkhead.active, 2)
+
+    @testing.gen_test
+    async def test_queue_timeout_raised_by_tornado(self):
+        self.bulkhead.queue_timeout = 0.01
+        await self.bulkhead.acquire()
+        await self.bulkhead.acquire()
+        for error in (util.TimeoutError, asyncio.TimeoutError):
+            with mock.patch.object(self.bulkhead._semaphore, "acquire", side_effect=error()):
+                with self.assertRaises(exceptions.BulkheadFull):
+                    await self.bulkhead.acquire()
+        self.assertEqual((self.bulkhead.waiting, self.bulkhead.rejected), (0, 2))
+
+    @testing.gen_test
+    async def test_max_queue(self):
+        self.bulkhead.max_queue = 1
+        await self.bulkhead.acquire()
+        await self.bulkhead.acquire()
+        waiter = asyncio.ensure_future(self.bulkhead.acquire())
+        await asyncio.sleep(0)
+        with self.assertRaises(exceptions.BulkheadFull):
+            await self.bulkhead.acquire()
+
+        self.bulkhead.release()
+        await waiter
+
+    def test_invalid(self):
+        with self.assertRaises(exceptions.InvalidOptions):
+            bulkhead.Bulkhead("api.unittest", max_concurrent=0)
+
+
+class TestBulkheads(testing.AsyncTestCase):
+    @testing.gen_test
+    async def test_slot_takes_client_and_endpoint_slots(self):
+        bulkheads = bulkhead.Bulkheads(max_concurrent=3, per_endpoint=1)
+        async with bulkheads.slot("http://a.com/foo"):
+            async with bulkheads.slot("http://b.com/foo"):
+                stats = bulkheads.stats()
+                self.assertEqual(stats["*"]["active"], 2)
+                self.assertEqual(stats["a.com"]["active"], 1)
+                self.assertEqual(stats["b.com"]["active"], 1)
+
+        self.assertEqual(
+            [b.active for b in bulkheads],
+            [0, 0, 0],
+        )
+
+    @testing.gen_test
+    async def test_slow_endpoint_does_not_starve_others(self):
+        bulkheads = bulkhead.Bulkheads(per_endpoint=1, queue_timeout=0.01)
+        async with bulkheads.slot("http://slow.com/"):
+            with self.assertRaises(exceptions.BulkheadFull):
+                async with bulkheads.slot("http://slow.com/"):
+                    pass
+            async with bulkheads.slot("http://fast.com/"):
+                pass
+
+        self.assertEqual(bulkheads.stats()["slow.com"]["rejected"], 1)
+        self.assertEqual(bulkheads.stats()["fast.com"]["acquired"], 1)
+
+    @testing.gen_test
+    async def test_saturated_endpoint_does_not_hold_client_slots(self):
+        bulkheads = bulkhead.Bulkheads(max_concurrent=2, per_endpoint=1)
+        hung = asyncio.Event()
+
+        async def call(url):
+            async with bulkheads.slot(url):
+                await hung.wait()
+
+        slow = [asyncio.ensure_future(call("http://slow/x")) for _ in range(2)]
+        await asyncio.sleep(0)
+        # The second call waits on its endpoint, not on a client-wide slot
+        self.assertEqual(bulkheads.stats()["slow"]["waiting"], 1)
+        self.assertEqual(bulkheads.client.active, 1)
+
+        async with bulkheads.slot("http://healthy/y"):
+            self.assertEqual(bulkheads.client.active, 2)
+
+        hung.set()
+        await asyncio.gather(*slow)
+        self.assertEqual([b.active for b in bulkheads], [0, 0, 0])
+
+    @testing.gen_test
+    async def test_client_slot_released_when_endpoint_is_full(self):
+        bulkheads = bulkhead.Bulkheads(max_concurrent=5, per_endpoint=1, queue_timeout=0.01)
+        async with bulkheads.slot("http://slow.com/"):
+            with self.assertRaises(exceptions.BulkheadFull):
+                async with bulkheads.slot("http://slow.com/"):
+                    pass
+            self.assertEqual(bulkheads.client.active, 1)
+
+
+class TestBulkheadsKeys(unittest.TestCase):
+    def test_keys(self):
+        by_path = bulkhead.Bulkheads(per_endpoint=1, key="path")
+        self.assertEqual(by_path.get("http://a.com/foo?x=1").key, "a.com/foo")
+        custom = bulkhead.Bulkheads(per_endpoint=1, key=lambda url: "all")
+        self.assertEqual(custom.get("http://a.com/foo").key, "all")
+        self.assertEqual(bulkhead.Bulkheads(max_concurrent=1).get("http://a"), None)
+        with self.assertRaises(exceptions.InvalidOptions):
+            bulkhead.Bulkheads(key="nope")
@@ -0,0 +1,111 @@
+"""Tests for the tornado_rest_client.cache module"""
+
+import io
+import unittest
+
+from tornado import httpclient, httputil
+
+from tornado_rest_client import cache
+
+
+class FakeClock:
+    """Simulated monotonic clock, advanced by hand."""
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def response(body=b"{}", code=200, headers=None):
+    return httpclient.HTTPResponse(
+        httpclient.HTTPRequest("http://unittest"),
+        code,
+        headers=httputil.HTTPHeaders(headers or {}),
+        buffer=io.BytesIO(body),
+    )
+
+
+class TestFreshnessLifetime(unittest.TestCase):
+    def lifetime(self, headers, default_ttl=0.0):
+        return cache.freshness_lifetime(httputil.HTTPHeaders(headers), default_ttl)
+
+    def test_cache_control(self):
+        self.assertEqual(self.lifetime({"Cache-Control": "no-store"}), None)
+        self.assertEqual(self.lifetime({"Cache-Control": "no-cache"}), 0.0)
+        self.assertEqual(self.lifetime({"Cache-Control": "private, max-age=60"}), 60)
+        self.assertEqual(self.lifetime({"Cache-Control": "max-age=60", "Age": "15"}), 45.0)
+
+    def test_expires(self):
+        headers = {
+            "Date": "Wed, 21 Oct 2015 07:28:00 GMT",
+            "Expires": "Wed, 21 Oct 2015 07:30:00 GMT",
+        }
+        self.assertEqual(self.lifetime(headers), 120.0)
+        self.assertEqual(self.lifetime({"Expires": "0"}), 0.0)
+
+    def test_default(self):
+        self.assertEqual(self.lifetime({}, default_ttl=5), 5)
+
+
+class TestLRUCache(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = cache.LRUCache(max_bytes=100, clock=self.clock)
+
+    def test_fresh_hit_then_stale(self):
+        self.cache.store("a", response(b"abc", headers={"Cache-Control": "max-age=10"}))
+        entry, fresh = self.cache.lookup("a")
+        self.assertEqual((entry.body, fresh), (b"abc", True))
+
+        self.clock.now += 11
+        entry, fresh = self.cache.lookup("a")
+        self.assertEqual((entry.body, fresh), (b"abc", False))
+        self.assertEqual((self.cache.stats.hits, self.cache.stats.misses), (1, 1))
+
+    def test_uncacheable_responses(self):
+        self.assertEqual(
+            self.cache.store("a", response(headers={"Cache-Control": "no-store"})),
+            None,
+        )
+        # No freshness and no validators is useless to keep
+        self.assertEqual(self.cache.store("b", response()), None)
+        self.assertEqual(len(self.cache), 0)
+
+    def test_revalidatable_entry_is_kept(self):
+        entry = self.cache.store("a", response(headers={"ETag": '"v1"'}))
+        self.assertEqual(entry.conditional_headers(), {"If-None-Match": '"v1"'})
+        self.assertEqual(self.cache.lookup("a"), (entry, False))
+
+        not_modified = response(
+            b"", code=304, headers={"ETag": '"v1"', "Cache-Control": "max-age=5"}
+        )
+        self.cache.revalidated("a", entry, not_modified)
+        self.assertEqual(self.cache.lookup("a"), (entry, True))
+        self.assertEqual(self.cache.stats.revalidations, 1)
+        self.assertEqual(self.cache.stats.hit_ratio, 1.0)
+
+    def test_evicts_least_recently_used_by_bytes(self):
+        headers = {"Cache-Control": "max-age=60"}
+        for key in "abc":
+            self.cache.store(key, response(b"x" * 40, headers=headers))
+        self.assertEqual(len(self.cache), 2)
+        self.assertEqual(self.cache.lookup("a"), (None, False))
+        self.assertEqual(self.cache.size, 80)
+        self.assertEqual(self.cache.stats.evictions, 1)
+
+        # Touching 'b' makes 'c' the next to go
+        self.cache.lookup("b")
+        self.cache.store("d", response(b"x" * 40, headers=headers))
+        self.assertEqual(self.cache.lookup("c"), (None, False))
+        self.assertTrue(self.cache.lookup("b")[1])
+
+    def test_too_large(self):
+        self.cache.store("a", response(b"x" * 101, headers={"ETag": "1"}))
+        self.assertEqual(len(self.cache), 0)
+
+    def test_clear(self):
+        self.cache.store("a", response(headers={"ETag": "1"}))
+        self.cache.clear()
+        self.assertEqual((len(self.cache), self.cache.size), (0, 0))
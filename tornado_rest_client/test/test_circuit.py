@@ -0,0 +1,143 @@
+"""Tests for the tornado_rest_client.circuit module"""
+
+import asyncio
+import unittest
+
+from tornado import httpclient, util
+
+from tornado_rest_client import circuit, exceptions
+
+
+class FakeClock:
+    """Simulated monotonic clock, advanced by hand."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+class TestIsFailure(unittest.TestCase):
+    def test_classification(self):
+        self.assertTrue(circuit.is_failure(httpclient.HTTPError(503)))
+        self.assertTrue(circuit.is_failure(httpclient.HTTPError(599)))
+        self.assertFalse(circuit.is_failure(httpclient.HTTPError(404)))
+        self.assertTrue(circuit.is_failure(ConnectionRefusedError()))
+        self.assertTrue(circuit.is_failure(util.TimeoutError()))
+        self.assertTrue(circuit.is_failure(asyncio.TimeoutError()))
+        self.assertEqual(circuit.is_failure(asyncio.CancelledError()), None)
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.transitions = []
+        self.breaker = circuit.CircuitBreaker(
+            "unittest",
+            failure_threshold=3,
+            window=10,
+            recovery_timeout=30,
+            clock=self.clock,
+            listeners=[lambda b, old, new: self.transitions.append((old, new))],
+        )
+
+    def trip(self):
+        for _ in range(3):
+            self.breaker.before_call()
+            self.breaker.record_failure()
+
+    def test_opens_after_threshold(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, circuit.CLOSED)
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, circuit.OPEN)
+        self.assertEqual(self.transitions, [(circuit.CLOSED, circuit.OPEN)])
+
+        with self.assertRaises(exceptions.CircuitOpen):
+            self.breaker.before_call()
+
+    def test_failures_outside_window_expire(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.clock.advance(11)
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, circuit.CLOSED)
+        self.assertEqual(self.breaker.failure_count, 1)
+
+    def test_half_open_after_recovery_timeout(self):
+        self.trip()
+        self.clock.advance(29)
+        self.assertEqual(self.breaker.state, circuit.OPEN)
+        self.clock.advance(1)
+        self.assertEqual(self.breaker.state, circuit.HALF_OPEN)
+
+        # Only one probe is allowed through at a time
+        self.breaker.before_call()
+        with self.assertRaises(exceptions.CircuitOpen):
+            self.breaker.before_call()
+
+    def test_successful_probe_closes(self):
+        self.trip()
+        self.clock.advance(30)
+        self.breaker.before_call()
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, circuit.CLOSED)
+        self.assertEqual(self.breaker.failure_count, 0)
+        self.assertEqual(
+            self.transitions,
+            [
+                (circuit.CLOSED, circuit.OPEN),
+                (circuit.OPEN, circuit.HALF_OPEN),
+                (circuit.HALF_OPEN, circuit.CLOSED),
+            ],
+        )
+
+    def test_failed_probe_reopens(self):
+        self.trip()
+        self.clock.advance(30)
+        self.breaker.before_call()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, circuit.OPEN)
+        self.clock.advance(29)
+        self.assertEqual(self.breaker.state, circuit.OPEN)
+
+    def test_released_probe_frees_slot(self):
+        self.trip()
+        self.clock.advance(30)
+        self.breaker.before_call()
+        self.breaker.release()
+        self.breaker.before_call()
+        self.assertEqual(self.breaker.state, circuit.HALF_OPEN)
+
+
+class TestCircuitBreakers(unittest.TestCase):
+    def test_keyed_by_host(self):
+        breakers = circuit.CircuitBreakers()
+        self.assertIs(breakers.get("http://foo.com/a?x=1"), breakers.get("http://foo.com/b"))
+        self.assertIsNot(breakers.get("http://foo.com/"), breakers.get("http://bar/"))
+        self.assertEqual(breakers.states(), {"foo.com": "closed", "bar": "closed"})
+
+    def test_keyed_by_path(self):
+        breakers = circuit.CircuitBreakers(key="path")
+        self.assertIs(breakers.get("http://foo.com/a?x=1"), breakers.get("http://foo.com/a"))
+        self.assertIsNot(breakers.get("http://foo.com/a"), breakers.get("http://foo.com/b"))
+
+    def test_bad_key(self):
+        with self.assertRaises(exceptions.InvalidOptions):
+            circuit.CircuitBreakers(key="port")
+
+    def test_record_uses_classification(self):
+        breakers = circuit.CircuitBreakers(failure_threshold=2)
+        breaker = breakers.get("http://foo.com/")
+        breakers.record(breaker, httpclient.HTTPError(404))
+        breakers.record(breaker, asyncio.CancelledError())
+        self.assertEqual(breaker.failure_count, 0)
+        breakers.record(breaker, httpclient.HTTPError(500))
+        breakers.record(breaker, httpclient.HTTPError(500))
+        self.assertEqual(breaker.state, circuit.OPEN)
+        self.assertEqual(list(breakers), [breaker])
@@ -0,0 +1,70 @@
+"""Tests for the tornado_rest_client.codec module"""
+
+import unittest
+
+import mock
+
+from tornado_rest_client import codec, exceptions
+
+PAYLOAD = {
+    "ok": True,
+    "members": [
+        {"id": "U%04d" % i, "name": "user ünicode", "deleted": False, "tz": None} for i in range(3)
+    ],
+    "score": 1.5,
+}
+
+
+class TestCodecs(unittest.TestCase):
+    def test_roundtrip_from_bytes(self):
+        for name in codec.available():
+            with self.subTest(codec=name):
+                json_codec = codec.get(name)
+                data = json_codec.dumps(PAYLOAD)
+                self.assertIsInstance(data, bytes)
+                self.assertEqual(json_codec.loads(data), PAYLOAD)
+                self.assertEqual(json_codec.loads(data.decode("utf-8")), PAYLOAD)
+
+    def test_decode_errors(self):
+        for name in codec.available():
+            with self.subTest(codec=name):
+                json_codec = codec.get(name)
+                with self.assertRaises(json_codec.decode_errors):
+                    json_codec.loads(b"<html>Bad Gateway</html>")
+
+    def test_non_string_keys(self):
+        for name in codec.available():
+            with self.subTest(codec=name):
+                json_codec = codec.get(name)
+                self.assertEqual(json_codec.loads(json_codec.dumps({1: "a"})), {"1": "a"})
+
+
+class TestGet(unittest.TestCase):
+    def test_default_prefers_fast_codecs(self):
+        expected = next(
+            (n for n in ("orjson", "msgspec", "ujson") if n in codec.available()),
+            "stdlib",
+        )
+        self.assertEqual(codec.get().name, expected)
+
+    @mock.patch.dict(
+        codec.CODECS,
+        {name: (cls, False) for name, (cls, _) in codec.CODECS.items()},
+    )
+    def test_default_falls_back_to_stdlib(self):
+        self.assertEqual(codec.get().name, "stdlib")
+
+    def test_instances_are_shared(self):
+        self.assertIs(codec.get("stdlib"), codec.get("stdlib"))
+        stdlib = codec.StdlibCodec()
+        self.assertIs(codec.get(stdlib), stdlib)
+
+    def test_invalid(self):
+        with self.assertRaises(exceptions.InvalidOptions):
+            codec.get("yaml")
+
+    @mock.patch.dict(codec.CODECS, {"ujson": (codec.UjsonCodec, False)})
+    @mock.patch.dict(codec._INSTANCES, clear=True)
+    def test_not_installed(self):
+        with self.assertRaises(exceptions.InvalidOptions):
+            codec.get("ujson")
@@ -0,0 +1,74 @@
+"""Tests for the tornado_rest_client.compress module"""
+
+import gzip
+import io
+import unittest
+import zlib
+
+from tornado import httpclient, httputil
+
+from tornado_rest_client import compress, exceptions
+
+
+def response(body, headers=None):
+    return httpclient.HTTPResponse(
+        httpclient.HTTPRequest("http://unittest"),
+        200,
+        headers=httputil.HTTPHeaders(headers or {}),
+        buffer=io.BytesIO(body),
+    )
+
+
+class TestCompression(unittest.TestCase):
+    body = b'{"records": [%s]}' % b", ".join([b'{"id": 1}'] * 500)
+
+    def test_gzip(self):
+        compression = compress.Compression(threshold=100)
+        self.assertEqual(gzip.decompress(compression.compress(self.body)), self.body)
+
+    def test_deflate(self):
+        compression = compress.Compression(compress.DEFLATE, level=9)
+        self.assertEqual(zlib.decompress(compression.compress(self.body)), self.body)
+
+    def test_below_threshold_or_incompressible(self):
+        compression = compress.Compression(threshold=100)
+        self.assertEqual(compression.compress(b"{}"), None)
+        self.assertEqual(compression.compress(bytes(range(200))), None)
+
+    def test_unsupported_host(self):
+        compression = compress.Compression(threshold=0)
+        compression.unsupported("a.com")
+        self.assertEqual(compression.compress(self.body, "a.com"), None)
+        self.assertNotEqual(compression.compress(self.body, "b.com"), None)
+
+    def test_invalid(self):
+        with self.assertRaises(exceptions.InvalidOptions):
+            compress.Compression("lzma")
+
+    @unittest.skipIf(compress.zstd_available(), "zstandard is installed")
+    def test_zstd_requires_zstandard(self):
+        with self.assertRaises(exceptions.InvalidOptions):
+            compress.Compression(compress.ZSTD)
+
+
+class TestTransferStats(unittest.TestCase):
+    def test_record(self):
+        transfers = []
+        stats = compress.TransferStats(listeners=[transfers.append])
+        request = httpclient.HTTPRequest("http://u", method="POST", body=b"x" * 10)
+
+        stats.record(request, response(b"y" * 100), request_bytes=40)
+        stats.record(
+            request,
+            response(
+                b"y" * 100,
+                {"X-Consumed-Content-Encoding": "gzip", "Content-Length": "30"},
+            ),
+        )
+        stats.record(httpclient.HTTPRequest("http://u"), None)
+
+        self.assertEqual(stats.requests, 3)
+        self.assertEqual((stats.request_bytes, stats.request_wire_bytes), (50, 20))
+        self.assertEqual((stats.response_bytes, stats.response_wire_bytes), (200, 130))
+        self.assertEqual(stats.saved_bytes, 100)
+        self.assertEqual(transfers[1], ("http://u", "POST", 10, 10, 100, 30))
@@ -0,0 +1,39 @@
+"""Tests for the tornado_rest_client.diagnostics module"""
+
+import unittest
+
+import mock
+
+from tornado_rest_client import diagnostics, exceptions
+
+
+class TestTraceHook(unittest.TestCase):
+    def test_sampled(self):
+        rand = mock.MagicMock(side_effect=[0.05, 0.5])
+        hook = diagnostics.TraceHook(mock.MagicMock(), sample_rate=0.1, rand=rand)
+        self.assertTrue(hook.sampled())
+        self.assertFalse(hook.sampled())
+
+    def test_always_and_never_sampled(self):
+        rand = mock.MagicMock(return_value=0.0)
+        self.assertTrue(diagnostics.TraceHook(sample_rate=1.0, rand=rand).sampled())
+        rand.assert_not_called()
+        self.assertFalse(diagnostics.TraceHook(sample_rate=0.0, rand=rand).sampled())
+
+    def test_invalid_sample_rate(self):
+        for rate in (-0.1, 1.5):
+            with self.assertRaises(exceptions.InvalidOptions):
+                diagnostics.TraceHook(sample_rate=rate)
+
+    def test_emit(self):
+        callback = mock.MagicMock()
+        diagnostics.TraceHook(callback).emit("request", status=200)
+        callback.assert_called_once_with("request", status=200)
+
+    def test_log_event(self):
+        with self.assertLogs("tornado_rest_client.diagnostics", "INFO") as logs:
+            diagnostics.log_event("request", method="GET", status=200)
+        self.assertEqual(
+            logs.output,
+            ["INFO:tornado_rest_client.diagnostics:request method='GET' status=200"],
+        )
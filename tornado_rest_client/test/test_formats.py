@@ -0,0 +1,74 @@
+"""Tests for the tornado_rest_client.formats module"""
+
+import io
+import unittest
+
+from tornado_rest_client import codec, exceptions, formats
+
+
+class TestFormats(unittest.TestCase):
+    def setUp(self):
+        self.codec = codec.StdlibCodec()
+
+    def test_check(self):
+        formats.check(None)
+        for fmt in formats.FORMATS:
+            formats.check(fmt)
+        with self.assertRaises(exceptions.InvalidOptions):
+            formats.check("xml")
+
+    def test_media_type(self):
+        self.assertEqual(formats.media_type("application/json"), ("json", None))
+        self.assertEqual(
+            formats.media_type("Application/Problem+JSON; charset=UTF-8"),
+            ("json", "UTF-8"),
+        )
+        self.assertEqual(
+            formats.media_type('text/csv; header=present; charset="latin-1"'),
+            ("text", "latin-1"),
+        )
+        self.assertEqual(formats.media_type("application/pdf"), ("bytes", None))
+        self.assertEqual(formats.media_type(None), ("bytes", None))
+
+    def test_bytes(self):
+        body = b'{"not": "parsed"}'
+        self.assertIs(formats.decode("bytes", body, None), body)
+
+    def test_memoryview(self):
+        buffer = io.BytesIO(b"0123456789")
+        view = formats.decode("memoryview", None, None, buffer=buffer)
+        self.assertIsInstance(view, memoryview)
+        self.assertEqual(view[2:4].tobytes(), b"23")
+        view.release()
+
+        view = formats.decode("memoryview", b"abc", None)
+        self.assertEqual(view.tobytes(), b"abc")
+
+        # Neither a buffer nor a body (ie, a streamed or empty response)
+        view = formats.decode("memoryview", None, None)
+        self.assertEqual(view.tobytes(), b"")
+
+    def test_json(self):
+        self.assertEqual(formats.decode("json", b'{"a": 1}', self.codec), {"a": 1})
+        self.assertIsNone(formats.decode("json", b"", self.codec))
+        with self.assertRaises(exceptions.InvalidResponse):
+            formats.decode("json", b"<html>", self.codec, "application/json")
+
+    def test_text(self):
+        body = "café".encode("latin-1")
+        self.assertEqual(formats.decode("text", body, None, "text/plain; charset=latin-1"), "café")
+        self.assertEqual(formats.decode("text", "café".encode(), None), "café")
+        with self.assertRaises(exceptions.InvalidResponse):
+            formats.decode("text", body, None, "text/plain")
+        with self.assertRaises(exceptions.InvalidResponse):
+            formats.decode("text", body, None, "text/plain; charset=bogus")
+
+    def test_auto(self):
+        decode = formats.decode
+        self.assertEqual(decode("auto", b'{"a": 1}', self.codec, "application/json"), {"a": 1})
+        self.assertEqual(decode("auto", b"a,b", self.codec, "text/csv"), "a,b")
+        self.assertEqual(decode("auto", b"[1]", self.codec, "image/png"), b"[1]")
+        self.assertEqual(decode("auto", b"[1]", self.codec, None), b"[1]")
+        self.assertIsNone(decode("auto", b"", self.codec, "application/json"))
+        with self.assertRaises(exceptions.InvalidResponse):
+            decode("auto", b"oops", self.codec, "application/json")
@@ -0,0 +1,69 @@
+"""Tests for the tornado_rest_client.hedge module"""
+
+import unittest
+
+from tornado_rest_client import exceptions, hedge
+
+
+class TestHedging(unittest.TestCase):
+    def test_fixed_delay(self):
+        hedging = hedge.Hedging(delay=0.2)
+        hedging.observe("api", 5)
+        self.assertEqual(hedging.delay("api"), 0.2)
+
+    def test_quantile_delay(self):
+        hedging = hedge.Hedging(quantile=0.9, initial_delay=1, min_samples=10)
+        for latency in range(9):
+            hedging.observe("api", latency / 100)
+        self.assertEqual(hedging.delay("api"), 1)
+        self.assertEqual(hedging.delay("other"), 1)
+
+        hedging.observe("api", 0.09)
+        self.assertEqual(hedging.delay("api"), 0.09)
+        self.assertEqual(hedging.delay("other"), 1)
+
+    def test_quantile_follows_a_window(self):
+        hedging = hedge.Hedging(min_samples=1, window=20, quantile=0.5)
+        for _ in range(20):
+            hedging.observe("api", 1.0)
+        self.assertEqual(hedging.delay("api"), 1.0)
+        for _ in range(20):
+            hedging.observe("api", 0.1)
+        self.assertEqual(hedging.delay("api"), 0.1)
+
+    def test_budget(self):
+        hedging = hedge.Hedging(budget=0.25, burst=1)
+        self.assertTrue(hedging.spend())
+        self.assertFalse(hedging.spend())
+        for _ in range(3):
+            hedging.started()
+            self.assertFalse(hedging.spend())
+        hedging.started()
+        self.assertTrue(hedging.spend())
+        self.assertEqual(hedging.hedged, 2)
+
+    def test_budget_is_capped(self):
+        hedging = hedge.Hedging(budget=1, burst=2)
+        for _ in range(10):
+            hedging.started()
+        self.assertTrue(hedging.spend())
+        self.assertTrue(hedging.spend())
+        self.assertFalse(hedging.spend())
+
+    def test_won(self):
+        hedging = hedge.Hedging()
+        hedging.observe("api", 0.1)
+        hedging.observe("api", 0.1, hedge_won=True)
+        self.assertEqual(hedging.won, 1)
+
+    def test_invalid(self):
+        for kwargs in (
+            {"delay": -1},
+            {"quantile": 1},
+            {"budget": 2},
+            {"burst": 0},
+            {"methods": ("GET", "POST")},
+        ):
+            with self.subTest(**kwargs):
+                with self.assertRaises(exceptions.InvalidOptions):
+                    hedge.Hedging(**kwargs)
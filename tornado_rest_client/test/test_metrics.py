@@ -0,0 +1,115 @@
+"""Tests for the tornado_rest_client.metrics module"""
+
+import unittest
+
+from tornado_rest_client import metrics
+
+
+class TestHistogram(unittest.TestCase):
+    def test_observe(self):
+        histogram = metrics.Histogram(buckets=(1, 2, 5))
+        for value in (0.5, 1, 1.5, 3, 10):
+            histogram.observe(value)
+        self.assertEqual(histogram.count, 5)
+        self.assertEqual(histogram.sum, 16)
+        self.assertEqual(list(histogram.cumulative()), [(1, 2), (2, 3), (5, 4), (float("inf"), 5)])
+
+    def test_quantile(self):
+        histogram = metrics.Histogram(buckets=(1, 2))
+        self.assertIsNone(histogram.quantile(0.5))
+        for value in (0.5, 0.5, 1.5, 1.5):
+            histogram.observe(value)
+        self.assertEqual(histogram.quantile(0.5), 1)
+        self.assertEqual(histogram.quantile(0.75), 1.5)
+        self.assertEqual(histogram.quantile(1), 2)
+
+        histogram.observe(50)
+        self.assertEqual(histogram.quantile(1), 2)
+
+
+class TestInMemorySink(unittest.TestCase):
+    def test_get_merges_matching_series(self):
+        sink = metrics.InMemorySink(buckets=(1,))
+        sink.observe("request_seconds", 0.5, {"path": "/a", "status": 200})
+        sink.observe("request_seconds", 2, {"path": "/a", "status": 500})
+        sink.observe("request_seconds", 0.5, {"path": "/b", "status": 200})
+        sink.observe("decode_seconds", 0.5, {"path": "/a"})
+
+        self.assertEqual(sink.get("request_seconds").count, 3)
+        self.assertEqual(sink.get("request_seconds", path="/a").count, 2)
+        self.assertEqual(sink.get("request_seconds", path="/a", status=200).count, 1)
+        self.assertIsNone(sink.get("request_seconds", path="/c"))
+        self.assertIsNone(sink.get("dns_seconds"))
+
+        sink.clear()
+        self.assertIsNone(sink.get("request_seconds"))
+
+
+class TestPrometheusExporter(unittest.TestCase):
+    def test_render(self):
+        sink = metrics.InMemorySink(buckets=(0.1, 1))
+        sink.observe("request_seconds", 0.5, {"path": '/a"b', "status": 200})
+        sink.observe("request_seconds", 0.05, {"path": None, "status": "error"})
+        sink.observe("decode_seconds", 0.25, {})
+        self.assertEqual(
+            metrics.PrometheusExporter(sink, prefix="api").render().splitlines(),
+            [
+                "# TYPE api_decode_seconds histogram",
+                'api_decode_seconds_bucket{le="0.1"} 0',
+                'api_decode_seconds_bucket{le="1.0"} 1',
+                'api_decode_seconds_bucket{le="+Inf"} 1',
+                "api_decode_seconds_sum 0.25",
+                "api_decode_seconds_count 1",
+                "# TYPE api_request_seconds histogram",
+                'api_request_seconds_bucket{path="/a\\"b",status="200",le="0.1"} 0',
+                'api_request_seconds_bucket{path="/a\\"b",status="200",le="1.0"} 1',
+                'api_request_seconds_bucket{path="/a\\"b",status="200",le="+Inf"} 1',
+                'api_request_seconds_sum{path="/a\\"b",status="200"} 0.5',
+                'api_request_seconds_count{path="/a\\"b",status="200"} 1',
+                'api_request_seconds_bucket{path="None",status="error",le="0.1"} 1',
+                'api_request_seconds_bucket{path="None",status="error",le="1.0"} 1',
+                'api_request_seconds_bucket{path="None",status="error",le="+Inf"} 1',
+                'api_request_seconds_sum{path="None",status="error"} 0.05',
+                'api_request_seconds_count{path="None",status="error"} 1',
+            ],
+        )
+
+    def test_render_empty(self):
+        self.assertEqual(metrics.PrometheusExporter(metrics.InMemorySink()).render(), "")
+
+
+class TestHelpers(unittest.TestCase):
+    def test_time_info_phases(self):
+        phases = dict(
+            metrics.time_info_phases(
+                {
+                    "queue": 0.5,
+                    "namelookup": 0.01,
+                    "connect": 0.03,
+                    "appconnect": 0.07,
+                    "pretransfer": 0.08,
+                    "starttransfer": 0.2,
+                    "total": 0.25,
+                }
+            )
+        )
+        self.assertEqual(
+            {name: round(seconds, 6) for name, seconds in phases.items()},
+            {
+                "dns_seconds": 0.01,
+                "connect_seconds": 0.02,
+                "tls_seconds": 0.04,
+                "ttfb_seconds": 0.12,
+                "transfer_seconds": 0.05,
+            },
+        )
+        self.assertEqual(list(metrics.time_info_phases({})), [])
+
+    def test_tags(self):
+        self.assertEqual(metrics.tags(method="GET"), {"method": "GET"})
+        token = metrics.TAGS.set({"consumer": "users"})
+        try:
+            self.assertEqual(metrics.tags(method="GET"), {"consumer": "users", "method": "GET"})
+        finally:
+            metrics.TAGS.reset(token)
+        self.assertEqual(metrics.tags(), {})
@@ -0,0 +1,141 @@
+"""Tests for the tornado_rest_client.models module"""
+
+import dataclasses
+import sys
+import unittest
+from typing import Any, Dict, List, Optional
+
+from tornado_rest_client import exceptions, models
+
+
+@dataclasses.dataclass
+class Profile:
+    email: str
+    title: Optional[str] = None
+
+
+@dataclasses.dataclass
+class User:
+    id: str
+    is_admin: bool
+    tz_offset: int
+    profile: Profile
+    score: float = 0.0
+    groups: List[str] = dataclasses.field(default_factory=list)
+    extra: Dict[str, Any] = dataclasses.field(default_factory=dict)
+    manager: Optional["User"] = None
+    raw: Any = None
+
+
+RECORD = {
+    "id": "U1",
+    "is_admin": False,
+    "tz_offset": -25200,
+    "profile": {"email": "u1@example.com", "phone": "555"},
+    "color": "9f69e7",
+}
+
+
+class TestDecoder(unittest.TestCase):
+    def test_record(self):
+        user = models.decoder(User).record(RECORD)
+        self.assertEqual(
+            user,
+            User(
+                id="U1",
+                is_admin=False,
+                tz_offset=-25200,
+                profile=Profile(email="u1@example.com"),
+            ),
+        )
+
+    def test_body_list(self):
+        users = models.decoder(User).body([RECORD, {**RECORD, "id": "U2"}])
+        self.assertEqual([user.id for user in users], ["U1", "U2"])
+
+    def test_nested_and_optional(self):
+        user = models.decoder(User).record(
+            {
+                **RECORD,
+                "score": 3,
+                "groups": ["a", "b"],
+                "manager": {**RECORD, "id": "U0"},
+                "raw": object,
+            }
+        )
+        self.assertEqual(user.score, 3)
+        self.assertEqual(user.groups, ["a", "b"])
+        self.assertEqual(user.manager.id, "U0")
+        self.assertIsInstance(user.manager.profile, Profile)
+        self.assertIs(user.raw, object)
+
+    def test_null_optional(self):
+        user = models.decoder(User).record({**RECORD, "manager": None})
+        self.assertIsNone(user.manager)
+
+    def test_invalid(self):
+        decoder = models.decoder(User)
+        invalid = (
+            {**RECORD, "id": 1},
+            {**RECORD, "is_admin": "no"},
+            {**RECORD, "tz_offset": True},
+            {**RECORD, "tz_offset": None},
+            {**RECORD, "groups": ["a", 1]},
+            {**RECORD, "extra": []},
+            {**RECORD, "profile": "u1@example.com"},
+            {k: v for k, v in RECORD.items() if k != "profile"},
+            "U1",
+        )
+        for record in invalid:
+            with self.subTest(record=record):
+                with self.assertRaises(exceptions.InvalidResponse):
+                    decoder.record(record)
+
+    def test_error_names_the_field(self):
+        with self.assertRaisesRegex(exceptions.InvalidResponse, r"User\[1\]\.groups\[0\]"):
+            models.decoder(User).body([RECORD, {**RECORD, "groups": [1]}])
+
+    @unittest.skipIf(sys.version_info < (3, 10), "slots=True needs Python 3.10")
+    def test_slots_dataclass(self):
+        # pylint: disable=unexpected-keyword-arg
+        @dataclasses.dataclass(slots=True)
+        class Slotted:
+            id: str
+
+        slotted = models.decoder(Slotted).record(RECORD)
+        self.assertEqual(slotted.id, "U1")
+        self.assertFalse(hasattr(slotted, "__dict__"))
+
+    def test_cached(self):
+        self.assertIs(models.decoder(User), models.decoder(User))
+        self.assertIsNone(models.decoder(None))
+
+    def test_not_a_model(self):
+        for model in (dict, "User", Profile(email="u1@example.com")):
+            with self.subTest(model=model):
+                with self.assertRaises(exceptions.InvalidOptions):
+                    models.decoder(model)
+
+    @unittest.skipUnless(models.msgspec_available(), "msgspec is not installed")
+    def test_struct(self):
+        import msgspec  # pylint: disable=import-outside-toplevel
+
+        class Struct(msgspec.Struct):
+            id: str
+            tz_offset: int
+
+        decoder = models.decoder(Struct)
+        self.assertEqual(decoder.record(RECORD), Struct(id="U1", tz_offset=-25200))
+        with self.assertRaises(exceptions.InvalidResponse):
+            decoder.record({**RECORD, "tz_offset": "PST"})
+
+    @unittest.skipIf(sys.version_info < (3, 10), "X | None needs Python 3.10")
+    def test_union_operator(self):
+        @dataclasses.dataclass
+        class Named:
+            name: "str | None"
+
+        decoder = models.decoder(Named)
+        self.assertIsNone(decoder.record({"name": None}).name)
+        with self.assertRaises(exceptions.InvalidResponse):
+            decoder.record({"name": 1})
@@ -0,0 +1,79 @@
+"""Tests for the tornado_rest_client.pagination module"""
+
+import unittest
+
+from tornado import httpclient, httputil
+
+from tornado_rest_client import exceptions, pagination
+
+
+def response(headers):
+    return httpclient.HTTPResponse(
+        httpclient.HTTPRequest("http://unittest"),
+        200,
+        headers=httputil.HTTPHeaders(headers),
+    )
+
+
+class TestLookup(unittest.TestCase):
+    def test_lookup(self):
+        body = {"a": {"b": {"c": 1}}, "list": [1]}
+        self.assertEqual(pagination.lookup(body, "a.b.c"), 1)
+        self.assertEqual(pagination.lookup(body, "a.x.c"), None)
+        self.assertEqual(pagination.lookup(body, "list.c"), None)
+
+
+class TestPaginators(unittest.TestCase):
+    def test_items(self):
+        paginator = pagination.Paginator()
+        self.assertEqual(paginator.items([1, 2]), [1, 2])
+        self.assertEqual(paginator.items({"a": 1}), [{"a": 1}])
+        self.assertEqual(pagination.Paginator(items="x").items({}), [])
+
+    def test_cursor(self):
+        paginator = pagination.CursorPaginator(next="meta.next", param="after")
+        page = paginator.first("http://u", {"limit": 2})
+        self.assertEqual(page, ("http://u", {"limit": 2}))
+        page = paginator.next(page, {"meta": {"next": "abc"}})
+        self.assertEqual(page, ("http://u", {"limit": 2, "after": "abc"}))
+        self.assertEqual(paginator.next(page, {"meta": {"next": ""}}), None)
+
+    def test_page(self):
+        paginator = pagination.PagePaginator(start=0)
+        page = paginator.first("http://u", {"limit": 2})
+        self.assertEqual(page, ("http://u", {"page": 0, "limit": 2}))
+        page = paginator.next(page, [1, 2])
+        self.assertEqual(page, ("http://u", {"page": 1, "limit": 2}))
+        self.assertEqual(paginator.next(page, [3]), None)
+        self.assertEqual(paginator.next(("http://u", {"page": 1}), []), None)
+
+    def test_offset(self):
+        paginator = pagination.OffsetPaginator(items="results")
+        page = paginator.first("http://u", {})
+        page = paginator.next(page, {"results": [1, 2, 3]})
+        self.assertEqual(page, ("http://u", {"offset": 3}))
+        self.assertEqual(paginator.next(page, {"results": []}), None)
+
+    def test_link(self):
+        paginator = pagination.LinkPaginator()
+        link = '<http://u?p=1>; rel="prev", <http://u?p=3>; rel=next'
+        self.assertEqual(paginator.next(None, [], response({"Link": link})), ("http://u?p=3", {}))
+        self.assertEqual(paginator.next(None, [], response({})), None)
+
+
+class TestFromConfig(unittest.TestCase):
+    def test_from_config(self):
+        self.assertEqual(pagination.from_config(None), None)
+        paginator = pagination.from_config({"type": "cursor", "next": "next", "prefetch": 3})
+        self.assertIsInstance(paginator, pagination.CursorPaginator)
+        self.assertEqual(paginator.prefetch, 3)
+
+    def test_invalid(self):
+        for config in (
+            {"next": "next"},
+            {"type": "scroll"},
+            {"type": "page", "bogus": 1},
+            {"type": "page", "prefetch": -1},
+        ):
+            with self.assertRaises(exceptions.InvalidOptions):
+                pagination.from_config(config)
@@ -0,0 +1,92 @@
+"""Tests for the tornado_rest_client.ratelimit module"""
+
+import unittest
+
+from tornado import gen, testing
+
+from tornado_rest_client import exceptions, ratelimit
+
+
+class FakeClock:
+    """Simulated monotonic clock, advanced by the fake sleep."""
+
+    def __init__(self):
+        self.now = 100.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    @gen.coroutine
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class TestTokenBucket(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.bucket = ratelimit.TokenBucket(
+            rate=2, burst=3, clock=self.clock, sleep=self.clock.sleep
+        )
+
+    def test_burst_then_paced(self):
+        self.assertEqual([self.bucket.reserve() for _ in range(3)], [0, 0, 0])
+        self.assertEqual(self.bucket.reserve(), 0.5)
+        self.assertEqual(self.bucket.reserve(), 1.0)
+        self.assertEqual(self.bucket.tokens, -2)
+
+    def test_refills_up_to_burst(self):
+        for _ in range(3):
+            self.bucket.reserve()
+        self.clock.now += 60
+        self.assertEqual(self.bucket.tokens, 3)
+
+    def test_pause(self):
+        self.bucket.pause(10)
+        self.assertEqual(self.bucket.reserve(), 10.5)
+
+        # Once the pause is over tokens refill at the normal rate
+        self.clock.now += 11
+        self.assertEqual(self.bucket.tokens, 1)
+
+    def test_invalid(self):
+        with self.assertRaises(exceptions.InvalidOptions):
+            ratelimit.TokenBucket(rate=0)
+        with self.assertRaises(exceptions.InvalidOptions):
+            ratelimit.TokenBucket(rate=1, burst=0)
+
+
+class TestTokenBucketAcquire(testing.AsyncTestCase):
+    @testing.gen_test
+    async def test_acquire_sleeps_in_order(self):
+        clock = FakeClock()
+        bucket = ratelimit.TokenBucket(rate=10, burst=1, clock=clock, sleep=clock.sleep)
+        for _ in range(4):
+            await bucket.acquire()
+        self.assertEqual([round(s, 6) for s in clock.sleeps], [0.1, 0.1, 0.1])
+
+
+class TestFromConfig(unittest.TestCase):
+    def test_empty(self):
+        self.assertEqual(ratelimit.from_config(None), None)
+        self.assertEqual(ratelimit.from_config({}), None)
+
+    def test_config(self):
+        limit = ratelimit.from_config({"rate": 5, "burst": 10})
+        self.assertIsInstance(limit, ratelimit.RateLimit)
+        self.assertEqual((limit.rate, limit.burst), (5.0, 10))
+        self.assertEqual(ratelimit.from_config({"rate": 5}).burst, 1)
+
+        # Every bucket starts full, and is independent from the others
+        bucket = limit.bucket()
+        self.assertEqual((bucket.rate, bucket.burst), (5.0, 10))
+        self.assertIsNot(limit.bucket(), bucket)
+
+    def test_invalid(self):
+        with self.assertRaises(exceptions.InvalidOptions):
+            ratelimit.from_config({"rate": 0})
+
+    def test_missing_rate(self):
+        with self.assertRaises(exceptions.InvalidOptions):
+            ratelimit.from_config({"burst": 10})
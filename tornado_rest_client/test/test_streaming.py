@@ -0,0 +1,86 @@
+"""Tests for the tornado_rest_client.streaming module"""
+
+import json
+import unittest
+
+from tornado_rest_client import exceptions, streaming
+
+
+def feed_bytewise(decoder, body):
+    """Feeds `body` one byte at a time, returning every record decoded."""
+    records = []
+    for i in range(len(body)):
+        records.extend(decoder.feed(body[i : i + 1]))
+    records.extend(decoder.close())
+    return records
+
+
+class TestNDJSONDecoder(unittest.TestCase):
+    def test_lines(self):
+        decoder = streaming.NDJSONDecoder()
+        self.assertEqual(decoder.feed(b'{"a": 1}\n{"a"'), [{"a": 1}])
+        self.assertEqual(decoder.feed(b": 2}\n\n"), [{"a": 2}])
+        self.assertEqual(decoder.feed(b"3"), [])
+        self.assertEqual(decoder.close(), [3])
+
+    def test_bytewise(self):
+        body = b'{"a": 1}\r\n[1, 2]\n"x"\n'
+        self.assertEqual(feed_bytewise(streaming.NDJSONDecoder(), body), [{"a": 1}, [1, 2], "x"])
+
+
+class TestJSONArrayDecoder(unittest.TestCase):
+    records = [
+        {"id": 1, "name": 'with "quotes", [brackets] and {braces}'},
+        {"id": 2, "nested": {"list": [1, [2, 3], {"x": "y\\\\"}]}},
+        'a string with a " quote, and a \\ backslash',
+        12345,
+        None,
+        [],
+        {},
+    ]
+
+    def test_roundtrip_bytewise(self):
+        body = json.dumps(self.records).encode()
+        self.assertEqual(feed_bytewise(streaming.JSONArrayDecoder(), body), self.records)
+
+    def test_roundtrip_pretty(self):
+        body = json.dumps(self.records, indent=2).encode()
+        decoder = streaming.JSONArrayDecoder()
+        self.assertEqual(decoder.feed(body) + decoder.close(), self.records)
+
+    def test_buffer_is_bounded_by_record(self):
+        decoder = streaming.JSONArrayDecoder()
+        decoder.feed(b"[")
+        for i in range(1000):
+            self.assertEqual(decoder.feed(b'{"id": %d},' % i), [{"id": i}])
+            self.assertLess(len(decoder._buffer), 20)
+
+    def test_empty(self):
+        decoder = streaming.JSONArrayDecoder()
+        self.assertEqual(decoder.feed(b" [ ] "), [])
+        self.assertEqual(decoder.close(), [])
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            streaming.JSONArrayDecoder().feed(b'{"not": "an array"}')
+        with self.assertRaises(ValueError):
+            streaming.JSONArrayDecoder().feed(b"[1, 2] 3")
+
+        truncated = streaming.JSONArrayDecoder()
+        truncated.feed(b"[1, 2")
+        with self.assertRaises(ValueError):
+            truncated.close()
+
+
+class TestAutoDecoder(unittest.TestCase):
+    def test_picks_format(self):
+        self.assertEqual(feed_bytewise(streaming.decoder(), b"  [1, 2]"), [1, 2])
+        self.assertEqual(
+            feed_bytewise(streaming.decoder(), b'{"a": 1}\n{"a": 2}'),
+            [{"a": 1}, {"a": 2}],
+        )
+        self.assertEqual(streaming.decoder().close(), [])
+
+    def test_unknown_format(self):
+        with self.assertRaises(exceptions.InvalidOptions):
+            streaming.decoder("xml")
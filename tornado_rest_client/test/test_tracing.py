@@ -0,0 +1,84 @@
+"""Tests for the tornado_rest_client.tracing module"""
+
+import unittest
+
+from tornado_rest_client import exceptions, tracing
+
+
+class TestSimpleTracer(unittest.TestCase):
+    def setUp(self):
+        self.ended = []
+        self.tracer = tracing.SimpleTracer(on_end=self.ended.append)
+
+    def test_children_share_the_trace(self):
+        with self.tracer.span("call", tracing.INTERNAL, {"a": 1}) as call:
+            self.assertIs(self.tracer.current_span(), call)
+            with self.tracer.span("attempt", tracing.CLIENT) as attempt:
+                self.assertIs(self.tracer.current_span(), attempt)
+            self.assertIs(self.tracer.current_span(), call)
+        self.assertIsNone(self.tracer.current_span())
+
+        self.assertEqual(self.ended, [attempt, call])
+        self.assertIsNone(call.parent_id)
+        self.assertEqual(attempt.parent_id, call.span_id)
+        self.assertEqual(attempt.trace_id, call.trace_id)
+        self.assertNotEqual(attempt.span_id, call.span_id)
+        self.assertEqual(call.attributes, {"a": 1})
+        self.assertGreaterEqual(call.end_time, call.start_time)
+
+    def test_inject(self):
+        headers = {}
+        self.tracer.inject(headers)
+        self.assertEqual(headers, {})
+        with self.tracer.span("attempt", tracing.CLIENT) as span:
+            self.tracer.inject(headers)
+        self.assertEqual(
+            headers["traceparent"],
+            f"00-{span.trace_id:032x}-{span.span_id:016x}-01",
+        )
+        self.assertRegex(headers["traceparent"], r"^00-[0-9a-f]{32}-[0-9a-f]{16}-01$")
+
+    def test_remote_parent(self):
+        tracer = tracing.SimpleTracer(
+            traceparent="00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01"
+        )
+        span = tracer.start_span("call", tracing.INTERNAL)
+        self.assertEqual(span.trace_id, 0x0AF7651916CD43DD8448EB211C80319C)
+        self.assertEqual(span.parent_id, 0xB7AD6B7169203331)
+
+    def test_invalid_remote_parent(self):
+        with self.assertRaises(exceptions.InvalidOptions):
+            tracing.SimpleTracer(traceparent="nope")
+
+    def test_errors_are_recorded(self):
+        with self.assertRaises(KeyError):
+            with self.tracer.span("call", tracing.INTERNAL):
+                raise KeyError("boom")
+        span = self.ended[0]
+        self.assertIsInstance(span.error, KeyError)
+        self.assertEqual(span.attributes["error.type"], "KeyError")
+        self.assertIsNone(self.tracer.current_span())
+
+    def test_end_once(self):
+        span = self.tracer.start_span("call", tracing.INTERNAL)
+        span.add_event("retry", {"attempt": 1})
+        span.end()
+        span.end()
+        self.assertEqual(self.ended, [span])
+        self.assertEqual(span.events, [("retry", {"attempt": 1})])
+
+
+class TestOpenTelemetryTracer(unittest.TestCase):
+    @unittest.skipIf(tracing.opentelemetry_available(), "opentelemetry is installed")
+    def test_requires_opentelemetry(self):
+        with self.assertRaises(exceptions.InvalidOptions):
+            tracing.OpenTelemetryTracer()
+
+    @unittest.skipUnless(tracing.opentelemetry_available(), "opentelemetry is not installed")
+    def test_spans(self):
+        tracer = tracing.OpenTelemetryTracer()
+        headers = {}
+        with tracer.span("call", tracing.INTERNAL):
+            with tracer.span("attempt", tracing.CLIENT):
+                tracer.inject(headers)
+        self.assertIsInstance(headers, dict)
@@ -0,0 +1,116 @@
+"""Tests for the tornado_rest_client.transport module"""
+
+import unittest
+
+import mock
+
+from tornado import httpclient, simple_httpclient, testing, web
+
+from tornado_rest_client import api, exceptions, transport
+
+
+class HelloHandler(web.RequestHandler):
+    def get(self):
+        self.write({"hello": "world"})
+
+
+class TestTransport(unittest.TestCase):
+    def test_auto_picks_what_is_installed(self):
+        expected = transport.CURL if transport.curl_available() else transport.SIMPLE
+        self.assertEqual(transport.Transport().implementation, expected)
+
+    def test_invalid(self):
+        with self.assertRaises(exceptions.InvalidOptions):
+            transport.Transport(implementation="carrier-pigeon")
+
+    @mock.patch.object(transport, "curl_httpclient", None)
+    def test_curl_requires_pycurl(self):
+        with self.assertRaises(exceptions.InvalidOptions):
+            transport.Transport(implementation=transport.CURL)
+
+
+class TestTransportCreate(testing.AsyncTestCase):
+    def test_isolated_simple_client(self):
+        simple = transport.Transport(
+            implementation=transport.SIMPLE,
+            max_clients=42,
+            defaults={"user_agent": "unittest"},
+        )
+        client = simple.create()
+        self.addCleanup(client.close)
+
+        self.assertIsInstance(client, simple_httpclient.SimpleAsyncHTTPClient)
+        self.assertIsNot(client, httpclient.AsyncHTTPClient())
+        self.assertIsNot(client, simple.create())
+        self.assertEqual(client.max_clients, 42)
+        self.assertEqual(client.defaults["user_agent"], "unittest")
+
+    @unittest.skipUnless(transport.curl_available(), "pycurl is not installed")
+    def test_isolated_curl_client(self):
+        curl = transport.Transport(
+            implementation=transport.CURL, keep_alive=False, max_host_connections=2
+        )
+        client = curl.create()
+        self.addCleanup(client.close)
+        self.assertEqual(client.__class__.__name__, "CurlAsyncHTTPClient")
+        self.assertIn("prepare_curl_callback", client.defaults)
+
+    def test_shared_client(self):
+        configured = httpclient.AsyncHTTPClient._save_configuration()
+        shared = transport.Transport(implementation=transport.SIMPLE, max_clients=7, isolated=False)
+        client = shared.create()
+        self.addCleanup(client.close)
+        self.assertIsInstance(client, simple_httpclient.SimpleAsyncHTTPClient)
+        self.assertEqual(client.max_clients, 7)
+        self.assertIs(shared.create(), client)
+
+        # The process-wide client (and its configuration) was left alone
+        self.assertEqual(httpclient.AsyncHTTPClient._save_configuration(), configured)
+        self.assertIsNot(client, httpclient.AsyncHTTPClient())
+
+        # ... and a closed client is replaced
+        client.close()
+        replacement = shared.create()
+        self.addCleanup(replacement.close)
+        self.assertIsNot(replacement, client)
+
+    def test_rest_client_builds_its_client(self):
+        simple = transport.Transport(implementation=transport.SIMPLE)
+        rest_client = api.RestClient(transport=simple)
+        self.addCleanup(rest_client.close)
+        self.assertIs(rest_client.transport, simple)
+        self.assertIsInstance(rest_client._client, simple_httpclient.SimpleAsyncHTTPClient)
+        self.assertIsNot(rest_client._client, httpclient.AsyncHTTPClient())
+
+    def test_close(self):
+        rest_client = api.RestClient(transport=transport.Transport(implementation=transport.SIMPLE))
+        rest_client.close()
+        self.assertTrue(rest_client._client._closed)
+        rest_client.close()
+
+        # Supplied and shared clients are left open for their other users
+        supplied = httpclient.AsyncHTTPClient(force_instance=True)
+        self.addCleanup(supplied.close)
+        shared = transport.Transport(implementation=transport.SIMPLE, isolated=False)
+        self.addCleanup(shared.create().close)
+        for rest_client in (
+            api.RestClient(client=supplied),
+            api.RestClient(transport=shared),
+            api.RestClient(),
+        ):
+            rest_client.close()
+            self.assertFalse(rest_client._client._closed)
+
+
+class TestTransportFetch(testing.AsyncHTTPTestCase):
+    def get_app(self):
+        return web.Application([("/hello", HelloHandler)])
+
+    @testing.gen_test
+    async def test_fetch(self):
+        rest_client = api.RestClient(
+            transport=transport.Transport(max_clients=2, max_host_connections=1)
+        )
+        self.addCleanup(rest_client.close)
+        ret = await rest_client.fetch(url=self.get_url("/hello"), method="GET")
+        self.assertEqual(ret, {"hello": "world"})
@@ -0,0 +1,215 @@
+"""Tests for the tornado_rest_client.uploads module"""
+
+import io
+import os
+import tempfile
+
+from tornado import testing
+
+from tornado_rest_client import codec, exceptions, uploads
+
+
+async def send(upload, codec_=None):
+    """Runs the producer of `upload`, returns the chunks it wrote."""
+    chunks = []
+
+    async def write(chunk):
+        chunks.append(bytes(chunk))
+
+    producer = upload.producer(codec_ or codec.StdlibCodec())
+    await producer(write)
+    assert producer.sent == sum(len(chunk) for chunk in chunks)
+    return chunks
+
+
+class TestFileUpload(testing.AsyncTestCase):
+    def setUp(self):
+        super().setUp()
+        handle, self.path = tempfile.mkstemp()
+        self.data = os.urandom(10000)
+        with os.fdopen(handle, "wb") as file:
+            file.write(self.data)
+
+    def tearDown(self):
+        os.unlink(self.path)
+        super().tearDown()
+
+    @testing.gen_test
+    async def test_path(self):
+        upload = uploads.FileUpload(self.path, chunk_size=4096)
+        self.assertEqual(upload.length, 10000)
+        self.assertEqual(upload.filename, os.path.basename(self.path))
+        self.assertEqual(
+            upload.headers(),
+            {"Content-Type": "application/octet-stream", "Content-Length": "10000"},
+        )
+        chunks = await send(upload)
+        self.assertEqual([len(chunk) for chunk in chunks], [4096, 4096, 1808])
+        self.assertEqual(b"".join(chunks), self.data)
+
+        # Paths are opened again on every attempt
+        self.assertTrue(upload.replayable())
+        self.assertEqual(b"".join(await send(upload)), self.data)
+
+    @testing.gen_test
+    async def test_mmap_chunks(self):
+        upload = uploads.FileUpload(self.path)
+        chunks = []
+
+        async def write(chunk):
+            chunks.append(chunk)
+
+        await upload.producer(None)(write)
+        # Slices of the map, released once they were written
+        self.assertTrue(all(isinstance(chunk, memoryview) for chunk in chunks))
+        with self.assertRaises(ValueError):
+            bytes(chunks[0])
+
+    @testing.gen_test
+    async def test_open_file_from_position(self):
+        with open(self.path, "rb") as file:
+            file.seek(1000)
+            upload = uploads.FileUpload(file, content_type="text/csv")
+            self.assertEqual(upload.length, 9000)
+            self.assertEqual(b"".join(await send(upload)), self.data[1000:])
+            # Rewound to where it started
+            self.assertEqual(b"".join(await send(upload)), self.data[1000:])
+            self.assertFalse(file.closed)
+
+    @testing.gen_test
+    async def test_not_a_regular_file(self):
+        upload = uploads.FileUpload(io.BytesIO(b"abcdef"), chunk_size=4)
+        self.assertEqual(upload.length, 6)
+        self.assertEqual(upload.filename, "file")
+        self.assertEqual(await send(upload), [b"abcd", b"ef"])
+
+    @testing.gen_test
+    async def test_empty_file(self):
+        open(self.path, "wb").close()
+        upload = uploads.FileUpload(self.path)
+        self.assertEqual(upload.length, 0)
+        self.assertEqual(await send(upload), [])
+
+    @testing.gen_test
+    async def test_unseekable_file(self):
+        read, write = os.pipe()
+        os.write(write, b"piped")
+        os.close(write)
+        with open(read, "rb", buffering=0) as file:
+            upload = uploads.FileUpload(file)
+            self.assertIsNone(upload.length)
+            self.assertNotIn("Content-Length", upload.headers())
+            self.assertEqual(b"".join(await send(upload)), b"piped")
+            self.assertFalse(upload.replayable())
+
+
+class TestStreamUpload(testing.AsyncTestCase):
+    @testing.gen_test
+    async def test_generator(self):
+        upload = uploads.StreamUpload(iter([b"ab", "cd", b""]), content_type="text/plain")
+        self.assertEqual(upload.headers(), {"Content-Type": "text/plain"})
+        self.assertTrue(upload.replayable())
+        self.assertEqual(await send(upload), [b"ab", b"cd"])
+
+        self.assertFalse(upload.replayable())
+        with self.assertRaises(exceptions.UploadNotReplayable):
+            upload.producer(None)
+
+    @testing.gen_test
+    async def test_async_generator(self):
+        async def chunks():
+            for i in range(3):
+                yield b"%d" % i
+
+        upload = uploads.StreamUpload(chunks(), length=3)
+        self.assertEqual(upload.headers()["Content-Length"], "3")
+        self.assertEqual(await send(upload), [b"0", b"1", b"2"])
+
+    def test_not_started_until_written(self):
+        upload = uploads.StreamUpload(iter([b"ab"]))
+        upload.producer(None)
+        # The request never got to send it
+        self.assertTrue(upload.replayable())
+
+
+class TestNDJSONUpload(testing.AsyncTestCase):
+    @testing.gen_test
+    async def test_records(self):
+        records = [{"id": i} for i in range(5)]
+        upload = uploads.NDJSONUpload(records, chunk_size=20)
+        self.assertEqual(upload.content_type, "application/x-ndjson")
+        chunks = await send(upload)
+        self.assertEqual(len(chunks), 3)
+        lines = b"".join(chunks).splitlines()
+        self.assertEqual(lines, [b'{"id": %d}' % i for i in range(5)])
+        # A list can be sent again
+        self.assertTrue(upload.replayable())
+
+    @testing.gen_test
+    async def test_async_records(self):
+        async def records():
+            yield {"a": 1}
+            yield [2]
+
+        upload = uploads.NDJSONUpload(records())
+        self.assertEqual(await send(upload), [b'{"a": 1}\n[2]\n'])
+        self.assertFalse(upload.replayable())
+
+
+class TestMultipart(testing.AsyncTestCase):
+    @testing.gen_test
+    async def test_fields_and_files(self):
+        upload = uploads.Multipart(
+            fields={"title": "Weekly", 'a"b': b"raw"},
+            files={
+                "file": uploads.FileUpload(
+                    io.BytesIO(b"1,2\n"), content_type="text/csv", filename="r.csv"
+                )
+            },
+            boundary="xyz",
+        )
+        self.assertEqual(upload.content_type, "multipart/form-data; boundary=xyz")
+        body = b"".join(await send(upload))
+        self.assertEqual(
+            body,
+            b"--xyz\r\n"
+            b'Content-Disposition: form-data; name="title"\r\n\r\n'
+            b"Weekly\r\n"
+            b"--xyz\r\n"
+            b'Content-Disposition: form-data; name="a%22b"\r\n\r\n'
+            b"raw\r\n"
+            b"--xyz\r\n"
+            b'Content-Disposition: form-data; name="file"; filename="r.csv"\r\n'
+            b"Content-Type: text/csv\r\n\r\n"
+            b"1,2\n\r\n"
+            b"--xyz--\r\n",
+        )
+        self.assertEqual(upload.length, len(body))
+        self.assertTrue(upload.replayable())
+        self.assertEqual(b"".join(await send(upload)), body)
+
+    @testing.gen_test
+    async def test_streamed_part(self):
+        upload = uploads.Multipart(files={"data": iter([b"abc"])})
+        self.assertIsNone(upload.length)
+        self.assertNotIn("Content-Length", upload.headers())
+        body = b"".join(await send(upload))
+        self.assertIn(b'name="data"; filename="data"', body)
+        self.assertIn(b"\r\n\r\nabc\r\n", body)
+        self.assertFalse(upload.replayable())
+
+
+class TestWrap(testing.AsyncTestCase):
+    def test_wrap(self):
+        upload = uploads.StreamUpload(iter([]))
+        self.assertIs(uploads.wrap(upload), upload)
+        self.assertIsInstance(uploads.wrap(io.BytesIO()), uploads.FileUpload)
+        self.assertIsInstance(uploads.wrap(iter([b"a"])), uploads.StreamUpload)
+
+        async def chunks():
+            yield b"a"
+
+        self.assertIsInstance(uploads.wrap(chunks()), uploads.StreamUpload)
+        for body in ("text", b"bytes", {"a": 1}, [b"a"]):
+            with self.assertRaises(exceptions.InvalidOptions):
+                uploads.wrap(body)
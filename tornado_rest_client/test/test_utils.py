@@ -1,7 +1,9 @@
 import os
 import unittest
 
-from tornado_rest_client import utils
+from tornado import httputil
+
+from tornado_rest_client import exceptions, utils
 
 
 class TestUtils(unittest.TestCase):
@@ -53,3 +55,132 @@ class TestUtils(unittest.TestCase):
             string, tokens, left_wrapper="{", right_wrapper="}", strict=False
         )
         self.assertEqual(result, expect)
+
+
+class TestPathTemplate(unittest.TestCase):
+    def test_render(self):
+        template = utils.PathTemplate("/teams/%team%/users/%user%/info")
+        self.assertEqual(template.tokens, ("team", "user"))
+        self.assertEqual(
+            template.render({"team": "abc", "user": 12, "unused": {"a": 1}}),
+            "/teams/abc/users/12/info",
+        )
+
+    def test_render_without_tokens(self):
+        template = utils.PathTemplate("/test/%res/new")
+        self.assertEqual(template.tokens, ())
+        self.assertEqual(template.render(None), "/test/%res/new")
+
+    def test_render_repeated_token(self):
+        template = utils.PathTemplate("/%a%/%a%/%b%")
+        self.assertEqual(template.render({"a": "x", "b": False}), "/x/x/False")
+
+    def test_render_escapes_values(self):
+        template = utils.PathTemplate("/files/%name%/{raw}")
+        self.assertEqual(
+            template.render({"name": "a b/../ü?x=1"}),
+            "/files/a%20b%2F..%2F%C3%BC%3Fx%3D1/{raw}",
+        )
+        self.assertEqual(template.render({"name": "a-b_c.d~e"}), "/files/a-b_c.d~e/{raw}")
+
+    def test_render_missing_token(self):
+        template = utils.PathTemplate("/%a%/%b%")
+        with self.assertRaisesRegex(LookupError, "'b'"):
+            template.render({"a": 1})
+        with self.assertRaises(LookupError):
+            template.render(None)
+
+    def test_render_bad_type(self):
+        template = utils.PathTemplate("/%a%")
+        with self.assertRaises(LookupError):
+            template.render({"a": ["x"]})
+
+    def test_path_template_is_cached(self):
+        self.assertIs(utils.path_template("/%a%"), utils.path_template("/%a%"))
+
+
+class TestUrlWithQuery(unittest.TestCase):
+    def setUp(self):
+        utils._QUERIES.clear()
+
+    def test_matches_url_concat(self):
+        # The arguments the old url_concat based builder handled
+        for args in (
+            {"foo": "bar"},
+            {"foo": "bar baz", "xyz": "abc"},
+            {"z": 1, "a": 2.5, "m": "ü/?&=+#"},
+            {"cursor": "dXNlcjpVMDYxTkZUVDI=", "types": "a,b", "limit": 200},
+            {"bytes": b"caf\xc3\xa9", "tilde": "a~b", "dash": "a-b_c.d"},
+        ):
+            with self.subTest(args=args):
+                self.assertEqual(
+                    utils.url_with_query("http://unittest/api", args),
+                    httputil.url_concat("http://unittest/api", sorted(args.items())),
+                )
+
+    def test_bools(self):
+        self.assertEqual(
+            utils.url_with_query("http://u", {"a": True, "b": False}),
+            "http://u?a=true&b=false",
+        )
+
+    def test_keeps_falsy_values(self):
+        self.assertEqual(
+            utils.url_with_query("http://u", {"a": 0, "b": "", "c": None}),
+            "http://u?a=0&b=",
+        )
+        self.assertEqual(utils.url_with_query("http://u", {"c": None}), "http://u")
+        self.assertEqual(utils.url_with_query("http://u", {}), "http://u")
+
+    def test_lists(self):
+        self.assertEqual(
+            utils.url_with_query("http://u", {"id": [3, "a b", None, True], "x": (1,), "y": []}),
+            "http://u?id=3&id=a+b&id=true&x=1",
+        )
+
+    def test_existing_query(self):
+        self.assertEqual(
+            utils.url_with_query("http://u/p?page=2", {"a": 1}),
+            "http://u/p?page=2&a=1",
+        )
+        self.assertEqual(utils.url_with_query("http://u/p#top", {"a": 1}), "http://u/p?a=1#top")
+        self.assertEqual(utils.url_with_query("http://u/p?", {"a": 1}), "http://u/p?a=1")
+
+    def test_memo(self):
+        args = {"a": 1, "b": "x"}
+        url = utils.url_with_query("http://u", args)
+        self.assertIs(url, utils.url_with_query("http://u", dict(args)))
+        self.assertEqual(len(utils._QUERIES), 1)
+
+        # Equal, but not encoded the same way
+        self.assertEqual(utils.url_with_query("http://u", {"a": True}), "http://u?a=true")
+        self.assertEqual(utils.url_with_query("http://u", {"a": 1}), "http://u?a=1")
+        self.assertEqual(utils.url_with_query("http://u", {"a": 1.0}), "http://u?a=1.0")
+
+        # Unhashable arguments are encoded every time
+        utils.url_with_query("http://u", {"a": [1, 2]})
+        self.assertEqual(len(utils._QUERIES), 4)
+
+    def test_memo_tuples(self):
+        self.assertEqual(utils.url_with_query("http://u", {"id": (1, 2)}), "http://u?id=1&id=2")
+        self.assertEqual(
+            utils.url_with_query("http://u", {"id": (True, 2)}),
+            "http://u?id=true&id=2",
+        )
+        self.assertEqual(utils.url_with_query("http://u", {"id": (1,)}), "http://u?id=1")
+        self.assertEqual(utils.url_with_query("http://u", {"id": (1.0,)}), "http://u?id=1.0")
+
+    def test_memo_is_bounded(self):
+        for i in range(utils._MAX_QUERIES + 10):
+            utils.url_with_query("http://u", {"a": i})
+        self.assertLessEqual(len(utils._QUERIES), utils._MAX_QUERIES)
+
+
+class TestEndpointKey(unittest.TestCase):
+    def test_keys(self):
+        url = "http://a.com/foo?x=1"
+        self.assertEqual(utils.endpoint_key("host")(url), "a.com")
+        self.assertEqual(utils.endpoint_key("path")(url), "a.com/foo")
+        self.assertEqual(utils.endpoint_key(len)(url), len(url))
+        with self.assertRaises(exceptions.InvalidOptions):
+            utils.endpoint_key("nope", "bulkhead")
@@ -0,0 +1,262 @@
+"""
+:mod:`tornado_rest_client.tracing`
+^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^
+
+Distributed tracing of the calls made through a
+:class:`~tornado_rest_client.api.RestClient`.
+
+A client given a :class:`Tracer` wraps every
+:class:`~tornado_rest_client.api.RestConsumer` call (ie, one `http_get`, or
+one page of an `iter_get`) in an `INTERNAL` span, and every HTTP attempt made
+for it in a `CLIENT` child span. Retries show up as `retry` events on the
+call's span, with their `reason` and `wait`, and the failed attempt's span
+records the exception. The context of the attempt's span is sent along with
+the request, in a W3C `traceparent` header.
+
+Attempt spans carry the `OpenTelemetry HTTP semantic conventions
+<https://opentelemetry.io/docs/specs/semconv/http/http-spans/>`_:
+`http.request.method`, `url.full` (without its query string, which may hold
+credentials), `http.response.status_code`, `http.request.body.size`,
+`http.response.body.size` and `error.type`.
+
+With `opentelemetry-api` installed, :class:`OpenTelemetryTracer` hands the
+spans to the configured OpenTelemetry SDK, and uses its propagators:
+
+    >>> client = api.RestClient(tracer=tracing.OpenTelemetryTracer())
+
+Without it, :class:`SimpleTracer` keeps track of spans itself and hands them
+to a callback once they end.
+
+Nothing is traced, and only a few attribute lookups are made per request,
+when no tracer is set.
+"""
+
+import logging
+
+log = logging.getLogger(__name__)
+
+import contextlib
+import contextvars
+import random
+import time
+
+from tornado_rest_client import exceptions
+
+try:
+    from opentelemetry import propagate as otel_propagate
+    from opentelemetry import trace as otel_trace
+except ImportError:
+    otel_propagate = otel_trace = None
+
+#: Kind of the span of a consumer call
+INTERNAL = "INTERNAL"
+
+#: Kind of the span of an HTTP attempt
+CLIENT = "CLIENT"
+
+
+def opentelemetry_available():
+    """Whether the `opentelemetry-api` package is installed."""
+    return otel_trace is not None
+
+
+class Tracer:
+    """Base tracer.
+
+    Spans are created as children of the current span, which is tracked per
+    task (with :mod:`contextvars`) by :func:`activate`.
+    """
+
+    def start_span(self, name, kind, attributes=None):
+        """Starts a span, child of the current one.
+
+        :param str name: Name of the span
+        :param str kind: :data:`INTERNAL` or :data:`CLIENT`
+        :param dict attributes: Initial attributes
+        """
+        raise NotImplementedError()
+
+    def activate(self, span):
+        """Returns a context manager that makes `span` the current span."""
+        raise NotImplementedError()
+
+    def current_span(self):
+        """Returns the current span, or `None`."""
+        raise NotImplementedError()
+
+    def inject(self, headers):
+        """Adds the trace context headers of the current span to `headers`."""
+        raise NotImplementedError()
+
+    def set_error(self, span, exc):
+        """Records `exc` on `span`, and marks the span as failed."""
+        raise NotImplementedError()
+
+    @contextlib.contextmanager
+    def span(self, name, kind, attributes=None):
+        """Starts a span, and makes it current until the block exits.
+
+        An exception escaping the block is recorded on the span.
+        """
+        span = self.start_span(name, kind, attributes)
+        try:
+            with self.activate(span):
+                yield span
+        except BaseException as exc:
+            self.set_error(span, exc)
+            raise
+        finally:
+            span.end()
+
+
+class Span:
+    """A span of a :class:`SimpleTracer`."""
+
+    __slots__ = (
+        "name",
+        "kind",
+        "trace_id",
+        "span_id",
+        "parent_id",
+        "attributes",
+        "events",
+        "start_time",
+        "end_time",
+        "error",
+        "_on_end",
+    )
+
+    def __init__(self, name, kind, trace_id, span_id, parent_id, attributes, on_end):
+        self.name = name
+        self.kind = kind
+        self.trace_id = trace_id
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.attributes = dict(attributes or {})
+        self.events = []
+        self.start_time = time.time()
+        self.end_time = None
+        self.error = None
+        self._on_end = on_end
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.name!r}, {self.kind})"
+
+    @property
+    def traceparent(self):
+        """The W3C `traceparent` header of this span."""
+        return f"00-{self.trace_id:032x}-{self.span_id:016x}-01"
+
+    def set_attribute(self, key, value):
+        """Sets an attribute of the span."""
+        self.attributes[key] = value
+
+    def add_event(self, name, attributes=None):
+        """Records an event, as a `(name, attributes)` tuple."""
+        self.events.append((name, dict(attributes or {})))
+
+    def end(self):
+        """Ends the span, and hands it to the tracer's `on_end` callback."""
+        if self.end_time is None:
+            self.end_time = time.time()
+            if self._on_end is not None:
+                self._on_end(self)
+
+
+class SimpleTracer(Tracer):
+    """Tracks spans without any dependency, and propagates W3C trace context.
+
+    :param callable on_end: Called with every :class:`Span` once it ends, ie
+        to log or export it
+    :param str traceparent: The `traceparent` header of a remote parent (ie,
+        of the request being served), used for spans started without a
+        current span
+    """
+
+    def __init__(self, on_end=None, traceparent=None):
+        self.on_end = on_end
+        self._current = contextvars.ContextVar("tornado_rest_client_span", default=None)
+        self._remote = None
+        if traceparent is not None:
+            self._remote = self._parse(traceparent)
+
+    @staticmethod
+    def _parse(traceparent):
+        try:
+            _, trace_id, span_id, _ = traceparent.split("-")
+            return int(trace_id, 16), int(span_id, 16)
+        except ValueError:
+            raise exceptions.InvalidOptions(f"Invalid traceparent: {traceparent}") from None
+
+    def start_span(self, name, kind, attributes=None):
+        parent = self._current.get()
+        if parent is not None:
+            trace_id, parent_id = parent.trace_id, parent.span_id
+        elif self._remote is not None:
+            trace_id, parent_id = self._remote
+        else:
+            trace_id, parent_id = random.getrandbits(128) or 1, None
+        return Span(
+            name,
+            kind,
+            trace_id,
+            random.getrandbits(64) or 1,
+            parent_id,
+            attributes,
+            self.on_end,
+        )
+
+    @contextlib.contextmanager
+    def activate(self, span):
+        token = self._current.set(span)
+        try:
+            yield span
+        finally:
+            self._current.reset(token)
+
+    def current_span(self):
+        return self._current.get()
+
+    def inject(self, headers):
+        span = self._current.get()
+        if span is not None:
+            headers["traceparent"] = span.traceparent
+
+    def set_error(self, span, exc):
+        span.error = exc
+        span.set_attribute("error.type", type(exc).__qualname__)
+
+
+class OpenTelemetryTracer(Tracer):
+    """Hands spans to OpenTelemetry.
+
+    :param tracer: An `opentelemetry.trace.Tracer`, by default the one of the
+        global tracer provider
+    """
+
+    def __init__(self, tracer=None):
+        if not opentelemetry_available():
+            raise exceptions.InvalidOptions("OpenTelemetry tracing requires opentelemetry-api")
+        self._tracer = tracer or otel_trace.get_tracer(__name__)
+        self._kinds = {
+            INTERNAL: otel_trace.SpanKind.INTERNAL,
+            CLIENT: otel_trace.SpanKind.CLIENT,
+        }
+
+    def start_span(self, name, kind, attributes=None):
+        return self._tracer.start_span(name, kind=self._kinds[kind], attributes=attributes)
+
+    def activate(self, span):
+        return otel_trace.use_span(span, end_on_exit=False)
+
+    def current_span(self):
+        span = otel_trace.get_current_span()
+        return span if span.is_recording() else None
+
+    def inject(self, headers):
+        otel_propagate.inject(headers)
+
+    def set_error(self, span, exc):
+        span.record_exception(exc)
+        span.set_attribute("error.type", type(exc).__qualname__)
+        span.set_status(otel_trace.Status(otel_trace.StatusCode.ERROR, str(exc)))
@@ -0,0 +1,146 @@
+"""
+:mod:`tornado_rest_client.transport`
+^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^
+
+Configuration of the :class:`~tornado.httpclient.AsyncHTTPClient` used by a
+:class:`~tornado_rest_client.api.RestClient` to talk to its API.
+
+By default a :class:`~tornado_rest_client.api.RestClient` shares the
+process-wide :class:`~tornado.httpclient.AsyncHTTPClient`, which is the
+`simple_httpclient` unless configured otherwise: ten concurrent requests in
+total, and a new connection for every request. A :class:`Transport` builds a
+dedicated client instead, using `curl_httpclient` (which keeps connections
+alive and can cap connections per host) when `pycurl` is installed:
+
+    >>> client = api.RestClient(
+    ...     transport=transport.Transport(max_clients=50, max_host_connections=10))
+    >>> client.transport.implementation
+    'curl'
+"""
+
+import logging
+import weakref
+
+log = logging.getLogger(__name__)
+
+from tornado import ioloop, simple_httpclient
+
+from tornado_rest_client import exceptions
+
+try:
+    import pycurl
+
+    from tornado import curl_httpclient
+except ImportError:
+    pycurl = None
+    curl_httpclient = None
+
+AUTO = "auto"
+CURL = "curl"
+SIMPLE = "simple"
+
+
+def curl_available():
+    """Whether `pycurl` (and so `curl_httpclient`) can be used."""
+    return curl_httpclient is not None
+
+
+def _forbid_reuse(curl):
+    """`prepare_curl_callback` closing every connection after its request."""
+    curl.setopt(pycurl.FORBID_REUSE, 1)
+
+
+class Transport:
+    """Describes, and builds, the HTTP client used by a RestClient.
+
+    :param str implementation: `curl`, `simple`, or `auto` to use `curl` when
+        `pycurl` is installed and `simple` otherwise.
+    :param int max_clients: Requests the client may have in flight at once
+        (others are queued by tornado)
+    :param bool keep_alive: Reuse connections between requests. Only `curl`
+        can; the `simple` client always opens a new connection.
+    :param int max_host_connections: Connections `curl` may open to any one
+        host. Not supported by the `simple` client, use
+        :class:`~tornado_rest_client.bulkhead.Bulkheads` to cap requests per
+        endpoint instead.
+    :param bool isolated: Build a new client on every :func:`create`, rather
+        than share one (per IOLoop) between the RestClients given this
+        transport. Either way, the process-wide
+        :class:`~tornado.httpclient.AsyncHTTPClient` is left alone.
+    :param dict defaults: Default :class:`~tornado.httpclient.HTTPRequest`
+        arguments for every request made by the client.
+    """
+
+    def __init__(
+        self,
+        implementation=AUTO,
+        max_clients=10,
+        keep_alive=True,
+        max_host_connections=None,
+        isolated=True,
+        defaults=None,
+    ):
+        if implementation == AUTO:
+            implementation = CURL if curl_available() else SIMPLE
+        elif implementation == CURL and not curl_available():
+            raise exceptions.InvalidOptions("The curl transport requires pycurl")
+        elif implementation not in (CURL, SIMPLE):
+            raise exceptions.InvalidOptions(f"Unknown transport: {implementation}")
+
+        if implementation == SIMPLE and max_host_connections is not None:
+            log.warning("max_host_connections is not supported by the simple transport")
+
+        self.implementation = implementation
+        self.max_clients = max_clients
+        self.keep_alive = keep_alive
+        self.max_host_connections = max_host_connections
+        self.isolated = isolated
+        self.defaults = defaults or {}
+        # The clients shared by `create`, per IOLoop
+        self._clients = weakref.WeakKeyDictionary()
+
+    def __repr__(self):
+        return (
+            f"{self.__class__.__name__}({self.implementation}, " f"max_clients={self.max_clients})"
+        )
+
+    @property
+    def client_class(self):
+        """The :class:`~tornado.httpclient.AsyncHTTPClient` implementation."""
+        if self.implementation == CURL:
+            return curl_httpclient.CurlAsyncHTTPClient
+        return simple_httpclient.SimpleAsyncHTTPClient
+
+    def create(self):
+        """Returns a new (or this transport's shared) client, configured as
+        described.
+
+        Clients are bound to the current :class:`~tornado.ioloop.IOLoop`, so
+        this should be called from the loop the client will be used on.
+
+        :return: An :class:`~tornado.httpclient.AsyncHTTPClient`
+        """
+        if not self.isolated:
+            loop = ioloop.IOLoop.current()
+            client = self._clients.get(loop)
+            # pylint: disable=protected-access
+            if client is None or client._closed:
+                client = self._clients[loop] = self._build()
+            return client
+        return self._build()
+
+    def _build(self):
+        """Returns a new client, configured as described."""
+        defaults = dict(self.defaults)
+        if self.implementation == CURL and not self.keep_alive:
+            defaults.setdefault("prepare_curl_callback", _forbid_reuse)
+        kwargs = {"max_clients": self.max_clients, "defaults": defaults}
+
+        client = self.client_class(force_instance=True, **kwargs)
+
+        if self.implementation == CURL and self.max_host_connections:
+            # pylint: disable=protected-access
+            client._multi.setopt(pycurl.M_MAX_HOST_CONNECTIONS, self.max_host_connections)
+
+        log.debug("Created %s HTTP client: %s", self.implementation, client)
+        return client
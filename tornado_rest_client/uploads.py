@@ -0,0 +1,418 @@
+"""
+:mod:`tornado_rest_client.uploads`
+^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^
+
+Request bodies that are streamed to the server, rather than built in memory.
+
+An :class:`Upload` given as the `params` of
+:func:`~tornado_rest_client.api.RestClient.fetch` (or as the only positional
+argument of a consumer's `http_post`/`http_put`/`http_patch`, in which case
+any keyword arguments go in the query string) is handed to tornado as a
+`body_producer`, and written out one chunk at a time. Each chunk is only read
+once the previous one has been flushed to the socket, so memory stays flat
+however large the body is:
+
+    >>> await slack.files_upload().http_post(
+    ...     uploads.FileUpload('/var/backups/dump.tar.gz'), channels='C123')
+    >>> await api.http_post(uploads.NDJSONUpload(records()))
+    >>> await api.http_post(uploads.Multipart(
+    ...     fields={'title': 'Weekly report'},
+    ...     files={'file': uploads.FileUpload(open('report.csv', 'rb'),
+    ...                                       content_type='text/csv')}))
+
+* :class:`FileUpload` sends a file (by path, or an open binary file), reading
+  it through :mod:`mmap` when it can.
+* :class:`StreamUpload` sends the chunks of an iterator or async iterator
+  (ie, an async generator).
+* :class:`NDJSONUpload` sends records, one JSON document per line, encoded
+  with the client's codec.
+* :class:`Multipart` sends `multipart/form-data` fields and files.
+
+Bodies of a known size are sent with a `Content-Length`, the others with a
+chunked `Transfer-Encoding`. Streaming uploads need tornado's simple HTTP
+client, as its curl client does not support `body_producer`.
+
+Files and lists of records can be sent again, so failed uploads of them are
+retried as usual. Iterators cannot be rewound: once one has started to be
+sent, a failure that would otherwise be retried raises
+:class:`~tornado_rest_client.exceptions.UploadNotReplayable` instead.
+"""
+
+import logging
+
+log = logging.getLogger(__name__)
+
+import collections.abc
+import inspect
+import io
+import mmap
+import os
+import uuid
+
+from tornado_rest_client import exceptions
+
+#: Size of the chunks read from files, and of the batches of NDJSON lines
+CHUNK_SIZE = 64 * 1024
+
+#: HTTP methods that may carry an upload
+METHODS = frozenset(("POST", "PUT", "PATCH"))
+
+
+class _Producer:
+    """The `body_producer` of one attempt, counting the bytes it writes."""
+
+    __slots__ = ("upload", "codec", "sent")
+
+    def __init__(self, upload, codec):
+        self.upload = upload
+        self.codec = codec
+        self.sent = 0
+
+    async def __call__(self, write):
+        # Only now is the body consumed: a request that never got to send it
+        # (ie, the connection was refused) can be retried.
+        self.upload.started = True
+        async for chunk in self.upload.chunks(self.codec):
+            if chunk:
+                self.sent += len(chunk)
+                # Resolves once the chunk is flushed, which keeps us from
+                # reading faster than the server takes the data.
+                await write(chunk)
+
+
+async def _iterate(chunks):
+    """Yields the `bytes` chunks of an iterable or async iterable."""
+    if hasattr(chunks, "__aiter__"):
+        async for chunk in chunks:
+            yield chunk.encode("utf-8") if isinstance(chunk, str) else chunk
+    else:
+        for chunk in chunks:
+            yield chunk.encode("utf-8") if isinstance(chunk, str) else chunk
+
+
+class Upload:
+    """Base streamed request body.
+
+    Implement :func:`chunks`, and set :attr:`length` when the size of the
+    body is known up front.
+
+    :param str content_type: The `Content-Type` of the body
+    """
+
+    #: The default `Content-Type` of the body
+    content_type = "application/octet-stream"
+
+    #: Whether the body can be sent again once it has been (partly) sent
+    rewindable = True
+
+    def __init__(self, content_type=None):
+        if content_type is not None:
+            self.content_type = content_type
+        self.started = False
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.content_type}, length={self.length})"
+
+    @property
+    def length(self):
+        """Size of the body in bytes, or `None` if it is not known."""
+        return None
+
+    def replayable(self):
+        """Whether the body can be sent (again)."""
+        return self.rewindable or not self.started
+
+    def headers(self):
+        """Returns the headers describing the body."""
+        headers = {"Content-Type": self.content_type}
+        if self.length is not None:
+            headers["Content-Length"] = str(self.length)
+        return headers
+
+    async def chunks(self, codec):
+        """Yields the body, one `bytes` (or `memoryview`) chunk at a time.
+
+        :param Codec codec: The :class:`~tornado_rest_client.codec.Codec` of
+            the client
+        """
+        raise NotImplementedError()
+        yield  # pragma: no cover
+
+    def producer(self, codec):
+        """Returns the `body_producer` of a request sending this body.
+
+        :raises UploadNotReplayable: if the body was already sent, and cannot
+            be sent again
+        """
+        if not self.replayable():
+            raise exceptions.UploadNotReplayable(f"{self!r} was already sent")
+        return _Producer(self, codec)
+
+
+class FileUpload(Upload):
+    """Sends a file.
+
+    Regular files are read through :mod:`mmap`, so their chunks are handed to
+    the socket without being copied into Python `bytes` first. Other files
+    (pipes, :class:`io.BytesIO`, ...) are read `chunk_size` bytes at a time.
+
+    :param file: A path, or a file opened in binary mode. An open file is
+        sent from its current position, and is not closed.
+    :param str content_type: The `Content-Type` of the body
+    :param str filename: The name of the file in a :class:`Multipart` body,
+        by default the base name of its path
+    :param int chunk_size: Size of the chunks sent
+    """
+
+    def __init__(self, file, content_type=None, filename=None, chunk_size=CHUNK_SIZE):
+        super().__init__(content_type)
+        self.chunk_size = chunk_size
+        self._length = None
+        self._start = 0
+        if isinstance(file, (str, bytes, os.PathLike)):
+            self.path = os.fspath(file)
+            self.file = None
+            self._length = os.path.getsize(self.path)
+            name = self.path
+        else:
+            self.path = None
+            self.file = file
+            self.rewindable = _seekable(file)
+            if self.rewindable:
+                self._start = file.tell()
+                size = _size(file)
+                if size is not None:
+                    self._length = max(size - self._start, 0)
+            name = getattr(file, "name", None)
+        if isinstance(name, bytes):
+            name = os.fsdecode(name)
+        if filename is None and isinstance(name, str):
+            filename = os.path.basename(name)
+        self.filename = filename or "file"
+
+    @property
+    def length(self):
+        return self._length
+
+    async def chunks(self, codec):
+        if self.path is not None:
+            with open(self.path, "rb") as file:
+                async for chunk in self._read(file, 0):
+                    yield chunk
+            return
+
+        if self.rewindable:
+            self.file.seek(self._start)
+        async for chunk in self._read(self.file, self._start):
+            yield chunk
+
+    async def _read(self, file, start):
+        try:
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (AttributeError, OSError, ValueError, io.UnsupportedOperation):
+            # Not a regular file, or an empty one
+            mapped = None
+
+        if mapped is None:
+            while True:
+                chunk = file.read(self.chunk_size)
+                if not chunk:
+                    return
+                yield chunk
+
+        view = memoryview(mapped)
+        try:
+            for offset in range(start, len(mapped), self.chunk_size):
+                chunk = view[offset : offset + self.chunk_size]
+                yield chunk
+                # The chunk has been flushed by now
+                chunk.release()
+        finally:
+            try:
+                view.release()
+                mapped.close()
+            except BufferError:
+                # A failed write still holds a chunk, the map is closed along
+                # with it.
+                pass
+
+
+def _seekable(file):
+    try:
+        return file.seekable()
+    except (AttributeError, ValueError):
+        return False
+
+
+def _size(file):
+    """Returns the size of a seekable file, or `None`."""
+    try:
+        return os.fstat(file.fileno()).st_size
+    except (AttributeError, OSError, ValueError, io.UnsupportedOperation):
+        pass
+    try:
+        position = file.tell()
+        size = file.seek(0, io.SEEK_END)
+        file.seek(position)
+        return size
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+class StreamUpload(Upload):
+    """Sends the chunks of an iterator or async iterator.
+
+    Chunks are `bytes` (or `str`, sent UTF-8 encoded). The iterator is only
+    consumed as the chunks are sent, so it can be sent only once.
+
+    :param chunks: An iterable or async iterable (ie, an async generator) of
+        chunks
+    :param str content_type: The `Content-Type` of the body
+    :param int length: The size of the body in bytes, if known
+    """
+
+    rewindable = False
+
+    def __init__(self, chunks, content_type=None, length=None):
+        super().__init__(content_type)
+        self._chunks = chunks
+        self._length = length
+
+    @property
+    def length(self):
+        return self._length
+
+    async def chunks(self, codec):
+        async for chunk in _iterate(self._chunks):
+            yield chunk
+
+
+class NDJSONUpload(Upload):
+    """Sends records as newline delimited JSON.
+
+    Records are encoded with the client's codec, and batched into chunks of
+    about `chunk_size` bytes. A list (or tuple) of records can be sent again,
+    an iterator only once.
+
+    :param records: An iterable or async iterable of records
+    :param str content_type: The `Content-Type` of the body
+    :param int chunk_size: Size of the chunks sent
+    """
+
+    content_type = "application/x-ndjson"
+
+    def __init__(self, records, content_type=None, chunk_size=CHUNK_SIZE):
+        super().__init__(content_type)
+        self.records = records
+        self.chunk_size = chunk_size
+        self.rewindable = isinstance(records, collections.abc.Sequence)
+
+    async def chunks(self, codec):
+        batch = bytearray()
+        if hasattr(self.records, "__aiter__"):
+            async for record in self.records:
+                batch += codec.dumps(record)
+                batch += b"\n"
+                if len(batch) >= self.chunk_size:
+                    yield bytes(batch)
+                    batch.clear()
+        else:
+            for record in self.records:
+                batch += codec.dumps(record)
+                batch += b"\n"
+                if len(batch) >= self.chunk_size:
+                    yield bytes(batch)
+                    batch.clear()
+        if batch:
+            yield bytes(batch)
+
+
+def _quote(name):
+    """Escapes a name for a `Content-Disposition` header, as browsers do."""
+    return name.replace('"', "%22").replace("\r", "%0D").replace("\n", "%0A")
+
+
+class Multipart(Upload):
+    """Sends `multipart/form-data` fields and files.
+
+    :param dict fields: Field names, and their `str` (or `bytes`) values
+    :param dict files: Field names, and their :class:`Upload` (or anything
+        :func:`wrap` takes). The filename of a :class:`FileUpload` is sent
+        along with it.
+    :param str boundary: The boundary between the parts, random by default
+    """
+
+    def __init__(self, fields=None, files=None, boundary=None):
+        self.boundary = boundary or uuid.uuid4().hex
+        super().__init__(f"multipart/form-data; boundary={self.boundary}")
+
+        # Every part, as the `bytes` (or upload) of each of its pieces
+        self._parts = []
+        for name, value in (fields or {}).items():
+            if isinstance(value, str):
+                value = value.encode("utf-8")
+            self._parts.append(
+                (
+                    self._head(f'form-data; name="{_quote(name)}"', None),
+                    value,
+                )
+            )
+        for name, value in (files or {}).items():
+            upload = wrap(value)
+            filename = getattr(upload, "filename", None) or name
+            disposition = f'form-data; name="{_quote(name)}"; filename="{_quote(filename)}"'
+            self._parts.append((self._head(disposition, upload.content_type), upload))
+        self._tail = f"--{self.boundary}--\r\n".encode("ascii")
+
+        self.rewindable = all(
+            not isinstance(body, Upload) or body.rewindable for _, body in self._parts
+        )
+
+    def _head(self, disposition, content_type):
+        head = f"--{self.boundary}\r\nContent-Disposition: {disposition}\r\n"
+        if content_type is not None:
+            head += f"Content-Type: {content_type}\r\n"
+        return (head + "\r\n").encode("utf-8")
+
+    @property
+    def length(self):
+        length = len(self._tail)
+        for head, body in self._parts:
+            size = body.length if isinstance(body, Upload) else len(body)
+            if size is None:
+                return None
+            # Every part ends with a CRLF
+            length += len(head) + size + 2
+        return length
+
+    async def chunks(self, codec):
+        for head, body in self._parts:
+            if not isinstance(body, Upload):
+                yield head + body + b"\r\n"
+                continue
+            yield head
+            body.started = True
+            async for chunk in body.chunks(codec):
+                yield chunk
+            yield b"\r\n"
+        yield self._tail
+
+
+def wrap(body):
+    """Returns `body` as an :class:`Upload`.
+
+    :param body: An :class:`Upload`, a file opened in binary mode, or an
+        iterator or async iterator of chunks
+    :raises InvalidOptions: for anything else
+    """
+    if isinstance(body, Upload):
+        return body
+    if hasattr(body, "read"):
+        return FileUpload(body)
+    if (
+        hasattr(body, "__aiter__")
+        or inspect.isgenerator(body)
+        or isinstance(body, collections.abc.Iterator)
+    ):
+        return StreamUpload(body)
+    raise exceptions.InvalidOptions(f"Cannot upload {type(body).__name__}: {body!r}")
@@ -10,9 +10,25 @@ import logging
 log = logging.getLogger(__name__)
 
 import re
+import urllib.parse
 
 from typing import Dict, Union
 
+from tornado_rest_client import exceptions
+
+# Types of the values that may fill in a token
+_TOKEN_TYPES = (str, bool, int, float)
+
+# Values that need no URL-escaping, the common case
+_UNRESERVED = re.compile(r"[\w.~-]*\Z", re.ASCII)
+
+# Compiled path templates, by path
+_TEMPLATES = {}
+
+# Query strings, by url and arguments (see url_with_query)
+_QUERIES = {}
+_MAX_QUERIES = 1024
+
 
 def populate_with_tokens(
     string: str,
@@ -38,6 +54,9 @@ def populate_with_tokens(
 
         string='foo %ME% %bar%'
         populate_with_tokens(string, os.environ)  # 'foo biz %bar%'
+
+    See :func:`path_template` for the (escaped, and much cheaper) rendering
+    of the paths of a :class:`~tornado_rest_client.api.RestConsumer`.
     """
 
     # First things first, swap out all instances of %<str>% with any matching
@@ -48,9 +67,7 @@ def populate_with_tokens(
         for key, val in tokens.items():
 
             if type(val) not in allowed_types:
-                log.warning(
-                    "Token %s=%s is not in allowed types: %s", key, val, allowed_types
-                )
+                log.warning("Token %s=%s is not in allowed types: %s", key, val, allowed_types)
                 continue
 
             string = string.replace(f"{left_wrapper}{key}{right_wrapper}", str(val))
@@ -66,3 +83,168 @@ def populate_with_tokens(
         raise LookupError(f"Found un-matched tokens in JSON string: {missed_tokens}")
 
     return string
+
+
+class PathTemplate:
+    """A path with `%token%` placeholders, parsed once.
+
+    :param str path: The path, ie `/api/%team%/users/%user%`
+
+    The `tokens` a path needs are known once it has been parsed, so rendering
+    only looks up those (however many other values it is handed), checks
+    they are all there, and fills them in with a single string format.
+    """
+
+    __slots__ = ("path", "tokens", "_format")
+
+    _TOKEN = re.compile(r"%(\w+)%")
+
+    def __init__(self, path):
+        self.path = path
+        literals = self._TOKEN.split(path)
+        # split() alternates literal text and token names
+        self.tokens = tuple(literals[1::2])
+        self._format = "{}".join(
+            literal.replace("{", "{{").replace("}", "}}") for literal in literals[::2]
+        )
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.path!r})"
+
+    def render(self, tokens):
+        """Returns the path with its tokens replaced by URL-escaped values.
+
+        :param dict tokens: Values of the tokens. Values of tokens the path
+            does not use are ignored.
+        :raises LookupError: if a token of the path is missing from `tokens`,
+            or its value is not a `str`, `bool`, `int` or `float`
+        """
+        if not self.tokens:
+            return self.path
+        try:
+            values = [tokens[name] for name in self.tokens]
+        except (KeyError, TypeError):
+            missing = set(self.tokens).difference(tokens or ())
+            raise LookupError(f"Found un-matched tokens in path: {missing}") from None
+        escaped = []
+        for name, value in zip(self.tokens, values):
+            if type(value) not in _TOKEN_TYPES:
+                raise LookupError(f"Token {name}={value!r} is not in allowed types: {_TOKEN_TYPES}")
+            value = str(value)
+            if not _UNRESERVED.match(value):
+                value = urllib.parse.quote(value, safe="")
+            escaped.append(value)
+        return self._format.format(*escaped)
+
+
+def path_template(path):
+    """Returns the (cached) :class:`PathTemplate` of `path`."""
+    try:
+        return _TEMPLATES[path]
+    except KeyError:
+        template = _TEMPLATES[path] = PathTemplate(path)
+        return template
+
+
+def _query_value(value):
+    """Returns the escaped form of a query string key or value."""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, bytes):
+        return urllib.parse.quote_plus(value)
+    value = str(value)
+    if _UNRESERVED.match(value):
+        return value
+    return urllib.parse.quote_plus(value)
+
+
+def _encode_query(items):
+    pairs = []
+    for key, value in items:
+        if value is None:
+            continue
+        key = _query_value(key)
+        if isinstance(value, (list, tuple)):
+            for element in value:
+                if element is not None:
+                    pairs.append(f"{key}={_query_value(element)}")
+        else:
+            pairs.append(f"{key}={_query_value(value)}")
+    return "&".join(pairs)
+
+
+def url_with_query(url, args):
+    """Returns `url` with `args` appended to its query string.
+
+    The arguments are sorted by key, so that the URL is predictable. `None`
+    values are left out, `bool` values are sent as `true` or `false`, and
+    list (or tuple) values repeat their key once per element. Other falsy
+    values, like `0` or `""`, are sent as-is.
+
+    The URL is only parsed when it already has a query string (or a
+    fragment). Recent results are memoized, so repeated identical calls
+    (ie, polling) skip the encoding entirely.
+
+    :param str url: The URL to append the arguments to
+    :param dict args: Key/Value arguments
+    :return: The URL, like `<url>?abc=xyz&foo=bar`
+    """
+    items = sorted(args.items())
+    key = None
+    # Lists (and other unhashable values) are not memoized, and neither are
+    # tuples: equal tuples may hold elements of different types.
+    if not any(isinstance(v, tuple) for _, v in items):
+        try:
+            # `1`, `1.0` and `True` are equal (and hash the same), but are not
+            # sent the same way.
+            key = (url, tuple([(k, v, v.__class__) for k, v in items]))
+            return _QUERIES[key]
+        except KeyError:
+            pass
+        except TypeError:
+            key = None
+
+    query = _encode_query(items)
+    if not query:
+        result = url
+    elif "?" not in url and "#" not in url:
+        result = f"{url}?{query}"
+    else:
+        parts = urllib.parse.urlsplit(url)
+        if parts.query:
+            query = f"{parts.query}&{query}"
+        result = urllib.parse.urlunsplit(parts._replace(query=query))
+
+    if key is not None:
+        if len(_QUERIES) >= _MAX_QUERIES:
+            _QUERIES.clear()
+        _QUERIES[key] = result
+    return result
+
+
+def _host_key(url):
+    return urllib.parse.urlsplit(url).netloc
+
+
+def _path_key(url):
+    return "".join(urllib.parse.urlsplit(url)[1:3])
+
+
+def endpoint_key(key, name="endpoint"):
+    """Returns the function that maps a request URL to its endpoint.
+
+    Shared by the per-endpoint registries (ie, of circuit breakers and
+    bulkheads), so that they agree on what an endpoint is.
+
+    :param key: `host` for the host of the URL, `path` for its host and
+        path, or a callable that takes the URL and returns the key.
+    :param str name: What the key is for, in error messages
+    :raises InvalidOptions: if `key` is none of the above
+    """
+    if key == "host":
+        return _host_key
+    if key == "path":
+        return _path_key
+    if callable(key):
+        return key
+    raise exceptions.InvalidOptions(f"Unknown {name} key: {key}")